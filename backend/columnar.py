@@ -0,0 +1,148 @@
+"""
+Export colonnaire (Parquet) des résultats de scraping
+Colonnes typées, valeurs absentes à null (au lieu de "Non dispo"/"None"), ville, code postal
+et type d'association encodés en dictionnaire, event_count/avg_event_price numériques.
+Les enregistrements sont écrits par row groups au fil du scraping: la mémoire reste bornée
+à un row group et le fichier est lisible directement par pandas/pyarrow/DuckDB.
+
+pyarrow est optionnel: sans lui, l'export Parquet est simplement désactivé.
+"""
+import os
+from typing import Iterable, List, Optional
+
+from result_stats import MISSING_VALUES, to_number
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow est optionnel: seuls les exports CSV/HTML sont produits
+    pa = None
+    pq = None
+
+# Nombre d'enregistrements par row group (PARQUET_ROW_GROUP_SIZE)
+DEFAULT_ROW_GROUP_SIZE = 5000
+
+# Type Arrow de chaque colonne connue ("dictionary": chaînes répétitives encodées en dictionnaire)
+COLUMN_TYPES = {
+    'name': 'string',
+    'url': 'string',
+    'street_address': 'string',
+    'postal_code': 'dictionary',
+    'city': 'dictionary',
+    'email': 'string',
+    'phone': 'string',
+    'event_count': 'int32',
+    'avg_event_price': 'float64',
+    'association_type': 'dictionary',
+}
+
+
+# EXPORT_PARQUET et PARQUET_ROW_GROUP_SIZE sont lus à l'appel: la CLI charge le .env après l'import
+def parquet_available() -> bool:
+    """Export activé par défaut dès que pyarrow est installé (EXPORT_PARQUET=false pour le désactiver)"""
+    return pa is not None and os.getenv("EXPORT_PARQUET", "True").lower() in ('true', '1', 't')
+
+
+def configured_row_group_size() -> int:
+    return int(os.getenv("PARQUET_ROW_GROUP_SIZE", str(DEFAULT_ROW_GROUP_SIZE)))
+
+
+def _arrow_type(kind: str):
+    if kind == 'dictionary':
+        return pa.dictionary(pa.int32(), pa.string())
+    if kind == 'int32':
+        return pa.int32()
+    if kind == 'float64':
+        return pa.float64()
+    return pa.string()
+
+
+def build_schema(fields: Iterable[str]):
+    """Schéma Arrow des colonnes demandées (les colonnes inconnues sont des chaînes)"""
+    return pa.schema([pa.field(field, _arrow_type(COLUMN_TYPES.get(field, 'string'))) for field in fields])
+
+
+def clean_value(field: str, value):
+    """Convertit une valeur du scraper vers sa valeur typée (None pour les sentinelles)"""
+    kind = COLUMN_TYPES.get(field, 'string')
+    if kind in ('int32', 'float64'):
+        number = to_number(value)
+        if number is None:
+            return None
+        return int(number) if kind == 'int32' else float(number)
+    if value is None:
+        return None
+    value = str(value)
+    if not value or value in MISSING_VALUES:
+        return None
+    return value
+
+
+class ParquetResultsWriter:
+    """
+    Écrit des enregistrements dans un fichier Parquet, un row group tous les `row_group_size` enregistrements
+    Le fichier est écrit sous un nom temporaire puis renommé à la fermeture (jamais de fichier tronqué)
+    """
+
+    def __init__(self, path: str, fields: List[str], row_group_size: Optional[int] = None):
+        if pa is None:
+            raise RuntimeError("pyarrow n'est pas installé (pip install pyarrow)")
+        self.path = path
+        self.fields = list(fields)
+        self.row_group_size = row_group_size or configured_row_group_size()
+        self.schema = build_schema(self.fields)
+        self.rows_written = 0
+        self._columns = {field: [] for field in self.fields}
+        self._buffered = 0
+        self._tmp_path = f"{path}.tmp"
+        self._writer = pq.ParquetWriter(
+            self._tmp_path, self.schema,
+            compression="zstd",
+            use_dictionary=[field for field in self.fields if COLUMN_TYPES.get(field) == 'dictionary']
+        )
+
+    def write(self, record: dict):
+        for field in self.fields:
+            self._columns[field].append(clean_value(field, record.get(field)))
+        self._buffered += 1
+        if self._buffered >= self.row_group_size:
+            self.flush()
+
+    def write_all(self, records: Iterable[dict]):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        """Écrit les enregistrements en attente comme un row group"""
+        if not self._buffered:
+            return
+        arrays = []
+        for field in self.fields:
+            arrow_type = self.schema.field(field).type
+            if pa.types.is_dictionary(arrow_type):
+                arrays.append(pa.array(self._columns[field], type=pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(self._columns[field], type=arrow_type))
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+        self.rows_written += self._buffered
+        self._columns = {field: [] for field in self.fields}
+        self._buffered = 0
+
+    def close(self) -> Optional[str]:
+        """Termine le fichier; retourne son chemin, ou None si aucun enregistrement n'a été écrit"""
+        if self._writer is None:
+            return self.path if self.rows_written else None
+        self.flush()
+        self._writer.close()
+        self._writer = None
+        if not self.rows_written:
+            os.remove(self._tmp_path)
+            return None
+        os.replace(self._tmp_path, self.path)
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
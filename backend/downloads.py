@@ -0,0 +1,265 @@
+"""
+Téléchargement des fichiers de résultats
+Variantes compressées (gzip/br) pré-calculées à côté des fichiers, négociation Accept-Encoding
+et support des requêtes Range (reprise de téléchargement)
+"""
+import os
+import gzip
+import shutil
+import tempfile
+from typing import Optional, Tuple, List, Mapping
+from urllib.parse import quote
+
+from fastapi.responses import Response, StreamingResponse
+
+from helloscraper import metrics
+
+try:
+    import brotli
+except ImportError:  # brotli est optionnel: on se contente de gzip
+    brotli = None
+
+# Types de contenu par extension
+MEDIA_TYPES = {
+    ".csv": "text/csv; charset=utf-8",
+    ".html": "text/html; charset=utf-8",
+    ".txt": "text/plain; charset=utf-8",
+    ".json": "application/json",
+    ".ndjson": "application/x-ndjson",
+    ".parquet": "application/vnd.apache.parquet",
+}
+
+# Seuls les formats texte gagnent à être compressés
+COMPRESSIBLE_EXTENSIONS = {".csv", ".html", ".txt", ".json", ".ndjson"}
+
+# Suffixe des variantes compressées, par ordre de préférence
+ENCODING_SUFFIXES = {
+    "br": ".br",
+    "gzip": ".gz",
+}
+VARIANT_SUFFIXES = tuple(ENCODING_SUFFIXES.values())
+
+# En dessous de cette taille, la compression ne vaut pas le coup
+MIN_COMPRESS_SIZE = 1024
+
+CHUNK_SIZE = 64 * 1024
+
+
+def media_type_for(filename: str) -> str:
+    ext = os.path.splitext(filename)[1].lower()
+    return MEDIA_TYPES.get(ext, "application/octet-stream")
+
+
+def is_variant(filename: str) -> bool:
+    """Indique si le fichier est une variante compressée d'un autre fichier"""
+    return filename.endswith(VARIANT_SUFFIXES)
+
+
+def available_encodings() -> List[str]:
+    """Encodages que le serveur sait produire"""
+    return [encoding for encoding in ENCODING_SUFFIXES if encoding != "br" or brotli is not None]
+
+
+def variant_path(file_path: str, encoding: str) -> str:
+    return file_path + ENCODING_SUFFIXES[encoding]
+
+
+def variant_paths(file_path: str) -> List[str]:
+    return [variant_path(file_path, encoding) for encoding in ENCODING_SUFFIXES]
+
+
+def _is_compressible(file_path: str) -> bool:
+    if os.path.splitext(file_path)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+        return False
+    try:
+        return os.path.getsize(file_path) >= MIN_COMPRESS_SIZE
+    except OSError:
+        return False
+
+
+def _compress(file_path: str, encoding: str) -> str:
+    """
+    Écrit la variante compressée de manière atomique (fichier temporaire propre à l'appel, puis renommage)
+    Le nom temporaire garde le suffixe de la variante: un reste après un arrêt brutal n'est jamais listé
+    """
+    target = variant_path(file_path, encoding)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target) or ".", prefix=f".{os.path.basename(file_path)}.",
+                                    suffix=f".tmp{ENCODING_SUFFIXES[encoding]}")
+    try:
+        with os.fdopen(fd, "wb") as raw:
+            if encoding == "gzip":
+                with open(file_path, "rb") as src, gzip.GzipFile(os.path.basename(file_path), "wb", 6, raw) as dst:
+                    shutil.copyfileobj(src, dst, CHUNK_SIZE)
+            else:
+                compressor = brotli.Compressor(quality=9)
+                with open(file_path, "rb") as src:
+                    while True:
+                        chunk = src.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        raw.write(compressor.process(chunk))
+                    raw.write(compressor.finish())
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return target
+
+
+def ensure_variant(file_path: str, encoding: str) -> Optional[str]:
+    """
+    Retourne le chemin de la variante compressée à jour, en la (re)générant si besoin.
+    Retourne None si le fichier ne doit pas être compressé.
+    """
+    if encoding not in available_encodings() or not _is_compressible(file_path):
+        return None
+
+    target = variant_path(file_path, encoding)
+    try:
+        if os.path.getmtime(target) >= os.path.getmtime(file_path):
+            metrics.CACHE_HITS.inc(cache="compressed_variant")
+            return target
+    except OSError:
+        pass
+
+    metrics.CACHE_MISSES.inc(cache="compressed_variant")
+    return _compress(file_path, encoding)
+
+
+def write_compressed_variants(file_path: str) -> List[str]:
+    """Pré-calcule toutes les variantes compressées d'un fichier qui vient d'être écrit"""
+    return [path for path in (ensure_variant(file_path, e) for e in available_encodings()) if path]
+
+
+def remove_variants(file_path: str):
+    for path in variant_paths(file_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Choisit le meilleur encodage accepté par le client (br > gzip), None pour identity"""
+    if not accept_encoding:
+        return None
+
+    accepted = {}
+    for item in accept_encoding.split(","):
+        parts = item.strip().split(";")
+        coding = parts[0].strip().lower()
+        quality = 1.0
+        for param in parts[1:]:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+
+    candidates = [
+        e for e in available_encodings()
+        if accepted.get(e, accepted.get("*", 0.0)) > 0
+    ]
+    if not candidates:
+        return None
+    # À qualité égale, l'ordre de ENCODING_SUFFIXES décide
+    return max(candidates, key=lambda e: accepted.get(e, accepted.get("*", 0.0)))
+
+
+def parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Analyse un en-tête Range à plage unique ("bytes=a-b", "bytes=a-", "bytes=-n").
+    Retourne (début, fin inclusive), lève ValueError si la plage n'est pas satisfaisable
+    et retourne None si l'en-tête doit être ignoré (syntaxe inconnue, plages multiples).
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    start_text, sep, end_text = spec.strip().partition("-")
+    if not sep:
+        return None
+
+    try:
+        start = int(start_text) if start_text.strip() else None
+        end = int(end_text) if end_text.strip() else None
+    except ValueError:
+        return None
+
+    if start is None:
+        # Suffixe: les n derniers octets
+        if end is None:
+            return None
+        if end == 0:
+            raise ValueError("Plage vide")
+        start, end = max(size - end, 0), size - 1
+    else:
+        end = size - 1 if end is None else min(end, size - 1)
+
+    if start >= size or start > end:
+        raise ValueError("Plage non satisfaisable")
+    return start, end
+
+
+def _iter_file(path: str, start: int, length: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def file_response(path: str, filename: str, request_headers: Mapping[str, str], encoding: Optional[str] = None) -> Response:
+    """
+    Construit la réponse de téléchargement de `path` (éventuellement une variante compressée),
+    avec support de Range / If-Range
+    """
+    stat = os.stat(path)
+    size = stat.st_size
+    etag = f'"{stat.st_mtime_ns:x}-{size:x}{"-" + encoding if encoding else ""}"'
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Vary": "Accept-Encoding",
+        "Content-Disposition": _content_disposition(filename),
+    }
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    media_type = media_type_for(filename)
+
+    range_header = request_headers.get("range")
+    if_range = request_headers.get("if-range")
+    if range_header and (not if_range or if_range == etag):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{size}", **headers})
+
+        if byte_range:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(
+                _iter_file(path, start, end - start + 1),
+                status_code=206,
+                media_type=media_type,
+                headers=headers
+            )
+
+    headers["Content-Length"] = str(size)
+    return StreamingResponse(_iter_file(path, 0, size), media_type=media_type, headers=headers)
@@ -0,0 +1,164 @@
+"""
+Index en mémoire des fichiers de résultats
+Évite de re-scanner le dossier results/ à chaque appel de /api/files
+"""
+import os
+import json
+import base64
+import bisect
+import binascii
+import threading
+from datetime import datetime
+from typing import Optional, List, Dict, Tuple
+
+
+def encode_cursor(payload) -> str:
+    """Encode un curseur de pagination opaque"""
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Décode un curseur de pagination (lève ValueError si invalide)"""
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise ValueError(f"Curseur invalide: {cursor}") from e
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def decode_position_cursor(cursor: str) -> int:
+    """Curseur d'une position dans une liste (entier positif ou nul), ValueError sinon"""
+    position = decode_cursor(cursor)
+    if not _is_int(position) or position < 0:
+        raise ValueError(f"Curseur invalide: {cursor}")
+    return position
+
+
+def decode_key_cursor(cursor: str) -> Tuple[int, str]:
+    """Curseur d'une clé de tri (-mtime_ns, nom de fichier) de FileIndex, ValueError sinon"""
+    key = decode_cursor(cursor)
+    if not (isinstance(key, list) and len(key) == 2 and _is_int(key[0]) and isinstance(key[1], str)):
+        raise ValueError(f"Curseur invalide: {cursor}")
+    return key[0], key[1]
+
+
+class FileIndex:
+    """Index trié (plus récent en premier) des fichiers d'un dossier, mis à jour à l'écriture/suppression"""
+
+    def __init__(self, directory: str, ignore_suffixes: Tuple[str, ...] = ()):
+        self.directory = directory
+        # Fichiers annexes (ex: variantes compressées) à ne pas lister
+        self.ignore_suffixes = ignore_suffixes
+        self._lock = threading.Lock()
+        # Clés de tri (-mtime_ns, filename) maintenues en ordre croissant
+        self._keys: List[Tuple[int, str]] = []
+        self._entries: Dict[str, dict] = {}
+        # Incrémentée à chaque modification (sert à construire les ETag)
+        self.version = 0
+
+    def refresh(self):
+        """Scan complet du dossier (au démarrage uniquement)"""
+        entries = {}
+        if os.path.isdir(self.directory):
+            with os.scandir(self.directory) as it:
+                for dir_entry in it:
+                    if dir_entry.is_file() and not dir_entry.name.endswith(self.ignore_suffixes):
+                        entries[dir_entry.name] = self._make_entry(dir_entry.name, dir_entry.stat())
+
+        with self._lock:
+            self._entries = entries
+            self._keys = sorted(self._sort_key(e) for e in entries.values())
+            self.version += 1
+
+    def add(self, filename: str) -> Optional[dict]:
+        """Ajoute (ou met à jour) un fichier qui vient d'être écrit"""
+        if self.ignore_suffixes and filename.endswith(self.ignore_suffixes):
+            return None
+
+        file_path = os.path.join(self.directory, filename)
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            self.remove(filename)
+            return None
+
+        entry = self._make_entry(filename, stat)
+        with self._lock:
+            self._remove_locked(filename)
+            self._entries[filename] = entry
+            bisect.insort(self._keys, self._sort_key(entry))
+            self.version += 1
+        return self._public(entry)
+
+    def remove(self, filename: str):
+        """Retire un fichier supprimé de l'index"""
+        with self._lock:
+            self._remove_locked(filename)
+
+    def get(self, filename: str) -> Optional[dict]:
+        entry = self._entries.get(filename)
+        return self._public(entry) if entry else None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def page(self, limit: int = 100, cursor: Optional[str] = None, term: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """
+        Retourne une page de fichiers (plus récents en premier) et le curseur de la page suivante.
+        Le coût est proportionnel au nombre d'entrées parcourues, pas au nombre total de fichiers.
+        Lève ValueError si le curseur est invalide.
+        """
+        term = term.lower() if term else None
+
+        with self._lock:
+            start = 0
+            if cursor:
+                start = bisect.bisect_right(self._keys, decode_key_cursor(cursor))
+
+            files = []
+            next_cursor = None
+            last_key = None
+            for i in range(start, len(self._keys)):
+                key = self._keys[i]
+                if term and term not in key[1].lower():
+                    continue
+                if len(files) >= limit:
+                    next_cursor = encode_cursor(list(last_key))
+                    break
+                files.append(self._public(self._entries[key[1]]))
+                last_key = key
+
+        return files, next_cursor
+
+    def _remove_locked(self, filename: str):
+        entry = self._entries.pop(filename, None)
+        if entry is None:
+            return
+        key = self._sort_key(entry)
+        i = bisect.bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            del self._keys[i]
+        self.version += 1
+
+    @staticmethod
+    def _public(entry: dict) -> dict:
+        return {k: v for k, v in entry.items() if not k.startswith("_")}
+
+    @staticmethod
+    def _sort_key(entry: dict) -> Tuple[int, str]:
+        return (-entry["_mtime_ns"], entry["filename"])
+
+    @staticmethod
+    def _make_entry(filename: str, stat) -> dict:
+        return {
+            "filename": filename,
+            "size": stat.st_size,
+            "created_at": datetime.fromtimestamp(stat.st_ctime).isoformat(),
+            "modified_at": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            "_mtime_ns": stat.st_mtime_ns,
+        }
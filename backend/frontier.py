@@ -0,0 +1,571 @@
+"""
+Frontière d'URLs partagée entre plusieurs workers (processus ou machines)
+- SQLite pour plusieurs processus sur une même machine
+- Redis (ou compatible: Valkey, KeyDB...) pour plusieurs machines
+
+Les workers réservent des lots d'URLs avec un bail (lease) prolongé par heartbeat;
+un bail expiré remet l'URL dans la file. Un budget de politesse partagé espace
+les requêtes de tous les workers vers un même hôte.
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import random
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterable, List, Optional, Tuple
+
+# Durée d'un bail (secondes) avant remise en file si le worker ne donne plus signe de vie
+DEFAULT_LEASE_SECONDS = 120
+# Nombre de réservations d'une URL avant de l'abandonner
+DEFAULT_MAX_ATTEMPTS = 3
+# Intervalle minimal (secondes) entre deux requêtes vers un hôte, tous workers confondus
+# Défaut de run_worker: les appelants passent EngineConfig.politeness_interval (POLITENESS_INTERVAL)
+DEFAULT_POLITENESS_INTERVAL = 3.0
+
+
+def make_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class SQLiteFrontier:
+    """Frontière stockée dans une base SQLite (WAL), partagée par les processus d'une machine"""
+
+    def __init__(self, path: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS frontier (
+                job_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker_id TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (job_id, url)
+            );
+            CREATE INDEX IF NOT EXISTS frontier_status ON frontier (job_id, status, lease_expires);
+            CREATE TABLE IF NOT EXISTS frontier_results (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS frontier_results_job ON frontier_results (job_id, seq);
+            CREATE TABLE IF NOT EXISTS politeness (
+                key TEXT PRIMARY KEY,
+                next_slot REAL NOT NULL
+            );
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        # Une connexion par thread (le heartbeat tourne dans son propre thread)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def add(self, job_id: str, urls: Iterable[str]) -> int:
+        """Ajoute des URLs à la frontière (les doublons sont ignorés)"""
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO frontier (job_id, url) VALUES (?, ?)",
+                ((job_id, url) for url in urls)
+            )
+            return conn.total_changes - before
+
+    def mark_done(self, job_id: str, urls: Iterable[str]) -> int:
+        """Marque des URLs comme déjà traitées (ex: reprise depuis un CSV existant), sans résultat"""
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                """INSERT INTO frontier (job_id, url, status) VALUES (?, ?, 'done')
+                   ON CONFLICT (job_id, url) DO UPDATE
+                   SET status = 'done', worker_id = NULL, lease_expires = NULL
+                   WHERE status != 'done'""",
+                ((job_id, url) for url in urls)
+            )
+            return conn.total_changes - before
+
+    def claim(self, job_id: str, worker_id: str, batch_size: int, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> List[str]:
+        """Réserve jusqu'à `batch_size` URLs; les baux expirés sont d'abord remis en file"""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                """UPDATE frontier
+                   SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                       worker_id = NULL, lease_expires = NULL
+                   WHERE job_id = ? AND status = 'leased' AND lease_expires < ?""",
+                (self.max_attempts, job_id, now)
+            )
+            urls = [row[0] for row in conn.execute(
+                "SELECT url FROM frontier WHERE job_id = ? AND status = 'pending' ORDER BY rowid LIMIT ?",
+                (job_id, batch_size)
+            )]
+            conn.executemany(
+                """UPDATE frontier
+                   SET status = 'leased', worker_id = ?, lease_expires = ?, attempts = attempts + 1
+                   WHERE job_id = ? AND url = ?""",
+                ((worker_id, now + lease_seconds, job_id, url) for url in urls)
+            )
+        return urls
+
+    def heartbeat(self, job_id: str, worker_id: str, urls: Iterable[str], lease_seconds: float = DEFAULT_LEASE_SECONDS) -> int:
+        """Prolonge les baux encore détenus par ce worker"""
+        expires = time.time() + lease_seconds
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                """UPDATE frontier SET lease_expires = ?
+                   WHERE job_id = ? AND url = ? AND worker_id = ? AND status = 'leased'""",
+                ((expires, job_id, url, worker_id) for url in urls)
+            )
+            return conn.total_changes - before
+
+    def complete(self, job_id: str, url: str, worker_id: str, record: Optional[dict]) -> bool:
+        """Marque une URL comme traitée et enregistre son résultat (une seule fois par URL)"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                """UPDATE frontier SET status = 'done', worker_id = ?, lease_expires = NULL
+                   WHERE job_id = ? AND url = ? AND status != 'done'""",
+                (worker_id, job_id, url)
+            )
+            if cursor.rowcount == 0:
+                return False
+            if record is not None:
+                conn.execute(
+                    "INSERT INTO frontier_results (job_id, url, data) VALUES (?, ?, ?)",
+                    (job_id, url, json.dumps(record, ensure_ascii=False))
+                )
+            return True
+
+    def release(self, job_id: str, url: str, worker_id: str):
+        """Rend une URL en échec à la file (ou l'abandonne après max_attempts réservations)"""
+        with self._transaction() as conn:
+            conn.execute(
+                """UPDATE frontier
+                   SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                       worker_id = NULL, lease_expires = NULL
+                   WHERE job_id = ? AND url = ? AND worker_id = ? AND status = 'leased'""",
+                (self.max_attempts, job_id, url, worker_id)
+            )
+
+    def stats(self, job_id: str) -> dict:
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        for status, count in self._conn().execute(
+            "SELECT status, COUNT(*) FROM frontier WHERE job_id = ? GROUP BY status", (job_id,)
+        ):
+            counts[status] = count
+        return counts
+
+    def failed_urls(self, job_id: str) -> List[str]:
+        """URLs abandonnées après max_attempts réservations"""
+        return [row[0] for row in self._conn().execute(
+            "SELECT url FROM frontier WHERE job_id = ? AND status = 'failed' ORDER BY url", (job_id,)
+        )]
+
+    def remaining(self, job_id: str) -> int:
+        """Nombre d'URLs encore en file ou réservées"""
+        stats = self.stats(job_id)
+        return stats["pending"] + stats["leased"]
+
+    def active_jobs(self) -> List[str]:
+        """Jobs ayant encore des URLs en file ou réservées"""
+        return [row[0] for row in self._conn().execute(
+            "SELECT DISTINCT job_id FROM frontier WHERE status IN ('pending', 'leased')"
+        )]
+
+    def results(self, job_id: str, after: int = 0) -> Tuple[List[dict], int]:
+        """Résultats enregistrés après le curseur `after`; retourne (résultats, nouveau curseur)"""
+        records = []
+        cursor = after
+        for seq, data in self._conn().execute(
+            "SELECT seq, data FROM frontier_results WHERE job_id = ? AND seq > ? ORDER BY seq",
+            (job_id, after)
+        ):
+            records.append(json.loads(data))
+            cursor = seq
+        return records, cursor
+
+    def acquire_slot(self, key: str, interval: float) -> float:
+        """Réserve le prochain créneau de requête pour `key`; retourne l'attente (secondes) avant de requêter"""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT next_slot FROM politeness WHERE key = ?", (key,)).fetchone()
+            slot = max(now, row[0]) if row else now
+            conn.execute(
+                "INSERT OR REPLACE INTO politeness (key, next_slot) VALUES (?, ?)",
+                (key, slot + interval)
+            )
+        return slot - now
+
+    def hold(self, key: str, seconds: float):
+        """Repousse le prochain créneau de `key` d'au moins `seconds` (disjoncteur ouvert): tous les workers attendent"""
+        until = time.time() + seconds
+        with self._transaction() as conn:
+            conn.execute(
+                """INSERT INTO politeness (key, next_slot) VALUES (?, ?)
+                   ON CONFLICT(key) DO UPDATE SET next_slot = MAX(next_slot, excluded.next_slot)""",
+                (key, until)
+            )
+
+
+class RedisFrontier:
+    """Frontière stockée dans Redis (ou serveur compatible), partagée entre plusieurs machines"""
+
+    # Les scripts Lua rendent chaque opération atomique et utilisent l'horloge du serveur
+    _CLAIM = """
+        local t = redis.call('TIME')
+        local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+        local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)
+        for _, url in ipairs(expired) do
+            redis.call('ZREM', KEYS[2], url)
+            redis.call('HDEL', KEYS[3], url)
+            if tonumber(redis.call('HGET', KEYS[4], url) or '0') >= tonumber(ARGV[4]) then
+                redis.call('SADD', KEYS[5], url)
+            else
+                redis.call('LPUSH', KEYS[1], url)
+            end
+        end
+        local claimed = {}
+        for i = 1, tonumber(ARGV[1]) do
+            local url = redis.call('LPOP', KEYS[1])
+            if not url then break end
+            redis.call('ZADD', KEYS[2], now + tonumber(ARGV[2]), url)
+            redis.call('HSET', KEYS[3], url, ARGV[3])
+            redis.call('HINCRBY', KEYS[4], url, 1)
+            table.insert(claimed, url)
+        end
+        return claimed
+    """
+
+    _HEARTBEAT = """
+        local t = redis.call('TIME')
+        local expires = tonumber(t[1]) + tonumber(t[2]) / 1000000 + tonumber(ARGV[2])
+        local extended = 0
+        for i = 3, #ARGV do
+            if redis.call('HGET', KEYS[2], ARGV[i]) == ARGV[1] then
+                redis.call('ZADD', KEYS[1], 'XX', expires, ARGV[i])
+                extended = extended + 1
+            end
+        end
+        return extended
+    """
+
+    _COMPLETE = """
+        if redis.call('SADD', KEYS[1], ARGV[1]) == 0 then
+            return 0
+        end
+        redis.call('ZREM', KEYS[2], ARGV[1])
+        redis.call('HDEL', KEYS[3], ARGV[1])
+        redis.call('SREM', KEYS[5], ARGV[1])
+        if ARGV[2] ~= '' then
+            redis.call('RPUSH', KEYS[4], ARGV[2])
+        end
+        return 1
+    """
+
+    _RELEASE = """
+        if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+            return 0
+        end
+        redis.call('ZREM', KEYS[1], ARGV[1])
+        redis.call('HDEL', KEYS[2], ARGV[1])
+        if tonumber(redis.call('HGET', KEYS[3], ARGV[1]) or '0') >= tonumber(ARGV[3]) then
+            redis.call('SADD', KEYS[4], ARGV[1])
+        else
+            redis.call('RPUSH', KEYS[5], ARGV[1])
+        end
+        return 1
+    """
+
+    _ADD = """
+        local added = 0
+        for i = 1, #ARGV do
+            if redis.call('SADD', KEYS[1], ARGV[i]) == 1 then
+                redis.call('RPUSH', KEYS[2], ARGV[i])
+                added = added + 1
+            end
+        end
+        return added
+    """
+
+    _MARK_DONE = """
+        local marked = 0
+        for i = 1, #ARGV do
+            local url = ARGV[i]
+            local is_new = redis.call('SADD', KEYS[1], url) == 1
+            if redis.call('SADD', KEYS[2], url) == 1 then
+                if not is_new then
+                    redis.call('LREM', KEYS[3], 0, url)
+                    redis.call('ZREM', KEYS[4], url)
+                    redis.call('HDEL', KEYS[5], url)
+                    redis.call('SREM', KEYS[6], url)
+                end
+                marked = marked + 1
+            end
+        end
+        return marked
+    """
+
+    _ACQUIRE_SLOT = """
+        local t = redis.call('TIME')
+        local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+        local slot = math.max(now, tonumber(redis.call('GET', KEYS[1]) or '0'))
+        redis.call('SET', KEYS[1], tostring(slot + tonumber(ARGV[1])), 'EX', 3600)
+        return tostring(slot - now)
+    """
+
+    _HOLD = """
+        local t = redis.call('TIME')
+        local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+        local slot = math.max(now + tonumber(ARGV[1]), tonumber(redis.call('GET', KEYS[1]) or '0'))
+        redis.call('SET', KEYS[1], tostring(slot), 'EX', 3600)
+        return 1
+    """
+
+    def __init__(self, url: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS, prefix: str = "helloscraper"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("Le paquet 'redis' est requis pour une frontière Redis (pip install redis)") from e
+
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.max_attempts = max_attempts
+        self.prefix = prefix
+        self._claim = self.client.register_script(self._CLAIM)
+        self._heartbeat = self.client.register_script(self._HEARTBEAT)
+        self._complete = self.client.register_script(self._COMPLETE)
+        self._release = self.client.register_script(self._RELEASE)
+        self._add = self.client.register_script(self._ADD)
+        self._mark_done = self.client.register_script(self._MARK_DONE)
+        self._acquire_slot = self.client.register_script(self._ACQUIRE_SLOT)
+        self._hold = self.client.register_script(self._HOLD)
+
+    def _key(self, job_id: str, name: str) -> str:
+        # Les accolades gardent les clés d'un job sur le même slot en mode cluster
+        return f"{self.prefix}:{{{job_id}}}:{name}"
+
+    def add(self, job_id: str, urls: Iterable[str]) -> int:
+        urls = list(urls)
+        if not urls:
+            return 0
+        self.client.sadd(f"{self.prefix}:jobs", job_id)
+        return int(self._add(keys=[self._key(job_id, "seen"), self._key(job_id, "pending")], args=urls))
+
+    def mark_done(self, job_id: str, urls: Iterable[str]) -> int:
+        urls = list(urls)
+        if not urls:
+            return 0
+        return int(self._mark_done(
+            keys=[
+                self._key(job_id, "seen"),
+                self._key(job_id, "done"),
+                self._key(job_id, "pending"),
+                self._key(job_id, "leased"),
+                self._key(job_id, "owner"),
+                self._key(job_id, "failed"),
+            ],
+            args=urls
+        ))
+
+    def claim(self, job_id: str, worker_id: str, batch_size: int, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> List[str]:
+        return list(self._claim(
+            keys=[
+                self._key(job_id, "pending"),
+                self._key(job_id, "leased"),
+                self._key(job_id, "owner"),
+                self._key(job_id, "attempts"),
+                self._key(job_id, "failed"),
+            ],
+            args=[batch_size, lease_seconds, worker_id, self.max_attempts]
+        ))
+
+    def heartbeat(self, job_id: str, worker_id: str, urls: Iterable[str], lease_seconds: float = DEFAULT_LEASE_SECONDS) -> int:
+        urls = list(urls)
+        if not urls:
+            return 0
+        return int(self._heartbeat(
+            keys=[self._key(job_id, "leased"), self._key(job_id, "owner")],
+            args=[worker_id, lease_seconds, *urls]
+        ))
+
+    def complete(self, job_id: str, url: str, worker_id: str, record: Optional[dict]) -> bool:
+        data = json.dumps(record, ensure_ascii=False) if record is not None else ""
+        return bool(self._complete(
+            keys=[
+                self._key(job_id, "done"),
+                self._key(job_id, "leased"),
+                self._key(job_id, "owner"),
+                self._key(job_id, "results"),
+                self._key(job_id, "failed"),
+            ],
+            args=[url, data]
+        ))
+
+    def release(self, job_id: str, url: str, worker_id: str):
+        self._release(
+            keys=[
+                self._key(job_id, "leased"),
+                self._key(job_id, "owner"),
+                self._key(job_id, "attempts"),
+                self._key(job_id, "failed"),
+                self._key(job_id, "pending"),
+            ],
+            args=[url, worker_id, self.max_attempts]
+        )
+
+    def stats(self, job_id: str) -> dict:
+        pipe = self.client.pipeline()
+        pipe.llen(self._key(job_id, "pending"))
+        pipe.zcard(self._key(job_id, "leased"))
+        pipe.scard(self._key(job_id, "done"))
+        pipe.scard(self._key(job_id, "failed"))
+        pending, leased, done, failed = pipe.execute()
+        return {"pending": pending, "leased": leased, "done": done, "failed": failed}
+
+    def failed_urls(self, job_id: str) -> List[str]:
+        return sorted(self.client.smembers(self._key(job_id, "failed")))
+
+    def remaining(self, job_id: str) -> int:
+        stats = self.stats(job_id)
+        return stats["pending"] + stats["leased"]
+
+    def active_jobs(self) -> List[str]:
+        active = []
+        for job_id in self.client.smembers(f"{self.prefix}:jobs"):
+            if self.remaining(job_id):
+                active.append(job_id)
+            else:
+                self.client.srem(f"{self.prefix}:jobs", job_id)
+        return active
+
+    def results(self, job_id: str, after: int = 0) -> Tuple[List[dict], int]:
+        raw = self.client.lrange(self._key(job_id, "results"), after, -1)
+        return [json.loads(item) for item in raw], after + len(raw)
+
+    def acquire_slot(self, key: str, interval: float) -> float:
+        return float(self._acquire_slot(keys=[f"{self.prefix}:politeness:{key}"], args=[interval]))
+
+    def hold(self, key: str, seconds: float):
+        self._hold(keys=[f"{self.prefix}:politeness:{key}"], args=[seconds])
+
+
+def open_frontier(url: str):
+    """Ouvre une frontière depuis une URL: sqlite:///chemin/vers/base.db ou redis://hote:6379/0"""
+    if url.startswith("sqlite:///"):
+        return SQLiteFrontier(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisFrontier(url)
+    raise ValueError(f"URL de frontière non supportée: {url}")
+
+
+def run_worker(
+    frontier,
+    job_id: str,
+    worker_id: str,
+    process_url: Callable[[str], Optional[dict]],
+    politeness_key: str,
+    politeness_interval: float = DEFAULT_POLITENESS_INTERVAL,
+    batch_size: int = 5,
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    idle_timeout: float = 0,
+    on_progress: Optional[Callable[[], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    log: Callable[..., None] = print
+) -> int:
+    """
+    Boucle d'un worker: réserve des lots d'URLs, les traite en respectant le budget de politesse
+    partagé et enregistre les résultats. S'arrête quand la frontière du job est vide
+    (après `idle_timeout` secondes sans travail). `on_progress` est appelé après chaque URL
+    et pendant les attentes. Retourne le nombre d'URLs traitées.
+    """
+    held: List[str] = []
+    held_lock = threading.Lock()
+    stop_heartbeat = threading.Event()
+
+    def heartbeat_loop():
+        while not stop_heartbeat.wait(lease_seconds / 3):
+            with held_lock:
+                urls = list(held)
+            try:
+                frontier.heartbeat(job_id, worker_id, urls, lease_seconds)
+            except Exception as e:
+                log(f"⚠️  Heartbeat impossible: {e}", "warning")
+
+    heartbeat_thread = threading.Thread(target=heartbeat_loop, daemon=True)
+    heartbeat_thread.start()
+
+    processed = 0
+    idle_since = None
+    try:
+        while not (should_stop and should_stop()):
+            urls = frontier.claim(job_id, worker_id, batch_size, lease_seconds)
+            if not urls:
+                if on_progress:
+                    on_progress()
+                if frontier.remaining(job_id) == 0:
+                    idle_since = idle_since or time.time()
+                    if time.time() - idle_since >= idle_timeout:
+                        break
+                # D'autres workers détiennent encore des baux (qui peuvent expirer)
+                time.sleep(min(5.0, lease_seconds / 4))
+                continue
+
+            idle_since = None
+            with held_lock:
+                held[:] = urls
+
+            for url in urls:
+                if should_stop and should_stop():
+                    frontier.release(job_id, url, worker_id)
+                    continue
+
+                wait = frontier.acquire_slot(politeness_key, politeness_interval)
+                time.sleep(wait + random.uniform(0, politeness_interval / 4))
+
+                try:
+                    record = process_url(url)
+                except Exception as e:
+                    log(f"❌ Erreur: {e}", "error")
+                    record = None
+
+                if record:
+                    frontier.complete(job_id, url, worker_id, record)
+                    processed += 1
+                else:
+                    frontier.release(job_id, url, worker_id)
+
+                with held_lock:
+                    held.remove(url)
+                if on_progress:
+                    on_progress()
+    finally:
+        stop_heartbeat.set()
+        heartbeat_thread.join(timeout=1)
+
+    return processed
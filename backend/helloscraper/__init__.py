@@ -0,0 +1,43 @@
+"""
+Moteur de scraping HelloAsso, partagé par la CLI (scraper.py), l'API (scraper_wrapper.py)
+et les workers (worker.py)
+
+Le paquet est autonome (instrumentation dans helloscraper.metrics, géocodage dans helloscraper.geo,
+imports relatifs entre sous-modules) et son import n'a aucun effet de bord: pas de gestionnaire
+de signaux, pas de configuration du logging, pas de lecture de .env ni de l'environnement.
+Les sous-modules (et requests, BeautifulSoup) ne sont importés qu'au premier accès:
+
+    from helloscraper import EngineConfig, Fetcher, get_association_details
+    fetcher = Fetcher(EngineConfig.from_env())
+    details = get_association_details(fetcher, "https://www.helloasso.com/associations/mon-asso")
+"""
+import importlib
+
+# Nom public -> sous-module qui le définit
+_EXPORTS = {
+    "EngineConfig": "config",
+    "Fetcher": "fetch",
+    "generate_headers": "fetch",
+    "RESULT_FIELDS": "extract",
+    "get_association_details": "extract",
+    "parse_association_page": "extract",
+    "parse_address": "extract",
+    "identify_association_type": "extract",
+    "parse_search_page": "search",
+    "crawl_association_links": "search",
+    "get_all_association_links": "search",
+    "LastmodIndex": "sitemap",
+    "crawl_sitemap_links": "sitemap",
+    "get_sitemap_association_links": "sitemap",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,123 @@
+"""
+Disjoncteur (circuit breaker) par hôte, partagé par tous les Fetcher du processus
+- fermé: les requêtes passent; le taux d'échec (403, 429, 5xx, erreurs réseau) est suivi sur une fenêtre glissante
+- ouvert: au-delà du seuil, plus aucune requête vers l'hôte pendant open_seconds (doublé à chaque sonde en échec)
+- semi-ouvert: une seule requête sonde passe; son résultat referme ou rouvre le circuit
+  La sonde est identifiée par un jeton: le résultat tardif d'une requête admise avant l'ouverture est ignoré
+Tous les jobs et workers du processus attendent donc ensemble au lieu de continuer à solliciter le serveur.
+"""
+import time
+import itertools
+import threading
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+from . import metrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+
+    def __init__(self, host: str, window: int = 20, min_requests: int = 10, failure_rate: float = 0.5,
+                 open_seconds: float = 60.0, max_open_seconds: float = 600.0):
+        self.host = host
+        self.min_requests = min_requests
+        self.failure_rate = failure_rate
+        self.base_open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.state = CLOSED
+        self.open_seconds = open_seconds
+        self.opened_until = 0.0
+        self._outcomes = deque(maxlen=window)  # True = échec
+        self._probe: Optional[int] = None  # jeton de la sonde en cours
+        self._tokens = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str):
+        self.state = state
+        metrics.CIRCUIT_TRANSITIONS.inc(host=self.host, state=state)
+
+    def before_request(self) -> Tuple[float, Optional[int]]:
+        """
+        Retourne (attente, sonde): attente 0 autorise la requête, sinon délai conseillé (secondes) avant de redemander
+        En semi-ouvert, seul le premier appelant obtient l'autorisation: c'est la sonde, et `sonde` est son jeton
+        (None pour une requête ordinaire), à rendre à record() ou release()
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return 0.0, None
+            now = time.time()
+            if self.state == OPEN:
+                if now < self.opened_until:
+                    return self.opened_until - now, None
+                self._transition(HALF_OPEN)
+            if self._probe is not None:
+                # Une sonde est en cours: réessayer peu après
+                return 1.0, None
+            self._probe = next(self._tokens)
+            return 0.0, self._probe
+
+    def release(self, probe: Optional[int]):
+        """La sonde autorisée n'a finalement pas été envoyée (requête annulée): un autre appelant pourra sonder"""
+        with self._lock:
+            if probe is not None and probe == self._probe:
+                self._probe = None
+
+    def record(self, failure: bool, probe: Optional[int] = None) -> bool:
+        """
+        Enregistre le résultat d'une requête autorisée; retourne True si ce résultat vient d'ouvrir le circuit
+        Hors circuit fermé, seul le résultat de la sonde en cours (même jeton) compte
+        """
+        with self._lock:
+            if probe is not None:
+                if self.state != HALF_OPEN or probe != self._probe:
+                    # Sonde abandonnée ou d'un épisode précédent
+                    return False
+                self._probe = None
+                if failure:
+                    # Sonde en échec: circuit rouvert pour une durée doublée
+                    self.open_seconds = min(self.max_open_seconds, self.open_seconds * 2)
+                    self._open()
+                    return True
+                self._outcomes.clear()
+                self.open_seconds = self.base_open_seconds
+                self._transition(CLOSED)
+                return False
+            if self.state != CLOSED:
+                # Requête admise avant l'ouverture: son résultat tardif ne décide de rien
+                return False
+
+            self._outcomes.append(failure)
+            failures = sum(self._outcomes)
+            if len(self._outcomes) >= self.min_requests and failures / len(self._outcomes) >= self.failure_rate:
+                self._open()
+                return True
+            return False
+
+    def _open(self):
+        self.opened_until = time.time() + self.open_seconds
+        self._outcomes.clear()
+        self._transition(OPEN)
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(host: str, config) -> CircuitBreaker:
+    """Disjoncteur partagé de `host` (créé avec les réglages de `config` au premier appel)"""
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = _breakers[host] = CircuitBreaker(
+                host,
+                window=config.breaker_window,
+                min_requests=config.breaker_min_requests,
+                failure_rate=config.breaker_failure_rate,
+                open_seconds=config.breaker_open_seconds,
+                max_open_seconds=config.breaker_max_open_seconds,
+            )
+        return breaker
@@ -0,0 +1,100 @@
+"""
+Décodage des pages du moteur
+L'encodage d'une page est décidé une seule fois, à partir des octets reçus: charset de l'en-tête
+Content-Type, sinon BOM ou balise <meta charset> du début du document, sinon UTF-8. Sans charset
+dans l'en-tête, la décision est mise en cache par hôte et type de page (premier segment du chemin):
+les pages d'un même gabarit ne sont plus inspectées.
+On évite ainsi response.text, qui se rabat sur ISO-8859-1 ou sur une détection statistique coûteuse
+(charset_normalizer sur tout le corps) quand le serveur n'annonce pas de charset.
+"""
+import re
+import codecs
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from . import metrics
+
+DEFAULT_CHARSET = "utf-8"
+
+# Le <meta charset> doit figurer dans les 1024 premiers octets (HTML5); marge pour les pages mal formées
+_SNIFF_BYTES = 4096
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([A-Za-z0-9_.:-]+)', re.I)
+_HEADER_CHARSET = re.compile(r'charset\s*=\s*["\']?\s*([A-Za-z0-9_.:-]+)', re.I)
+_BOMS = ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+
+
+def _known(charset: Optional[str]) -> Optional[str]:
+    """Nom normalisé de `charset`, None s'il est inconnu de Python"""
+    if not charset:
+        return None
+    try:
+        return codecs.lookup(charset).name
+    except LookupError:
+        return None
+
+
+def charset_from_content_type(content_type: Optional[str]) -> Optional[str]:
+    match = _HEADER_CHARSET.search(content_type or "")
+    return _known(match.group(1)) if match else None
+
+
+def sniff_charset(body: bytes) -> Optional[str]:
+    """Encodage déclaré dans le document (BOM, <meta charset> ou http-equiv), None à défaut"""
+    for bom, charset in _BOMS:
+        if body.startswith(bom):
+            return charset
+    match = _META_CHARSET.search(body, 0, _SNIFF_BYTES)
+    return _known(match.group(1).decode("ascii")) if match else None
+
+
+class CharsetCache:
+    """Encodage décidé par (hôte, type de page), partagé par les Fetcher du processus"""
+
+    def __init__(self):
+        self._charsets: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url: str) -> Tuple[str, str]:
+        parsed = urlparse(url)
+        return parsed.netloc, parsed.path.strip("/").split("/", 1)[0]
+
+    def charset_for(self, url: str, content_type: Optional[str], body: bytes) -> str:
+        declared = charset_from_content_type(content_type)
+        if declared:
+            return declared
+        key = self.key(url)
+        with self._lock:
+            charset = self._charsets.get(key)
+        if charset:
+            metrics.CACHE_HITS.inc(cache="charset")
+            return charset
+        metrics.CACHE_MISSES.inc(cache="charset")
+        charset = sniff_charset(body) or DEFAULT_CHARSET
+        with self._lock:
+            self._charsets[key] = charset
+        return charset
+
+    def clear(self):
+        with self._lock:
+            self._charsets.clear()
+
+
+charsets = CharsetCache()
+
+
+def decode_html(body: bytes, charset: Optional[str] = None) -> str:
+    """Décode une page (encodage `charset`, sinon celui déclaré dans la page, sinon UTF-8)"""
+    charset = _known(charset) or sniff_charset(body) or DEFAULT_CHARSET
+    return body.decode(charset, errors="replace")
+
+
+def page_charset(response, url: Optional[str] = None) -> str:
+    """Encodage d'une réponse, décidé une fois par hôte et type de page si l'en-tête n'en annonce pas"""
+    return charsets.charset_for(url or response.url, response.headers.get("Content-Type"), response.content)
+
+
+def decode_page(response, url: Optional[str] = None) -> str:
+    """Texte d'une réponse, décodé une seule fois (remplace response.text)"""
+    return response.content.decode(page_charset(response, url), errors="replace")
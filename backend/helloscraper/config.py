@@ -0,0 +1,72 @@
+"""
+Configuration du moteur de scraping
+Les valeurs ne sont lues dans l'environnement qu'à l'appel de EngineConfig.from_env(),
+jamais à l'import: chaque appelant (CLI, API, worker) construit la sienne.
+"""
+import os
+from dataclasses import dataclass
+
+BASE_URL = "https://www.helloasso.com"
+SEARCH_URL = "https://www.helloasso.com/e/recherche/associations"
+SITEMAP_URL = "https://www.helloasso.com/sitemap.xml"
+
+
+@dataclass
+class EngineConfig:
+    base_url: str = BASE_URL
+    search_url: str = SEARCH_URL
+    # Point d'entrée des sitemaps (index ou liste d'URLs) pour la découverte par sitemap
+    sitemap_url: str = SITEMAP_URL
+    # Débit adaptatif par hôte (requêtes/s): part de initial_rate, ne dépasse jamais max_rate
+    initial_rate: float = 0.25
+    min_rate: float = 0.05
+    max_rate: float = 1.0
+    # Hausse additive (requête/s par seconde de trafic sain) et facteur de baisse sur 429/503 ou pic de latence
+    rate_increase: float = 0.02
+    rate_decrease: float = 0.5
+    # Latence p95 (secondes) au-delà de laquelle le débit est réduit
+    target_p95_latency: float = 3.0
+    max_retries: int = 5
+    # Backoff entre deux tentatives: entre backoff_base et min(backoff_cap, backoff_base * 2^tentative)
+    backoff_base: float = 2.0
+    backoff_cap: float = 30.0
+    # Attente maximale sur place (backoff, Retry-After); au-delà l'URL est reportée dans la file différée
+    max_inline_wait: float = 30.0
+    # Délai total par URL, tentatives et attentes comprises, avant report dans la file différée
+    url_deadline: float = 120.0
+    # Nombre de fois qu'une URL peut être reportée avant d'être déclarée en échec
+    deferred_rounds: int = 2
+    # Disjoncteur par hôte: ouvert si au moins breaker_failure_rate des breaker_window dernières requêtes
+    # (et au moins breaker_min_requests) sont en échec (403, 429, 5xx, erreur réseau)
+    breaker_window: int = 20
+    breaker_min_requests: int = 10
+    breaker_failure_rate: float = 0.5
+    # Durée d'ouverture, doublée à chaque sonde en échec jusqu'à breaker_max_open_seconds
+    breaker_open_seconds: float = 60.0
+    breaker_max_open_seconds: float = 600.0
+    connect_timeout: float = 10.0
+    read_timeout: float = 30.0
+    # Transport HTTP/2 (httpx, client partagé et multiplexé par hôte) au lieu de requests en HTTP/1.1
+    http2: bool = False
+    # HTTP/2 en clair sans négociation (h2c) pour les URLs http://, utilisé par le banc de mesure
+    http2_prior_knowledge: bool = False
+    # Pages de recherche demandées en avance pendant la pagination (1: une page à la fois)
+    # Les requêtes restent dans le débit adaptatif de l'hôte: la fenêtre recouvre les latences, pas le débit
+    search_prefetch: int = 4
+    # Intervalle minimal (secondes) entre deux requêtes vers un hôte, tous workers d'une frontière partagée confondus
+    politeness_interval: float = 3.0
+    # Probabilité de visiter la page d'accueil avant une requête (comportement de navigateur)
+    warmup_probability: float = 0.3
+
+    @classmethod
+    def from_env(cls, **overrides) -> "EngineConfig":
+        """Configuration par défaut complétée par MAX_RATE, MAX_RETRIES, HTTP2, SEARCH_PREFETCH et POLITENESS_INTERVAL"""
+        values = {
+            "max_rate": float(os.getenv("MAX_RATE", str(cls.max_rate))),
+            "max_retries": int(os.getenv("MAX_RETRIES", str(cls.max_retries))),
+            "http2": os.getenv("HTTP2", "False").lower() in ('true', '1', 't'),
+            "search_prefetch": int(os.getenv("SEARCH_PREFETCH", str(cls.search_prefetch))),
+            "politeness_interval": float(os.getenv("POLITENESS_INTERVAL", str(cls.politeness_interval))),
+        }
+        values.update(overrides)
+        return cls(**values)
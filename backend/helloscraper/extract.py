@@ -0,0 +1,763 @@
+"""
+Extraction des informations d'une association à partir de sa page
+parse_association_page() ne fait aucune requête (utilisable sur du HTML déjà récupéré);
+get_association_details() récupère la page avec un Fetcher puis l'analyse.
+BeautifulSoup n'est importé qu'à la première page analysée.
+"""
+import re
+import json
+import logging
+
+from . import metrics
+from .charset import decode_html, page_charset
+from .prescan import PrescannedHTML
+from .geo import find_postal_code, locate_postal_code
+
+logger = logging.getLogger(__name__)
+
+# Colonnes d'un enregistrement d'association (ordre des exports)
+RESULT_FIELDS = [
+    'name', 'url', 'street_address', 'postal_code', 'city',
+    'email', 'phone', 'event_count', 'avg_event_price', 'association_type'
+]
+
+# Adresses email extraites du texte mais sans intérêt (images, exemples)
+_UNWANTED_EMAIL = re.compile(r'\.(?:png|jpe?g|gif|svg|webp)$|@(?:example|test)\.com$', re.I)
+
+
+# Fonction pour analyser une adresse et la séparer en composants
+def parse_address(address_text):
+    """
+    Divise une adresse en ses composants: code postal, ville et reste de l'adresse
+    Retourne un dictionnaire avec les clés: street_address, postal_code, city
+    """
+    if not address_text:
+        return {
+            "street_address": None,
+            "postal_code": None,
+            "city": None
+        }
+    
+    # Nettoyage de l'adresse
+    address_text = address_text.strip()
+    
+    # Code postal valide (prix et identifiants ignorés) et commune reconnue par l'index, si disponible
+    located = locate_postal_code(address_text)
+    postal_code = located[0].group(1) if located else None
+    
+    # Si nous avons trouvé un code postal, essayons de trouver la ville
+    city = None
+    street_address = address_text
+    
+    if postal_code:
+        # La ville est généralement après le code postal
+        # Format typique: "12 rue Example, 75001 Paris" ou "75001 Paris"
+        parts_after_postal = [address_text[:located[0].start()], address_text[located[0].end():]]
+        
+        if located[1]:
+            # Commune reconnue: nom officiel, sans heuristique
+            city = located[1]
+        else:
+            city_part = parts_after_postal[1].strip()
+            
+            # Si la partie après le code postal commence par une virgule, la supprimer
+            if city_part.startswith(','):
+                city_part = city_part[1:].strip()
+            
+            # Si la partie après le code postal contient une virgule, la ville est avant
+            if ',' in city_part:
+                city = city_part.split(',', 1)[0].strip()
+            else:
+                # Sinon prendre les premiers mots (en supposant que c'est la ville)
+                # Limiter à 2 mots pour éviter de prendre trop de texte
+                words = city_part.split()
+                city_words = []
+                for word in words[:3]:  # Prendre jusqu'à 3 mots
+                    if word.lower() in ['cedex', 'france']:
+                        continue  # Ignorer des mots spécifiques
+                    city_words.append(word)
+                
+                city = ' '.join(city_words).strip()
+        
+        # Extraire l'adresse de la rue (tout ce qui est avant le code postal)
+        if parts_after_postal[0]:
+            street_part = parts_after_postal[0].strip()
+            if street_part.endswith(','):
+                street_part = street_part[:-1].strip()
+            street_address = street_part
+        else:
+            street_address = None
+    
+    # Si nous n'avons pas trouvé de code postal ou de ville, garder l'adresse complète
+    # comme adresse de rue
+    if not postal_code and not city:
+        street_address = address_text
+    
+    return {
+        "street_address": street_address,
+        "postal_code": postal_code,
+        "city": city
+    }
+
+def extract_email_from_html(html_content):
+    """
+    Extrait les emails du contenu en utilisant des expressions régulières
+    (de préférence le texte pré-filtré de PrescannedHTML plutôt que le HTML brut)
+    """
+    # Chercher les attributs data-email
+    data_email_pattern = r'data-email=["\']([^"\']+)["\']'
+    data_email_match = re.search(data_email_pattern, html_content)
+    if data_email_match:
+        return data_email_match.group(1)
+    
+    # Chercher les liens mailto
+    mailto_pattern = r'mailto:([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'
+    mailto_match = re.search(mailto_pattern, html_content)
+    if mailto_match:
+        return mailto_match.group(1)
+    
+    # Chercher des emails dans le texte (noms d'images et adresses d'exemple ignorés)
+    email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
+    for email_match in re.finditer(email_pattern, html_content):
+        if not _UNWANTED_EMAIL.search(email_match.group(0)):
+            return email_match.group(0)
+    
+    return None
+
+def extract_phone_from_html(html_content):
+    """
+    Extrait les numéros de téléphone du contenu en utilisant des expressions régulières
+    (de préférence le texte pré-filtré de PrescannedHTML plutôt que le HTML brut)
+    """
+    # Chercher les attributs data-phone
+    data_phone_pattern = r'data-phone=["\']([^"\']+)["\']'
+    data_phone_match = re.search(data_phone_pattern, html_content)
+    if data_phone_match:
+        return data_phone_match.group(1)
+    
+    # Chercher les liens tel
+    tel_pattern = r'tel:([0-9+\(\)\s.-]{8,})'
+    tel_match = re.search(tel_pattern, html_content)
+    if tel_match:
+        return tel_match.group(1)
+    
+    # Chercher des numéros de téléphone français dans le texte
+    phone_patterns = [
+        r'(?:0|\+33|0033)[1-9](?:[\s.-]?[0-9]{2}){4}',  # Format standard français
+        r'[0-9]{2}[\s.-]?[0-9]{2}[\s.-]?[0-9]{2}[\s.-]?[0-9]{2}[\s.-]?[0-9]{2}'  # Format sans indicatif
+    ]
+    
+    for pattern in phone_patterns:
+        match = re.search(pattern, html_content)
+        if match:
+            return match.group(0)
+    
+    return None
+
+def extract_address_from_text(text):
+    """Extrait une adresse française potentielle du texte"""
+    # Motifs d'adresse française (code postal + ville)
+    address_patterns = [
+        r'\b\d{5}\s+[A-Za-zÀ-ÿ\s\-\']+\b',  # Code postal suivi d'une ville
+        r'(?:[0-9]+,?\s)?(?:rue|avenue|boulevard|impasse|place|chemin|allée|cours)\s[A-Za-zÀ-ÿ\s\-\'0-9]+'  # Rue, avenue, etc.
+    ]
+    
+    for pattern in address_patterns:
+        for match in re.finditer(pattern, text, re.IGNORECASE):
+            # Un nombre de 5 chiffres qui n'est pas un code postal (prix, identifiant) ne fait pas une adresse
+            if match.group(0)[:5].isdigit() and not find_postal_code(match.group(0)[:5]):
+                continue
+            return match.group(0).strip()
+    
+    return None
+
+# Fonction pour extraire les événements et leurs prix
+def extract_events_info(soup, html_content):
+    """
+    Extrait les informations sur les événements d'une association et calcule le prix moyen
+    html_content sert au repli par regex: le texte pré-filtré de PrescannedHTML suffit
+    """
+    prices = []
+    event_count = 0
+    
+    # Rechercher les événements sur la page
+    # Différentes structures possibles sur HelloAsso
+    event_containers = soup.select('.event-card, .campaign-card, .organization-actions, .organization-campaigns')
+    
+    # Si pas d'événements trouvés avec les sélecteurs, chercher avec des mots-clés
+    if not event_containers:
+        # Chercher les sections qui contiennent "événement", "billetterie", "adhésion", etc.
+        keyword_sections = soup.find_all(['div', 'section'], class_=lambda x: x and any(
+            keyword in x.lower() for keyword in ['event', 'campaign', 'ticket', 'billet', 'adhésion', 'action']
+        ))
+        if keyword_sections:
+            event_containers.extend(keyword_sections)
+    
+    # Extraire les événements en recherchant des éléments avec des prix
+    price_elements = soup.select('[class*="price"], [class*="tarif"], [class*="cost"], [class*="amount"]')
+    price_pattern = r'(\d+(?:[\.,]\d+)?)\s*(?:€|EUR)'
+    
+    # Analyser les prix dans ces éléments
+    for element in price_elements:
+        price_text = element.text.strip()
+        price_matches = re.findall(price_pattern, price_text)
+        if price_matches:
+            for price in price_matches:
+                try:
+                    price_value = float(price.replace(',', '.'))
+                    prices.append(price_value)
+                    event_count += 1
+                except ValueError:
+                    continue
+    
+    # Si nous n'avons pas trouvé d'événements par cette méthode, chercher dans le HTML brut
+    if not prices:
+        # Rechercher des motifs de prix dans le HTML
+        price_matches = re.findall(price_pattern, html_content)
+        if price_matches:
+            # Filtrer les doublons et convertir les virgules en points
+            unique_prices = set()
+            for price in price_matches:
+                try:
+                    price_value = float(price.replace(',', '.'))
+                    unique_prices.add(price_value)
+                except ValueError:
+                    continue
+            
+            prices = list(unique_prices)
+            event_count = len(prices)
+    
+    # Si nous avons trouvé plus de 20 prix, c'est probablement du bruit
+    # Limiter à un nombre raisonnable
+    if len(prices) > 20:
+        prices = prices[:20]
+        event_count = len(prices)
+    
+    # Calculer la moyenne des prix s'il y en a
+    avg_price = None
+    if prices:
+        avg_price = sum(prices) / len(prices)
+        # Formater avec 2 décimales
+        avg_price = round(avg_price, 2)
+    
+    return {
+        "event_count": event_count,
+        "avg_event_price": avg_price
+    }
+
+# Fonction pour identifier le type d'association
+def identify_association_type(name, description="", url=""):
+    """
+    Identifie le type d'association en fonction de son nom, sa description et son URL.
+    Retourne un type d'association (BDE, BDS, BDA, etc.) ou "Autre" si indéterminé.
+    """
+    # Convertir en minuscules pour la comparaison
+    name_lower = name.lower() if name else ""
+    description_lower = description.lower() if description else ""
+    url_lower = url.lower() if url else ""
+    
+    # Texte combiné pour la recherche
+    combined_text = f"{name_lower} {description_lower} {url_lower}"
+    
+    # Dictionnaire des types d'associations avec leurs mots-clés associés
+    association_types = {
+        "BDE": ["bureau des étudiants", "bde", "étudiant", "student", "vie étudiante"],
+        "BDS": ["bureau des sports", "bds", "sport", "sportif", "sportive", "athléti"],
+        "BDA": ["bureau des arts", "bda", "art", "artistique", "culture", "culturel"],
+        "Association Humanitaire": ["humanitaire", "humanitarian", "solidari", "aide", "help", "charity", "ong"],
+        "Association Scientifique": ["scientifique", "science", "recherche", "research", "tech", "technolog", "innovation"],
+        "Association Professionnelle": ["professionnel", "professional", "métier", "carrière", "career", "business", "entrepreneur"],
+        "Club": ["club", "cercle", "interest group"],
+        "Junior Entreprise": ["junior entreprise", "junior-entreprise", "je ", "entrepreneuriat étudiant"],
+        "Amicale": ["amicale", "alumni", "ancien", "former student"],
+        "Association Religieuse": ["religieu", "religio", "faith", "culte", "spirit"],
+        "Association Écologique": ["écolo", "ecolo", "environment", "développement durable", "sustainable", "climat", "climate", "green"],
+        "Association Musicale": ["musique", "music", "orchestre", "orchestra", "chorale", "choir", "band"],
+        "Association Théâtrale": ["théâtre", "theater", "drama", "comédie", "comedy", "impro", "improv"],
+        "Association de Jeux": ["jeu", "game", "ludique", "gaming", "joueur", "player", "board game"],
+        "Association Politique": ["politique", "politic", "débat", "debate", "citoyen", "citizen"]
+    }
+    
+    # Éléments spécifiques qui peuvent indiquer des types précis
+    if any(x in name_lower for x in ["bde", "bureau des étudiant"]):
+        return "BDE"
+    elif any(x in name_lower for x in ["bds", "bureau des sport"]):
+        return "BDS"
+    elif any(x in name_lower for x in ["bda", "bureau des art"]):
+        return "BDA"
+    
+    # Recherche par mots-clés
+    matched_types = []
+    match_counts = {}
+    
+    for type_name, keywords in association_types.items():
+        matches = sum(1 for keyword in keywords if keyword in combined_text)
+        if matches > 0:
+            matched_types.append(type_name)
+            match_counts[type_name] = matches
+    
+    # Si plusieurs types correspondent, prendre celui avec le plus de correspondances
+    if matched_types:
+        best_match = max(matched_types, key=lambda x: match_counts[x])
+        return best_match
+    
+    # Identifier les associations étudiantes génériques
+    student_keywords = ["étudiant", "student", "campus", "université", "university", "faculty", "iut", "école", "school"]
+    if any(keyword in combined_text for keyword in student_keywords):
+        return "Association Étudiante"
+    
+    # Par défaut
+    return "Autre"
+
+def get_association_details(fetcher, url):
+    """Récupère les détails d'une association à partir de son URL (None si la page est inaccessible)"""
+    logger.info(f"Récupération des détails pour: {url}")
+    
+    # Tenter d'obtenir une réponse avec gestion des erreurs
+    response = fetcher.get(url)
+    if not response:
+        return None
+    return parse_association_page(response.content, url, page_charset(response, url))
+
+def parse_association_page(html_content, url, charset=None):
+    """
+    Extrait les informations d'une association du HTML de sa page
+    `html_content`: texte, ou octets de la page (décodés une seule fois, avec `charset` s'il est connu)
+    """
+    from bs4 import BeautifulSoup
+    
+    if isinstance(html_content, bytes):
+        html_content = decode_html(html_content, charset)
+    
+    with metrics.PARSE_SECONDS.time(page="association"):
+        soup = BeautifulSoup(html_content, 'html.parser')
+    # Vues réduites (sans scripts, styles ni base64) pour les replis par regex
+    page = PrescannedHTML(html_content)
+    watch = metrics.ExtractionWatch()
+    
+    # Extraction du nom de l'association
+    name = None
+    h1_tag = soup.find('h1')
+    if h1_tag:
+        name = h1_tag.text.strip()
+        logger.debug(f"Nom trouvé: {name}")
+    watch.lap("name", "h1", name)
+    if not h1_tag:
+        # Essayer de trouver avec une classe spécifique
+        header_elements = soup.select('.organization-header__title, .organization-name, .page-title')
+        if header_elements:
+            name = header_elements[0].text.strip()
+            logger.debug(f"Nom trouvé via sélecteur alternatif: {name}")
+        watch.lap("name", "selectors", name)
+    
+    # Si le nom n'est toujours pas trouvé, essayer de l'extraire de l'URL
+    if not name:
+        try:
+            # Extraire le dernier segment de l'URL pour avoir un nom approximatif
+            url_parts = url.strip('/').split('/')
+            if len(url_parts) > 0:
+                name = url_parts[-1].replace('-', ' ').title()
+                logger.debug(f"Nom extrait de l'URL: {name}")
+        except Exception as e:
+            logger.warning(f"Erreur lors de l'extraction du nom depuis l'URL: {e}")
+        watch.lap("name", "url", name)
+    
+    # Extraction de la description pour aider à identifier le type d'association
+    description = ""
+    # Chercher la description dans les méta-tags
+    meta_desc = soup.find('meta', attrs={'name': 'description'})
+    if meta_desc and 'content' in meta_desc.attrs:
+        description = meta_desc['content']
+    
+    # Chercher aussi dans les sections "À propos", "Qui sommes-nous", etc.
+    about_keywords = ['à propos', 'qui sommes-nous', 'about us', 'description', 'présentation', 'notre association']
+    for heading in soup.find_all(['h1', 'h2', 'h3', 'h4']):
+        heading_text = heading.text.lower()
+        if any(keyword in heading_text for keyword in about_keywords):
+            # Récupérer les paragraphes suivants
+            sibling = heading.find_next(['p', 'div'])
+            if sibling:
+                description += " " + sibling.text.strip()
+    watch.lap("description", "meta_and_about", description.strip())
+    
+    # Identifier le type d'association
+    association_type = identify_association_type(name, description, url)
+    logger.debug(f"Type d'association identifié: {association_type}")
+    watch.lap("association_type", "keywords", association_type)
+    
+    # Extraction de l'email et du téléphone d'abord pour identifier la section de contact
+    email = None
+    phone = None
+    contact_section = None
+    
+    # Première méthode: recherche par attribut data-email
+    email_button = soup.find('button', string=lambda t: t and 'Afficher l\'email' in t)
+    if email_button:
+        if 'data-email' in email_button.attrs:
+            email = email_button['data-email']
+            logger.debug(f"Email trouvé via data-attribute: {email}")
+        # Trouver le parent ou le conteneur de cette section de contact
+        contact_section = find_contact_container(email_button, soup)
+    watch.lap("email", "data_email_button", email)
+    
+    # Chercher les liens mailto et tel pour localiser la section de contact
+    mailto_links = soup.select('a[href^="mailto:"]')
+    tel_links = soup.select('a[href^="tel:"]')
+    
+    if mailto_links and not contact_section:
+        email_elem = mailto_links[0]
+        email = email_elem['href'].replace('mailto:', '').strip()
+        logger.debug(f"Email trouvé via lien mailto: {email}")
+        contact_section = find_contact_container(email_elem, soup)
+    watch.lap("email", "mailto_link", email)
+    
+    if tel_links and not contact_section:
+        phone_elem = tel_links[0]
+        phone = phone_elem['href'].replace('tel:', '').strip()
+        logger.debug(f"Téléphone trouvé via lien tel: {phone}")
+        contact_section = find_contact_container(phone_elem, soup)
+    watch.lap("phone", "tel_link", phone)
+    
+    # Recherche des sections de contact par mots-clés    
+    if not contact_section:
+        contact_keywords = ['coordonnées', 'contact', 'nous contacter', 'nous trouver', 'où nous trouver']
+        for section in soup.find_all(['section', 'div']):
+            # Vérifier si un titre ou une classe contient un mot-clé de contact
+            has_contact_keyword = False
+            
+            # Vérifier les titres h1-h6 contenus dans la section
+            for heading in section.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
+                if any(keyword in heading.text.lower() for keyword in contact_keywords):
+                    has_contact_keyword = True
+                    break
+            
+            # Vérifier les attributs de classe
+            if not has_contact_keyword and section.has_attr('class'):
+                section_classes = ' '.join(section['class']).lower()
+                if any(keyword in section_classes for keyword in contact_keywords):
+                    has_contact_keyword = True
+            
+            # Vérifier les attributs id
+            if not has_contact_keyword and section.has_attr('id'):
+                section_id = section['id'].lower()
+                if any(keyword in section_id for keyword in contact_keywords):
+                    has_contact_keyword = True
+            
+            if has_contact_keyword:
+                contact_section = section
+                logger.debug("Section de contact trouvée via mots-clés")
+                break
+        watch.lap("contact_section", "keywords", contact_section)
+    
+    # Extraction de l'adresse
+    address = None
+    
+    # Première méthode: chercher l'adresse dans la section de contact identifiée
+    if contact_section:
+        logger.debug("Recherche d'adresse dans la section de contact")
+        
+        # Rechercher les éléments d'adresse dans la section de contact
+        address_elements = contact_section.select('[itemprop="address"], address, .address, .location, .contact-info__address')
+        if address_elements:
+            address = address_elements[0].text.strip()
+            logger.debug(f"Adresse trouvée dans la section de contact: {address}")
+        else:
+            # Chercher des paragraphes ou des divs contenant un code postal dans la section de contact
+            for element in contact_section.find_all(['p', 'div', 'span']):
+                text = element.text.strip()
+                # Vérifier si le texte semble être une adresse (contient un code postal français)
+                if len(text) < 100 and find_postal_code(text):
+                    address = text
+                    logger.debug(f"Adresse trouvée via code postal dans la section de contact: {address}")
+                    break
+        watch.lap("address", "contact_section", address)
+    
+    # Si l'adresse n'est toujours pas trouvée, essayer les méthodes habituelles
+    if not address:
+        # Recherche par attribut itemprop="address"
+        address_div = soup.select_one('div[itemprop="address"]')
+        if address_div:
+            address = address_div.text.strip()
+            logger.debug(f"Adresse trouvée via itemprop: {address}")
+        watch.lap("address", "itemprop", address)
+    
+    # Deuxième méthode: recherche par balise d'adresse standard
+    if not address:
+        address_elements = soup.find_all('address')
+        if address_elements:
+            address = address_elements[0].text.strip()
+            logger.debug(f"Adresse trouvée via tag address: {address}")
+        watch.lap("address", "address_tag", address)
+    
+    # Troisième méthode: recherche par classes spécifiques
+    if not address:
+        address_elements = soup.select('.organization-address, .address, .location, .contact-info__address')
+        if address_elements:
+            address = address_elements[0].text.strip()
+            logger.debug(f"Adresse trouvée via classes spécifiques: {address}")
+        watch.lap("address", "classes", address)
+    
+    # Quatrième méthode: recherche par motif dans le texte
+    if not address:
+        for p in soup.find_all(['p', 'div', 'span']):
+            text = p.text.strip()
+            if text and len(text) > 10 and len(text) < 100:  # Une adresse a généralement cette longueur
+                found_address = extract_address_from_text(text)
+                if found_address:
+                    address = found_address
+                    logger.debug(f"Adresse trouvée via motif: {address}")
+                    break
+        watch.lap("address", "text_pattern", address)
+    
+    # Cinquième méthode: recherche dans le HTML brut
+    if not address:
+        address_pattern = r'itemprop="address"[^>]*>(.*?)</div>'
+        address_matches = re.findall(address_pattern, page.markup)
+        if address_matches:
+            # Nettoyer l'adresse des balises HTML
+            raw_address = address_matches[0]
+            address = re.sub(r'<[^>]+>', ' ', raw_address).strip()
+            address = re.sub(r'\s+', ' ', address)
+            logger.debug(f"Adresse trouvée via code HTML brut: {address}")
+        watch.lap("address", "raw_html", address)
+    
+    # Analyser l'adresse pour extraire ses composants
+    address_components = parse_address(address)
+    watch.lap("postal_code", "parse_address", address_components['postal_code'])
+    
+    # Si email n'est toujours pas trouvé, chercher par d'autres moyens
+    if not email:
+        # Deuxième méthode: chercher d'autres attributs data-* contenant @
+        for button in soup.find_all('button'):
+            for attr_name, attr_value in button.attrs.items():
+                if attr_name.startswith('data-') and isinstance(attr_value, str) and '@' in attr_value:
+                    email = attr_value
+                    logger.debug(f"Email trouvé via autre attribut data-*: {email}")
+                    break
+            if email:
+                break
+        watch.lap("email", "data_attributes", email)
+    
+    # Quatrième méthode: recherche dans le HTML brut
+    if not email:
+        email = extract_email_from_html(page.text)
+        if email:
+            logger.debug(f"Email trouvé via HTML brut: {email}")
+        watch.lap("email", "raw_html", email)
+    
+    # Si phone n'est toujours pas trouvé, chercher par d'autres moyens
+    if not phone:
+        # Première méthode: recherche par attribut data-phone
+        phone_button = soup.find('button', string=lambda t: t and 'Afficher le numéro' in t)
+        if phone_button and 'data-phone' in phone_button.attrs:
+            phone = phone_button['data-phone']
+            logger.debug(f"Téléphone trouvé via data-attribute: {phone}")
+        watch.lap("phone", "data_phone_button", phone)
+    
+        # Deuxième méthode: chercher d'autres attributs data-* contenant des chiffres
+        if not phone:
+            for button in soup.find_all('button'):
+                for attr_name, attr_value in button.attrs.items():
+                    if attr_name.startswith('data-') and isinstance(attr_value, str) and any(c.isdigit() for c in attr_value):
+                        # Vérifier que c'est probablement un numéro de téléphone (contient beaucoup de chiffres)
+                        digits = sum(c.isdigit() for c in attr_value)
+                        if digits >= 8:  # Un numéro de téléphone a généralement au moins 8 chiffres
+                            phone = attr_value
+                            logger.debug(f"Téléphone trouvé via autre attribut data-*: {phone}")
+                            break
+                if phone:
+                    break
+            watch.lap("phone", "data_attributes", phone)
+    
+        # Quatrième méthode: recherche dans le HTML brut
+        if not phone:
+            phone = extract_phone_from_html(page.text)
+            if phone:
+                logger.debug(f"Téléphone trouvé via HTML brut: {phone}")
+            watch.lap("phone", "raw_html", phone)
+    
+    # Extraction des informations sur les événements
+    events_info = extract_events_info(soup, page.text)
+    watch.lap("events", "campaign_cards", events_info['event_count'])
+    
+    # Extraire les données d'un script JSON LD potentiel
+    json_ld = None
+    script_tags = soup.find_all('script', type='application/ld+json')
+    for script in script_tags:
+        try:
+            data = json.loads(script.string)
+            
+            # Si nous avons un objet unique
+            if isinstance(data, dict):
+                if '@type' in data and data['@type'] in ['Organization', 'NGO', 'LocalBusiness', 'EducationalOrganization']:
+                    json_ld = data
+                    logger.debug("Données JSON-LD trouvées")
+                    
+                    # Si on a trouvé les données JSON LD, extraire les informations manquantes
+                    if not name and 'name' in json_ld:
+                        name = json_ld['name']
+                        logger.debug(f"Nom trouvé via JSON-LD: {name}")
+                    
+                    if not address and 'address' in json_ld:
+                        addr = json_ld['address']
+                        if isinstance(addr, dict):
+                            address_parts = []
+                            
+                            # Extraire directement les composants d'adresse
+                            if 'streetAddress' in addr:
+                                address_components['street_address'] = addr['streetAddress']
+                            
+                            if 'postalCode' in addr:
+                                address_components['postal_code'] = addr['postalCode']
+                            
+                            if 'addressLocality' in addr:
+                                address_components['city'] = addr['addressLocality']
+                            
+                            # Construire aussi l'adresse complète pour référence
+                            for field in ['streetAddress', 'postalCode', 'addressLocality']:
+                                if field in addr and addr[field]:
+                                    address_parts.append(str(addr[field]))
+                            address = " ".join(address_parts)
+                            logger.debug(f"Adresse trouvée via JSON-LD: {address}")
+                        elif isinstance(addr, str):
+                            address = addr
+                            logger.debug(f"Adresse trouvée via JSON-LD (string): {address}")
+                            # Analyser cette adresse string
+                            address_components = parse_address(address)
+                    
+                    if not email and 'email' in json_ld:
+                        email = json_ld['email']
+                        logger.debug(f"Email trouvé via JSON-LD: {email}")
+                    
+                    if not phone and 'telephone' in json_ld:
+                        phone = json_ld['telephone']
+                        logger.debug(f"Téléphone trouvé via JSON-LD: {phone}")
+            
+            # Si nous avons une liste d'objets
+            elif isinstance(data, list):
+                for item in data:
+                    if isinstance(item, dict) and '@type' in item and item['@type'] in ['Organization', 'NGO', 'LocalBusiness', 'EducationalOrganization']:
+                        logger.debug("Données JSON-LD trouvées dans liste")
+                        
+                        if not name and 'name' in item:
+                            name = item['name']
+                            logger.debug(f"Nom trouvé via JSON-LD (liste): {name}")
+                        
+                        if not address and 'address' in item:
+                            addr = item['address']
+                            if isinstance(addr, dict):
+                                # Extraire directement les composants d'adresse
+                                if 'streetAddress' in addr:
+                                    address_components['street_address'] = addr['streetAddress']
+                                
+                                if 'postalCode' in addr:
+                                    address_components['postal_code'] = addr['postalCode']
+                                
+                                if 'addressLocality' in addr:
+                                    address_components['city'] = addr['addressLocality']
+                                
+                                # Construire aussi l'adresse complète pour référence
+                                address_parts = []
+                                for field in ['streetAddress', 'postalCode', 'addressLocality']:
+                                    if field in addr and addr[field]:
+                                        address_parts.append(str(addr[field]))
+                                address = " ".join(address_parts)
+                                logger.debug(f"Adresse trouvée via JSON-LD (liste): {address}")
+                            elif isinstance(addr, str):
+                                address = addr
+                                logger.debug(f"Adresse trouvée via JSON-LD (liste, string): {address}")
+                                # Analyser cette adresse string
+                                address_components = parse_address(address)
+                        
+                        if not email and 'email' in item:
+                            email = item['email']
+                            logger.debug(f"Email trouvé via JSON-LD (liste): {email}")
+                        
+                        if not phone and 'telephone' in item:
+                            phone = item['telephone']
+                            logger.debug(f"Téléphone trouvé via JSON-LD (liste): {phone}")
+        except Exception as e:
+            logger.debug(f"Erreur lors du parsing JSON-LD: {e}")
+            continue
+    watch.lap("address", "json_ld", address)
+    watch.lap("postal_code", "json_ld", address_components['postal_code'])
+    watch.lap("email", "json_ld", email)
+    watch.lap("phone", "json_ld", phone)
+    
+    result = {
+        'name': name,
+        'url': url,
+        'street_address': address_components['street_address'],
+        'postal_code': address_components['postal_code'],
+        'city': address_components['city'],
+        'email': email if email else "Non dispo",
+        'phone': phone if phone else "Non dispo",
+        'event_count': events_info['event_count'],
+        'avg_event_price': events_info['avg_event_price'],
+        'association_type': association_type
+    }
+    
+    # Vérification de la qualité des données
+    missing_fields = [field for field, value in result.items() 
+                     if field not in ['street_address', 'postal_code', 'city', 'event_count', 'avg_event_price', 'email', 'phone', 'association_type'] 
+                     and not value]
+    if missing_fields:
+        logger.warning(f"Données manquantes pour {url}: {', '.join(missing_fields)}")
+    
+    return result
+
+# Nouvelle fonction pour trouver le conteneur parent d'un élément qui contient les coordonnées
+def find_contact_container(element, soup):
+    """
+    Trouve le conteneur parent d'un élément qui est susceptible de contenir les coordonnées complètes.
+    Retourne le conteneur ou None si aucun n'est trouvé.
+    """
+    if not element:
+        return None
+    
+    # Remonter jusqu'à 5 niveaux de parents pour trouver un conteneur de contact
+    current = element
+    for _ in range(5):
+        if not current or current == soup:
+            break
+            
+        parent = current.parent
+        if not parent:
+            break
+            
+        # Vérifier si le parent semble être un conteneur de contact
+        if parent.name in ['div', 'section', 'aside', 'article', 'footer']:
+            # Vérifier les classes et IDs
+            has_contact_indicator = False
+            
+            if parent.has_attr('class'):
+                classes = ' '.join(parent['class']).lower()
+                if any(keyword in classes for keyword in ['contact', 'coord', 'info', 'address', 'adresse', 'nous', 'find']):
+                    has_contact_indicator = True
+            
+            if not has_contact_indicator and parent.has_attr('id'):
+                parent_id = parent['id'].lower()
+                if any(keyword in parent_id for keyword in ['contact', 'coord', 'info', 'address', 'adresse', 'nous', 'find']):
+                    has_contact_indicator = True
+            
+            # Vérifier le contenu
+            if not has_contact_indicator:
+                headings = parent.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+                for heading in headings:
+                    heading_text = heading.text.lower()
+                    if any(keyword in heading_text for keyword in ['contact', 'coordonnées', 'adresse', 'nous trouver', 'où nous trouver']):
+                        has_contact_indicator = True
+                        break
+            
+            # Si le parent a des indications d'être un conteneur de contact
+            if has_contact_indicator:
+                return parent
+            
+            # Vérifier aussi si le parent contient des éléments d'adresse
+            address_elements = parent.find_all(['address']) + parent.select('[itemprop="address"]')
+            if address_elements:
+                return parent
+        
+        current = parent
+    
+    return None
@@ -0,0 +1,330 @@
+"""
+Couche de récupération HTTP du moteur
+Un Fetcher par appelant (exécution CLI, job de l'API, worker): session persistante instrumentée,
+en-têtes de navigateur tournants, nouvelles tentatives et délais de politesse.
+requests n'est importé qu'à la création de la première session.
+"""
+import time
+import random
+import logging
+import threading
+import datetime
+from typing import Callable, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from . import metrics
+from .breaker import OPEN, breaker_for
+from .config import EngineConfig
+from .pacing import controller_for
+from .retry import FetchFailure, backoff_delay, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+# Liste de User-Agents pour rotation
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/113.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.5 Safari/605.1.15",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (iPad; CPU OS 16_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.5 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 16_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.5 Mobile/15E148 Safari/604.1"
+]
+
+_LOG_LEVELS = {"info": logging.INFO, "warning": logging.WARNING, "error": logging.ERROR, "success": logging.INFO}
+
+
+def _default_log(message: str, level: str = "info"):
+    logger.log(_LOG_LEVELS.get(level, logging.INFO), message)
+
+
+# Générer des cookies aléatoires pour chaque session
+def generate_random_cookies():
+    """Génère des cookies aléatoires pour simuler un navigateur réel"""
+    return {
+        'session_id': f"{random.randint(1000000000, 9999999999)}",
+        'visitor_id': f"{random.randint(100000000000, 999999999999)}",
+        '_ga': f"GA1.2.{random.randint(1000000000, 9999999999)}.{int(time.time())}",
+        '_gid': f"GA1.2.{random.randint(1000000000, 9999999999)}.{int(time.time())}",
+        'OptanonConsent': f"isIABGlobal=false&datestamp={datetime.datetime.now().strftime('%Y-%m-%dT%H:%M:%S')}&version=6.8.0",
+        'HA_CONSENT': 'true',
+        'HA_ACCEPTED': 'true'
+    }
+
+
+# Générer des headers aléatoires mais réalistes pour chaque requête
+def generate_headers(encodings: Optional[Sequence[str]] = None):
+    """
+    Génère des headers HTTP réalistes avec rotation de User-Agent
+    `encodings`: compressions annoncées (par défaut, celles que requests sait décoder ici)
+    """
+    if encodings is None:
+        from .transport import supported_encodings
+        encodings = supported_encodings()
+
+    # Choisir un User-Agent aléatoire
+    user_agent = random.choice(USER_AGENTS)
+
+    # Générer des valeurs réalistes pour les autres headers
+    accept_language = random.choice([
+        "fr,fr-FR;q=0.9,en-US;q=0.8,en;q=0.7",
+        "fr-FR,fr;q=0.9,en-US;q=0.8,en;q=0.7",
+        "en-US,en;q=0.9,fr;q=0.8",
+        "fr;q=0.9,en-US;q=0.8,en;q=0.7"
+    ])
+
+    headers = {
+        "User-Agent": user_agent,
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+        "Accept-Language": accept_language,
+        "Accept-Encoding": ", ".join(encodings),
+        "Connection": "keep-alive",
+        "Upgrade-Insecure-Requests": "1",
+        "Sec-Fetch-Dest": "document",
+        "Sec-Fetch-Mode": "navigate",
+        "Sec-Fetch-Site": random.choice(["none", "same-origin"]),
+        "Sec-Fetch-User": "?1",
+        "Cache-Control": random.choice(["max-age=0", "no-cache"]),
+        "Referer": "https://www.helloasso.com/",
+        "sec-ch-ua": "\" Not A;Brand\";v=\"99\", \"Chromium\";v=\"123\"",
+        "sec-ch-ua-mobile": "?0",
+        "sec-ch-ua-platform": random.choice(["\"Windows\"", "\"macOS\"", "\"Linux\""]),
+        "DNT": "1"
+    }
+
+    return headers
+
+
+class Fetcher:
+    """
+    Récupère les pages pour un appelant: get() retourne la réponse, ou None en cas d'échec (voir last_failure)
+    `log(message, niveau)` reçoit les avertissements (par défaut: logging)
+    `on_circuit_open(hôte, secondes)` est appelé quand une requête de ce Fetcher ouvre le disjoncteur d'un hôte
+    (pour propager la pause aux autres processus, par exemple via la frontière partagée)
+    """
+
+    def __init__(self, config: Optional[EngineConfig] = None, log: Optional[Callable] = None,
+                 on_circuit_open: Optional[Callable[[str, float], None]] = None):
+        self.config = config or EngineConfig()
+        self.log = log or _default_log
+        self.on_circuit_open = on_circuit_open
+        # Raison du dernier échec de get() (FetchFailure), None après un succès
+        self.last_failure: Optional[FetchFailure] = None
+        self._session = None
+        # False pour un Fetcher dérivé (fork): la session appartient au Fetcher d'origine
+        self._owns_session = True
+        # Événement qui annule les attentes et les requêtes pas encore envoyées (préchargement)
+        self.cancel: Optional[threading.Event] = None
+        # Compressions que la session sait décoder: les seules annoncées au serveur
+        self.encodings: Sequence[str] = ()
+
+    @property
+    def session(self):
+        """
+        Session persistante (cookies, connexions keep-alive), créée à la première requête
+        Ses cookies sont propres à ce Fetcher (et à ses forks), même quand le pool HTTP/2 est partagé
+        """
+        if self._session is None:
+            from .transport import open_session, supported_encodings
+            self._session = open_session(self.config)
+            self._session.cookies.update(generate_random_cookies())
+            self.encodings = supported_encodings(self._session)
+        return self._session
+
+    def fork(self, cancel: Optional[threading.Event] = None) -> "Fetcher":
+        """
+        Fetcher pour des requêtes concurrentes de celles-ci: même configuration et même session
+        (cookies, connexions keep-alive), mais son propre last_failure
+        `cancel`, une fois levé, interrompt ses attentes et ses requêtes pas encore envoyées
+        """
+        fork = Fetcher(self.config, self.log, self.on_circuit_open)
+        fork._session = self.session
+        fork._owns_session = False
+        fork.encodings = self.encodings
+        fork.cancel = cancel
+        return fork
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel is not None and self.cancel.is_set()
+
+    def close(self):
+        if self._session is not None and self._owns_session:
+            self._session.close()
+        self._session = None
+
+    def wait(self, seconds: float, reason: str = "politeness"):
+        metrics.DELAY_SECONDS.observe(seconds, reason=reason)
+        if self.cancel is None:
+            time.sleep(seconds)
+            return
+        # Attente par tranches: une requête annulée libère son thread sans attendre son créneau
+        steps = max(1, int(seconds / 0.25) + 1)
+        for _ in range(steps):
+            if self.cancel.is_set():
+                return
+            time.sleep(seconds / steps)
+
+    def rate(self, url: str) -> float:
+        """Débit adaptatif courant (requêtes/s) vers l'hôte de `url`"""
+        return controller_for(urlparse(url).netloc, self.config).rate
+
+    def _wait_for_circuit(self, breaker) -> Tuple[float, Optional[int]]:
+        """
+        Attend que le disjoncteur de l'hôte autorise une requête
+        Retourne le temps passé à attendre et le jeton de sonde (None hors semi-ouvert)
+        """
+        waited = 0.0
+        while True:
+            blocked, probe = breaker.before_request()
+            if not blocked or self.cancelled:
+                return waited, probe
+            if not waited and breaker.state == OPEN:
+                self.log(f"Disjoncteur ouvert pour {breaker.host}: reprise dans {blocked:.0f}s (une requête sonde décidera)", "warning")
+            # Attente par tranches: une sonde d'un autre job peut refermer le circuit entre-temps
+            step = min(blocked, 5.0)
+            self.wait(step, reason="blocked")
+            waited += step
+
+    def _warm_up(self, headers):
+        """Requête préliminaire à la page d'accueil, comme un visiteur qui arrive sur le site"""
+        try:
+            self.session.get(self.config.base_url, headers=headers, timeout=10)
+            # Petit délai pour simuler la lecture de la page
+            self.wait(random.uniform(1, 3))
+        except Exception:
+            pass  # Ignorer les erreurs de la requête préliminaire
+
+    def get(self, url, params=None, stream=False):
+        """
+        Effectue une requête HTTP avec gestion des erreurs et des tentatives
+        Retourne la réponse, ou None: `last_failure` indique alors la raison et si l'URL peut être reportée
+        Avec stream=True, le corps n'est pas lu: l'appelant le lit (iter_content) puis ferme la réponse
+        (attente demandée au-delà de max_inline_wait, délai total url_deadline dépassé, tentatives épuisées,
+        requête annulée par `cancel`)
+        """
+        import requests
+
+        config = self.config
+        host = urlparse(url).netloc
+        breaker = breaker_for(host, config)
+        pacer = controller_for(host, config)
+        started = time.monotonic()
+        self.last_failure = None
+        reason = "error"
+        attempt = 0
+        while True:
+            # Le temps passé disjoncteur ouvert ne compte pas dans le délai de l'URL
+            # Hors circuit fermé, la requête autorisée est la sonde du semi-ouvert (probe = son jeton)
+            waited, probe = self._wait_for_circuit(breaker)
+            started += waited
+            if self.cancelled:
+                breaker.release(probe)
+                return self._fail(url, "cancelled", attempt, retryable=False)
+            # Créneau du débit adaptatif de l'hôte (partagé avec les autres jobs du processus)
+            delay = pacer.acquire()
+            if delay > 0:
+                self.wait(delay)
+            if self.cancelled:
+                breaker.release(probe)
+                return self._fail(url, "cancelled", attempt, retryable=False)
+            session = self.session
+            headers = generate_headers(self.encodings)
+            if attempt == 0 and random.random() < config.warmup_probability:
+                self._warm_up(headers)
+
+            # Modifier légèrement les headers pour chaque requête
+            if random.random() < 0.5:
+                headers["Cache-Control"] = random.choice(["max-age=0", "no-cache", "no-store"])
+
+            retry_after = None
+            sent = time.monotonic()
+            try:
+                response = session.get(
+                    url,
+                    params=params,
+                    headers=headers,
+                    timeout=(config.connect_timeout, config.read_timeout),
+                    allow_redirects=True,
+                    stream=stream
+                )
+            except requests.RequestException as e:
+                # Un délai dépassé compte comme une latence élevée
+                pacer.observe(time.monotonic() - sent, None)
+                self._record(breaker, True, probe)
+                self.log(f"Erreur lors de la requête vers {url}: {e}", "warning")
+                reason = "error"
+            except Exception:
+                self._record(breaker, True, probe)
+                raise
+            else:
+                status = response.status_code
+                pacer.observe(time.monotonic() - sent, status)
+                self._record(breaker, status in (403, 429) or status >= 500, probe)
+                if status < 400:
+                    encoding = self._undecodable_encoding(response)
+                    if encoding:
+                        self._discard(response, stream)
+                        # Corps illisible: des enregistrements vides plutôt qu'une erreur, à éviter
+                        self.log(f"Compression '{encoding}' non décodable pour {url}", "error")
+                        return self._fail(url, f"encoding_{encoding}", attempt + 1, retryable=False)
+                    return response
+
+                self._discard(response, stream)
+                if status == 403:
+                    self.log(f"Erreur 403 (Forbidden) pour {url} - Tentative {attempt + 1}/{config.max_retries + 1}", "warning")
+                else:
+                    self.log(f"Erreur HTTP {status} pour {url}", "warning")
+
+                if status not in (403, 429) and status < 500:
+                    # Erreur définitive (404, 410...): inutile de réessayer
+                    return self._fail(url, f"http_{status}", attempt + 1, retryable=False)
+                reason = str(status) if status in (403, 429) else "5xx"
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+
+            if attempt >= config.max_retries:
+                self.log(f"Échec après {attempt + 1} tentatives pour {url}", "error")
+                return self._fail(url, reason, attempt + 1, delay=retry_after or 0)
+
+            delay = retry_after if retry_after is not None else backoff_delay(attempt, config.backoff_base, config.backoff_cap)
+            # Attente trop longue (Retry-After) ou délai total dépassé: l'URL est reportée, l'appelant continue
+            if delay > config.max_inline_wait:
+                self.log(f"Attente de {delay:.0f}s demandée pour {url}, URL reportée", "warning")
+                return self._fail(url, reason, attempt + 1, delay=delay)
+            if time.monotonic() - started + delay > config.url_deadline:
+                self.log(f"Délai de {config.url_deadline:.0f}s dépassé pour {url}, URL reportée", "warning")
+                return self._fail(url, "deadline", attempt + 1, delay=delay)
+
+            self.log(f"Nouvelle tentative (reprise {attempt + 1}/{config.max_retries}) dans {delay:.1f}s...")
+            metrics.HTTP_RETRIES.inc(reason=reason)
+            self.wait(delay, reason="backoff")
+            attempt += 1
+
+    def _undecodable_encoding(self, response) -> Optional[str]:
+        """Content-Encoding que la session n'a pas pu décoder (serveur qui ignore Accept-Encoding), sinon None"""
+        for encoding in (response.headers.get("Content-Encoding") or "").lower().split(","):
+            encoding = encoding.strip()
+            if encoding and encoding != "identity" and encoding not in self.encodings:
+                return encoding
+        return None
+
+    @staticmethod
+    def _discard(response, stream):
+        """Réponse en flux non transmise à l'appelant: sa connexion est rendue au pool"""
+        if stream:
+            response.close()
+
+    def _record(self, breaker, failure, probe):
+        if breaker.record(failure, probe):
+            self.log(f"Trop d'erreurs vers {breaker.host}: disjoncteur ouvert pour {breaker.open_seconds:.0f}s", "warning")
+            if self.on_circuit_open:
+                try:
+                    self.on_circuit_open(breaker.host, breaker.open_seconds)
+                except Exception as e:
+                    self.log(f"Impossible de propager l'ouverture du disjoncteur: {e}", "warning")
+
+    def _fail(self, url, reason, attempts, retryable=True, delay=0.0):
+        if retryable:
+            metrics.HTTP_DEFERRED.inc(reason=reason)
+        self.last_failure = FetchFailure(url, reason, attempts, retryable, not_before=time.time() + delay)
+        return None
@@ -0,0 +1,439 @@
+"""
+Géocodage hors-ligne des codes postaux français et regroupement des marqueurs de la carte
+- Index code postal -> (lat, lon, commune) chargé une fois en mémoire dans des tableaux triés
+  (plage de chaque code dans un dict: recherche en temps constant), depuis data/postal_codes_fr.tsv.gz
+- Sans ce fichier (ou pour un code absent), repli sur les coordonnées du chef-lieu du département
+- Validation des codes postaux (préfixe de département existant, puis présence dans l'index, sauf pour
+  un territoire dont l'index n'a aucun code; sans index, seuls les codes CEDEX sont acceptés sur leur préfixe)
+  et reconnaissance de la commune qui suit le code dans une adresse
+- Regroupement des villes par grille pour chaque niveau de zoom, calculé une fois côté Python
+
+Le fichier de données (livré dans data/, données GeoNames sous licence CC BY 4.0) se construit depuis
+les exports GeoNames des codes postaux (https://download.geonames.org/export/zip/), la métropole (FR) et
+l'outre-mer, que GeoNames classe sous son propre code pays (GP, MQ, GF, RE, YT, PM, BL, MF, PF, NC, WF):
+    python backend/helloscraper/geo.py build FR.txt GP.txt MQ.txt GF.txt RE.txt YT.txt ...
+ou, sans accès à geonames.org, depuis des extraits GeoNames distribués sur PyPI: les communes de chaque
+code postal sans coordonnées (FR.zcsv, GP.zcsv..., paquet pyworldzipcode) et les lieux de plus de
+1000 habitants avec coordonnées (rg_cities1000.csv, paquet reverse_geocoder):
+    python backend/helloscraper/geo.py build-places FR.zcsv GP.zcsv ... rg_cities1000.csv
+"""
+import os
+import re
+import sys
+import csv
+import gzip
+import math
+import logging
+import unicodedata
+from array import array
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "postal_codes_fr.tsv.gz")
+
+# Codes pays GeoNames des codes postaux français: métropole et outre-mer
+COUNTRY_CODES = ("FR", "GP", "MQ", "GF", "RE", "YT", "PM", "BL", "MF", "PF", "NC", "WF")
+
+# Collectivités sans extrait pyworldzipcode (code postal unique, sous le préfixe 971 de la Guadeloupe)
+_COLLECTIVITY_CODES = {"BL": ("97133", "Saint-Barthélemy"), "MF": ("97150", "Saint-Martin")}
+
+# Coordonnées du chef-lieu de chaque département (et collectivités d'outre-mer), par préfixe du code postal
+DEPARTMENTS = {
+    "01": (46.205, 5.225), "02": (49.564, 3.620), "03": (46.566, 3.333), "04": (44.092, 6.236),
+    "05": (44.559, 6.079), "06": (43.710, 7.262), "07": (44.735, 4.599), "08": (49.773, 4.720),
+    "09": (42.965, 1.607), "10": (48.297, 4.074), "11": (43.213, 2.349), "12": (44.350, 2.575),
+    "13": (43.297, 5.381), "14": (49.183, -0.370), "15": (44.926, 2.440), "16": (45.648, 0.156),
+    "17": (46.160, -1.151), "18": (47.081, 2.399), "19": (45.267, 1.772), "2A": (41.919, 8.738),
+    "2B": (42.697, 9.450), "21": (47.322, 5.041), "22": (48.514, -2.765), "23": (46.171, 1.871),
+    "24": (45.184, 0.721), "25": (47.238, 6.024), "26": (44.933, 4.892), "27": (49.024, 1.151),
+    "28": (48.446, 1.489), "29": (47.996, -4.102), "30": (43.837, 4.360), "31": (43.605, 1.444),
+    "32": (43.646, 0.586), "33": (44.838, -0.579), "34": (43.611, 3.877), "35": (48.117, -1.678),
+    "36": (46.811, 1.686), "37": (47.394, 0.685), "38": (45.188, 5.724), "39": (46.675, 5.555),
+    "40": (43.890, -0.500), "41": (47.586, 1.336), "42": (45.440, 4.387), "43": (45.043, 3.885),
+    "44": (47.218, -1.554), "45": (47.903, 1.909), "46": (44.447, 1.441), "47": (44.203, 0.616),
+    "48": (44.518, 3.500), "49": (47.478, -0.563), "50": (49.116, -1.091), "51": (48.957, 4.363),
+    "52": (48.111, 5.139), "53": (48.073, -0.770), "54": (48.692, 6.184), "55": (48.772, 5.160),
+    "56": (47.658, -2.760), "57": (49.119, 6.176), "58": (46.990, 3.159), "59": (50.629, 3.057),
+    "60": (49.430, 2.081), "61": (48.432, 0.091), "62": (50.291, 2.778), "63": (45.778, 3.087),
+    "64": (43.295, -0.371), "65": (43.233, 0.078), "66": (42.699, 2.895), "67": (48.573, 7.752),
+    "68": (48.079, 7.358), "69": (45.764, 4.836), "70": (47.620, 6.155), "71": (46.307, 4.828),
+    "72": (48.006, 0.199), "73": (45.564, 5.918), "74": (45.899, 6.129), "75": (48.857, 2.352),
+    "76": (49.443, 1.100), "77": (48.539, 2.659), "78": (48.805, 2.120), "79": (46.324, -0.465),
+    "80": (49.894, 2.296), "81": (43.929, 2.148), "82": (44.018, 1.355), "83": (43.124, 5.928),
+    "84": (43.949, 4.806), "85": (46.670, -1.426), "86": (46.580, 0.340), "87": (45.834, 1.261),
+    "88": (48.173, 6.450), "89": (47.798, 3.567), "90": (47.640, 6.863), "91": (48.629, 2.441),
+    "92": (48.892, 2.207), "93": (48.908, 2.440), "94": (48.790, 2.455), "95": (49.036, 2.076),
+    "971": (15.998, -61.726), "972": (14.616, -61.059), "973": (4.922, -52.313), "974": (-20.882, 55.450),
+    "975": (46.780, -56.177), "976": (-12.781, 45.228), "980": (43.738, 7.424), "986": (-13.282, -176.176),
+    "987": (-17.535, -149.569), "988": (-22.276, 166.458),
+}
+
+# Niveaux de zoom Leaflet pour lesquels les regroupements sont précalculés
+MIN_CLUSTER_ZOOM = 5
+MAX_CLUSTER_ZOOM = 11
+# Taille (pixels) d'une cellule de regroupement à l'écran
+CLUSTER_CELL_PX = 60
+# Villes conservées par groupe pour le popup
+CLUSTER_TOP_CITIES = 5
+
+_FIVE_DIGITS = re.compile(r'\b(\d{5})\b')
+_NON_ALPHANUMERIC = re.compile(r'[^A-Z0-9]+')
+_ARRONDISSEMENT = re.compile(r'\s+\d.*$')
+# Abréviations courantes dans les adresses postales
+_ABBREVIATIONS = {"ST": "SAINT", "STE": "SAINTE"}
+# Texte examiné après un code postal pour y reconnaître la commune
+_COMMUNE_WINDOW = 80
+
+
+def department_of(postal_code: str) -> Optional[str]:
+    """Département (clé de DEPARTMENTS) d'un code postal, None si le préfixe n'existe pas"""
+    if not postal_code or len(postal_code) != 5 or not postal_code.isdigit():
+        return None
+    if postal_code.startswith("20"):
+        # Corse: 200xx-201xx en Corse-du-Sud, le reste en Haute-Corse
+        return "2A" if postal_code < "20200" else "2B"
+    if postal_code[:3] in DEPARTMENTS:
+        return postal_code[:3]
+    if postal_code[:2] in DEPARTMENTS:
+        return postal_code[:2]
+    return None
+
+
+def normalize_commune(name: str) -> str:
+    """Nom comparable: majuscules sans accents ni ponctuation, abréviations développées"""
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii").upper()
+    return " ".join(_ABBREVIATIONS.get(word, word) for word in _NON_ALPHANUMERIC.sub(" ", name).split())
+
+
+class PostalCodeIndex:
+    """Codes postaux triés dans des tableaux compacts, avec coordonnées et nom de commune"""
+
+    def __init__(self, rows: List[Tuple[str, float, float, str]] = ()):
+        rows = sorted(rows)
+        self.codes = array("I", (int(code) for code, _, _, _ in rows))
+        self.lats = array("f", (lat for _, lat, _, _ in rows))
+        self.lons = array("f", (lon for _, _, lon, _ in rows))
+        self.names = [name for _, _, _, name in rows]
+        # Plage [début, fin) de chaque code dans les tableaux
+        self._ranges = {}
+        for position, code in enumerate(self.codes):
+            start, _ = self._ranges.get(code, (position, position))
+            self._ranges[code] = (start, position + 1)
+
+    @cached_property
+    def _keys(self) -> List[Tuple[str, ...]]:
+        """Noms de communes normalisés, découpés en mots"""
+        return [tuple(normalize_commune(name).split()) for name in self.names]
+
+    @classmethod
+    def load(cls, path: str = DATA_FILE) -> "PostalCodeIndex":
+        """Charge le fichier de données (index vide s'il n'existe pas)"""
+        if not os.path.exists(path):
+            logger.warning(f"{path} introuvable: seuls les codes postaux CEDEX seront reconnus, "
+                           f"coordonnées des chefs-lieux de département")
+            return cls()
+        rows = []
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                code, lat, lon, name = line.rstrip("\n").split("\t")
+                rows.append((code, float(lat), float(lon), name))
+        return cls(rows)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def _range(self, postal_code: str) -> Tuple[int, int]:
+        if not postal_code or not postal_code.isdigit():
+            return 0, 0
+        return self._ranges.get(int(postal_code), (0, 0))
+
+    def __contains__(self, postal_code: str) -> bool:
+        start, end = self._range(postal_code)
+        return end > start
+
+    @cached_property
+    def departments(self) -> frozenset:
+        """Départements (clés de DEPARTMENTS) dont l'index a au moins un code"""
+        return frozenset(department_of(f"{code:05d}") for code in self._ranges)
+
+    def communes(self, postal_code: str) -> List[str]:
+        start, end = self._range(postal_code)
+        return self.names[start:end]
+
+    def coordinates(self, postal_code: str, city: Optional[str] = None) -> Optional[Tuple[float, float]]:
+        """Coordonnées de la commune `city` pour ce code (ou de la première commune du code)"""
+        start, end = self._range(postal_code)
+        if end == start:
+            return None
+        index = start
+        if city:
+            wanted = normalize_commune(city)
+            for i in range(start, end):
+                if normalize_commune(self.names[i]) == wanted:
+                    index = i
+                    break
+        return self.lats[index], self.lons[index]
+
+    def match_commune(self, postal_code: str, text: str) -> Optional[str]:
+        """
+        Commune de ce code dont le nom ouvre `text` (le plus long nom reconnu), None sinon
+        "Paris" ou "Paris 11" après 75011 donnent "Paris": le numéro d'arrondissement est facultatif
+        """
+        start, end = self._range(postal_code)
+        if end == start:
+            return None
+        words = tuple(normalize_commune(text[:_COMMUNE_WINDOW]).split())
+        best, best_length = None, 0
+        for i in range(start, end):
+            key = self._keys[i]
+            # Mots avant le numéro d'arrondissement ("PARIS 11" -> "PARIS")
+            base = next((key[:n] for n, word in enumerate(key) if n and word.isdigit()), key)
+            if len(base) > best_length and words[:len(base)] == base:
+                best = self.names[i] if base == key else _ARRONDISSEMENT.sub("", self.names[i])
+                best_length = len(base)
+        return best
+
+
+_index: Optional[PostalCodeIndex] = None
+
+
+def get_index() -> PostalCodeIndex:
+    """Index partagé, chargé au premier appel"""
+    global _index
+    if _index is None:
+        _index = PostalCodeIndex.load()
+    return _index
+
+
+def is_valid_postal_code(postal_code: str, cedex: bool = False) -> bool:
+    """
+    Code postal plausible: préfixe de département existant et code connu de l'index
+    Les codes CEDEX, absents de l'index, et ceux d'un territoire dont l'index n'a aucun code ne sont vérifiés
+    que sur leur préfixe; sans index, aucun autre code n'est accepté (le préfixe seul laisse passer
+    les prix et identifiants de 5 chiffres)
+    """
+    department = department_of(postal_code)
+    if department is None:
+        return False
+    if cedex:
+        return True
+    index = get_index()
+    return postal_code in index or (len(index) > 0 and department not in index.departments)
+
+
+def find_postal_code(text: str) -> Optional[re.Match]:
+    """
+    Premier nombre de 5 chiffres du texte qui est un code postal valide
+    Les faux positifs (prix, identifiants, départements inexistants) sont ignorés
+    """
+    for match in _FIVE_DIGITS.finditer(text):
+        cedex = "cedex" in text[match.end():match.end() + 40].lower()
+        if is_valid_postal_code(match.group(1), cedex=cedex):
+            return match
+    return None
+
+
+def locate_postal_code(text: str) -> Optional[Tuple[re.Match, Optional[str]]]:
+    """
+    Code postal d'une adresse et commune de l'index reconnue juste après
+    Retourne (match, commune ou None); un code suivi d'une de ses communes est préféré au premier code valide
+    """
+    index = get_index()
+    first = None
+    for match in _FIVE_DIGITS.finditer(text):
+        following = text[match.end():match.end() + _COMMUNE_WINDOW]
+        if not is_valid_postal_code(match.group(1), cedex="cedex" in following.lower()):
+            continue
+        commune = index.match_commune(match.group(1), following)
+        if commune:
+            return match, commune
+        if first is None:
+            first = match
+    return (first, None) if first else None
+
+
+def coordinates_for(postal_code: str, city: Optional[str] = None) -> Optional[Tuple[float, float]]:
+    """Coordonnées d'un code postal: commune de l'index, sinon chef-lieu du département"""
+    coordinates = get_index().coordinates(postal_code, city)
+    if coordinates:
+        return coordinates
+    department = department_of(postal_code)
+    return DEPARTMENTS[department] if department else None
+
+
+def _mercator(lat: float, lon: float) -> Tuple[float, float]:
+    """Projection Web Mercator normalisée (0-1), celle des tuiles de la carte"""
+    lat = max(-85.0, min(85.0, lat))
+    x = (lon + 180.0) / 360.0
+    sin_lat = math.sin(math.radians(lat))
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return x, y
+
+
+def build_map_data(cities: Dict[str, dict]) -> dict:
+    """
+    Géocode les villes des statistiques et précalcule les regroupements de marqueurs par zoom
+    Retourne {"cities": [[nom, lat, lon, nombre, types, associations], ...],
+              "zooms": {zoom: [[lat, lon, nombre, nb_villes, [indices des principales villes]], ...]},
+              "unlocated": villes sans coordonnées}
+    """
+    located = []
+    unlocated = 0
+    for city, entry in cities.items():
+        coordinates = coordinates_for(entry.get("postal_code"), city)
+        if not coordinates:
+            unlocated += 1
+            continue
+        lat, lon = coordinates
+        located.append([city, round(lat, 4), round(lon, 4), entry["count"], entry["types"], entry["associations"]])
+
+    # Plus grandes villes d'abord: elles apparaissent en tête des popups de groupe
+    located.sort(key=lambda city: city[3], reverse=True)
+    projected = [_mercator(city[1], city[2]) for city in located]
+
+    zooms = {}
+    for zoom in range(MIN_CLUSTER_ZOOM, MAX_CLUSTER_ZOOM + 1):
+        cell = CLUSTER_CELL_PX / (256 * 2 ** zoom)
+        groups = {}
+        for index, (x, y) in enumerate(projected):
+            groups.setdefault((int(x / cell), int(y / cell)), []).append(index)
+
+        clusters = []
+        for members in groups.values():
+            total = sum(located[i][3] for i in members)
+            # Position: moyenne des villes pondérée par le nombre d'associations
+            lat = sum(located[i][1] * located[i][3] for i in members) / total
+            lon = sum(located[i][2] * located[i][3] for i in members) / total
+            clusters.append([round(lat, 4), round(lon, 4), total, len(members), members[:CLUSTER_TOP_CITIES]])
+        zooms[zoom] = clusters
+
+    return {
+        "cities": located,
+        "zooms": zooms,
+        "min_zoom": MIN_CLUSTER_ZOOM,
+        "max_zoom": MAX_CLUSTER_ZOOM,
+        "unlocated": unlocated,
+    }
+
+
+def build_data_file(sources: List[str], target: str = DATA_FILE) -> int:
+    """
+    Construit data/postal_codes_fr.tsv.gz depuis les exports GeoNames (tabulés, sans en-tête) de la métropole
+    et de l'outre-mer (FR.txt, GP.txt, RE.txt... ou allCountries.txt)
+    """
+    rows = set()
+    for source in sources:
+        with open(source, encoding="utf-8") as f:
+            for fields in csv.reader(f, delimiter="\t"):
+                if len(fields) < 11 or fields[0] not in COUNTRY_CODES:
+                    continue
+                code, name = fields[1].strip(), fields[2].strip()
+                if department_of(code) is None:
+                    continue
+                rows.add((code, round(float(fields[9]), 4), round(float(fields[10]), 4), name))
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with gzip.open(target, "wt", encoding="utf-8") as f:
+        for code, lat, lon, name in sorted(rows):
+            f.write(f"{code}\t{lat}\t{lon}\t{name}\n")
+    return len(rows)
+
+
+def _region_key(country: str, department: str) -> str:
+    """
+    Zone où chercher une commune: le département en métropole ("Département de l'Ain" et "Ain" donnent AIN),
+    le code pays GeoNames en outre-mer (les extraits n'y nomment pas les départements de la même façon)
+    """
+    if country != "FR":
+        return country
+    return re.sub(r"^DEPARTEMENT (DE LA |DE L |DES |DU |DE |D )?", "", normalize_commune(department))
+
+
+def build_data_file_from_places(postal_sources: List[str], places_source: str, target: str = DATA_FILE) -> Dict[str, int]:
+    """
+    Construit data/postal_codes_fr.tsv.gz depuis les communes de chaque code postal (CSV postal_code, country_code,
+    admin_name2, admin_name3, place_name; un fichier par code pays) et des lieux localisés (CSV lat, lon, name,
+    admin2, cc)
+    Coordonnées d'une commune: celles du lieu de même nom dans son département, sinon la moyenne des communes
+    localisées du même code postal, sinon le chef-lieu de son arrondissement, sinon celui du département
+    Retourne le nombre de communes par origine des coordonnées
+    """
+    places = {}
+    territories: Dict[str, List[Tuple[float, float]]] = {}
+    with open(places_source, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            country = row["cc"].strip()
+            if country in COUNTRY_CODES:
+                coordinates = (float(row["lat"]), float(row["lon"]))
+                places.setdefault((_region_key(country, row["admin2"]), normalize_commune(row["name"])), coordinates)
+                territories.setdefault(country, []).append(coordinates)
+
+    communes = {}
+    for postal_source in postal_sources:
+        with open(postal_source, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                code, name = row["postal_code"].strip(), row["place_name"].strip()
+                # Les codes CEDEX ("24053 CEDEX") ne sont pas des codes de commune
+                if row["country_code"] in COUNTRY_CODES and department_of(code) is not None:
+                    region = _region_key(row["country_code"], row["admin_name2"])
+                    communes.setdefault((code, name), (region, row["admin_name3"].strip()))
+
+    def place(department: str, name: str) -> Optional[Tuple[float, float]]:
+        key = normalize_commune(name)
+        for candidate in (key, f"LA {key}", f"LE {key}", f"LES {key}"):
+            if (department, candidate) in places:
+                return places[(department, candidate)]
+        return None
+
+    located = {}
+    by_code: Dict[str, List[Tuple[float, float]]] = {}
+    for (code, name), (department, _) in communes.items():
+        coordinates = place(department, name)
+        if coordinates:
+            located[(code, name)] = coordinates
+            by_code.setdefault(code, []).append(coordinates)
+
+    origins = {"commune": len(located), "postal_code": 0, "arrondissement": 0, "department": 0, "territory": 0}
+    rows = []
+    # Collectivités absentes des extraits de codes postaux: leur code unique, placé au centre de leurs lieux
+    known_codes = {code for code, _ in communes}
+    for country, (code, name) in _COLLECTIVITY_CODES.items():
+        if code not in known_codes and country in territories:
+            lats, lons = zip(*territories[country])
+            rows.append((code, round(sum(lats) / len(lats), 4), round(sum(lons) / len(lons), 4), name))
+            origins["territory"] += 1
+    for (code, name), (department, arrondissement) in communes.items():
+        coordinates = located.get((code, name))
+        if coordinates is None and code in by_code:
+            siblings = by_code[code]
+            coordinates = (sum(lat for lat, _ in siblings) / len(siblings), sum(lon for _, lon in siblings) / len(siblings))
+            origins["postal_code"] += 1
+        if coordinates is None and arrondissement:
+            coordinates = place(department, arrondissement)
+            origins["arrondissement"] += coordinates is not None
+        if coordinates is None:
+            coordinates = DEPARTMENTS[department_of(code)]
+            origins["department"] += 1
+        rows.append((code, round(coordinates[0], 4), round(coordinates[1], 4), name))
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with gzip.open(target, "wt", encoding="utf-8") as f:
+        for code, lat, lon, name in sorted(rows):
+            f.write(f"{code}\t{lat}\t{lon}\t{name}\n")
+    return origins
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "build":
+        count = build_data_file(sys.argv[2:])
+        print(f"{count} couples code postal/commune écrits dans {DATA_FILE}")
+    elif len(sys.argv) >= 4 and sys.argv[1] == "build-places":
+        origins = build_data_file_from_places(sys.argv[2:-1], sys.argv[-1])
+        print(f"{sum(origins.values())} couples code postal/commune écrits dans {DATA_FILE} "
+              f"(coordonnées: {', '.join(f'{origin} {count}' for origin, count in origins.items())})")
+    else:
+        print("Usage: python backend/helloscraper/geo.py build FR.txt [GP.txt MQ.txt ...]\n"
+              "       python backend/helloscraper/geo.py build-places FR.zcsv [GP.zcsv MQ.zcsv ...] rg_cities1000.csv")
+        sys.exit(1)
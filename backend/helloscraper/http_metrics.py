@@ -0,0 +1,96 @@
+"""
+Instrumentation HTTP des sessions requests (séparée de metrics pour ne pas importer
+requests/urllib3 avec lui): phases DNS, connexion, TTFB et téléchargement de chaque
+requête, codes de statut, erreurs et octets reçus (compressés / décodés), dans les histogrammes
+et compteurs de metrics.
+"""
+import time
+import socket
+
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.exceptions import NewConnectionError, ConnectTimeoutError
+
+from .metrics import HTTP_PHASE_SECONDS, HTTP_RESPONSES, HTTP_ERRORS, count_http_bytes
+
+
+class _TimedConnectionMixin:
+    def _new_conn(self):
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(self._dns_host, self.port, 0, socket.SOCK_STREAM)
+        except OSError:
+            # Laisser urllib3 lever son erreur habituelle (NameResolutionError)
+            return super()._new_conn()
+        finally:
+            self._dns_seconds = time.perf_counter() - start
+            HTTP_PHASE_SECONDS.observe(self._dns_seconds, phase="dns")
+
+        # Se connecter aux adresses déjà résolues pour ne pas payer une seconde résolution
+        host = self._dns_host
+        error = None
+        try:
+            for address in dict.fromkeys(info[4][0] for info in addresses):
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except (NewConnectionError, ConnectTimeoutError) as e:
+                    error = e
+            raise error
+        finally:
+            self._dns_host = host
+
+    def connect(self):
+        self._dns_seconds = 0.0
+        start = time.perf_counter()
+        super().connect()
+        HTTP_PHASE_SECONDS.observe(max(0.0, time.perf_counter() - start - self._dns_seconds), phase="connect")
+
+    def getresponse(self, *args, **kwargs):
+        start = time.perf_counter()
+        response = super().getresponse(*args, **kwargs)
+        HTTP_PHASE_SECONDS.observe(time.perf_counter() - start, phase="ttfb")
+        return response
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class InstrumentedAdapter(HTTPAdapter):
+    """HTTPAdapter qui mesure les phases de chaque requête et compte les codes de statut"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+    def send(self, request, stream=False, **kwargs):
+        try:
+            response = super().send(request, stream=stream, **kwargs)
+        except Exception as e:
+            HTTP_ERRORS.inc(error=type(e).__name__)
+            raise
+        HTTP_RESPONSES.inc(status=response.status_code)
+        if not stream:
+            start = time.perf_counter()
+            response.content
+            HTTP_PHASE_SECONDS.observe(time.perf_counter() - start, phase="download")
+            # tell(): octets lus sur la connexion, avant décompression
+            count_http_bytes(response.raw.tell(), len(response.content), response.headers.get("Content-Encoding"))
+        return response
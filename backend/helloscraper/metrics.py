@@ -0,0 +1,429 @@
+"""
+Instrumentation du pipeline de scraping
+Histogrammes et compteurs en mémoire (thread-safe), exposés au format texte
+Prometheus par /metrics et exportables en JSON à la fin d'une exécution CLI.
+
+Étapes mesurées:
+- HTTP: DNS, connexion (TCP + TLS), TTFB, téléchargement du corps
+- parsing HTML, extraction par champ et par stratégie, écriture des fichiers
+- délais de politesse et d'attente entre tentatives
+"""
+import os
+import time
+import json
+import threading
+import contextlib
+from typing import Dict, List, Optional, Tuple
+
+# Bornes des histogrammes (secondes)
+NETWORK_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+CPU_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+DELAY_BUCKETS = (0.1, 0.5, 1, 2, 5, 10, 30, 60, 120)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Compteur monotone, éventuellement étiqueté"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [{"labels": dict(zip(self.labelnames, key)), "value": value} for key, value in items]
+
+
+class Histogram:
+    """Histogramme cumulatif à bornes fixes, éventuellement étiqueté"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=NETWORK_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # clé d'étiquettes -> [compte par borne (non cumulé), somme, nombre]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, **labels):
+        """Context manager / décorateur qui observe la durée du bloc"""
+        return Timer(self, labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[2] if state else 0
+
+    def total(self, **labels) -> float:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[1] if state else 0.0
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def _items(self):
+        with self._lock:
+            return sorted((key, (list(state[0]), state[1], state[2])) for key, state in self._values.items())
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in self._items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+    def snapshot(self) -> List[dict]:
+        series = []
+        for key, (counts, total, count) in self._items():
+            series.append({
+                "labels": dict(zip(self.labelnames, key)),
+                "count": count,
+                "sum": total,
+                "mean": total / count if count else 0.0,
+                "p50": self._quantile(counts, count, 0.5),
+                "p95": self._quantile(counts, count, 0.95),
+            })
+        return series
+
+    def _quantile(self, counts: List[int], count: int, q: float) -> Optional[float]:
+        """Borne supérieure du bucket contenant le quantile q (approximation Prometheus)"""
+        if not count:
+            return None
+        rank = q * count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return bound if bound != float("inf") else self.buckets[-2]
+        return self.buckets[-2]
+
+
+class Timer(contextlib.ContextDecorator):
+    def __init__(self, histogram: Histogram, labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def _recreate_cm(self):
+        # Une instance par appel quand le timer sert de décorateur (appels concurrents)
+        return Timer(self.histogram, self.labels)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self._start, **self.labels)
+        return False
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Métrique déjà enregistrée: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=NETWORK_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def metrics(self) -> list:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render(self) -> str:
+        """Format d'exposition texte Prometheus (version 0.0.4)"""
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        return {metric.name: {"type": metric.kind, "help": metric.documentation, "series": metric.snapshot()}
+                for metric in self.metrics()}
+
+    def reset(self):
+        for metric in self.metrics():
+            metric.reset()
+
+
+registry = Registry()
+
+HTTP_PHASE_SECONDS = registry.histogram(
+    "helloscraper_http_phase_seconds", "Durée des phases d'une requête HTTP (dns, connect, ttfb, download)",
+    ("phase",))
+HTTP_RESPONSES = registry.counter(
+    "helloscraper_http_responses_total", "Réponses HTTP reçues par code de statut", ("status",))
+HTTP_ERRORS = registry.counter(
+    "helloscraper_http_errors_total", "Requêtes HTTP sans réponse (timeout, connexion, DNS...)", ("error",))
+HTTP_RETRIES = registry.counter(
+    "helloscraper_http_retries_total", "Nouvelles tentatives de requête par motif", ("reason",))
+CIRCUIT_TRANSITIONS = registry.counter(
+    "helloscraper_circuit_transitions_total", "Changements d'état du disjoncteur par hôte", ("host", "state"))
+RATE_DECREASES = registry.counter(
+    "helloscraper_rate_decreases_total", "Baisses du débit adaptatif par hôte et par motif (429, 503, latency)",
+    ("host", "reason"))
+HTTP_BYTES = registry.counter(
+    "helloscraper_http_bytes_total", "Octets de corps reçus, sur le réseau (wire) et décodés (decoded), par Content-Encoding",
+    ("kind", "encoding"))
+HTTP_DEFERRED = registry.counter(
+    "helloscraper_http_deferred_total", "Échecs de récupération reportés dans la file différée, par motif", ("reason",))
+SEARCH_PAGES = registry.counter(
+    "helloscraper_search_pages_total", "Pages de recherche analysées, par chemin d'extraction (json, dom, regex, none)",
+    ("source",))
+SEARCH_PREFETCH = registry.counter(
+    "helloscraper_search_prefetch_total",
+    "Pages de recherche préchargées: utilisées (used), téléchargées au-delà de la fin (wasted) ou annulées (cancelled)",
+    ("outcome",))
+SITEMAP_FETCHES = registry.counter(
+    "helloscraper_sitemap_fetches_total", "Sitemaps lus (index, urlset) ou ignorés car inchangés (skipped)", ("kind",))
+PARSE_SECONDS = registry.histogram(
+    "helloscraper_parse_seconds", "Durée du parsing HTML par type de page", ("page",), CPU_BUCKETS)
+EXTRACTION_SECONDS = registry.histogram(
+    "helloscraper_extraction_seconds", "Durée d'extraction par champ et par stratégie", ("field", "strategy"), CPU_BUCKETS)
+WRITE_SECONDS = registry.histogram(
+    "helloscraper_write_seconds", "Durée d'écriture des fichiers de résultats par format", ("format",), CPU_BUCKETS)
+DELAY_SECONDS = registry.histogram(
+    "helloscraper_delay_seconds", "Temps passé en pause (politesse, attente avant nouvelle tentative)", ("reason",),
+    DELAY_BUCKETS)
+CACHE_HITS = registry.counter(
+    "helloscraper_cache_hits_total", "Résultats servis depuis un cache", ("cache",))
+CACHE_MISSES = registry.counter(
+    "helloscraper_cache_misses_total", "Résultats recalculés faute d'entrée en cache", ("cache",))
+
+
+class ExtractionProfiler:
+    """
+    Profil optionnel des stratégies d'extraction (PROFILE_EXTRACTION=true):
+    pour chaque champ et stratégie, nombre de tentatives, nombre de fois où la stratégie
+    a produit la valeur et temps passé, pour décider quelles stratégies réordonner ou supprimer.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None):
+        # None: décidé par PROFILE_EXTRACTION au premier usage, après le chargement du .env par l'appelant
+        self._enabled = enabled
+        self.documents = 0
+        # (champ, stratégie) -> [tentatives, succès, secondes]
+        self._stats: Dict[Tuple[str, str], list] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        if self._enabled is None:
+            self._enabled = os.getenv("PROFILE_EXTRACTION", "False").lower() in ('true', '1', 't')
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value: bool):
+        self._enabled = value
+
+    def start_document(self):
+        with self._lock:
+            self.documents += 1
+
+    def record(self, field: str, strategy: str, seconds: float, hit: bool):
+        with self._lock:
+            stats = self._stats.setdefault((field, strategy), [0, 0, 0.0])
+            stats[0] += 1
+            stats[1] += int(hit)
+            stats[2] += seconds
+
+    def reset(self):
+        with self._lock:
+            self.documents = 0
+            self._stats.clear()
+
+    def report(self) -> List[dict]:
+        """Une ligne par (champ, stratégie), dans l'ordre d'essai des stratégies"""
+        with self._lock:
+            items = list(self._stats.items())
+            documents = self.documents
+        rows = []
+        for (field, strategy), (attempts, hits, seconds) in items:
+            rows.append({
+                "field": field,
+                "strategy": strategy,
+                "attempts": attempts,
+                "hits": hits,
+                "hit_rate": round(hits / attempts, 4) if attempts else 0.0,
+                "share_of_documents": round(hits / documents, 4) if documents else 0.0,
+                "total_ms": round(seconds * 1000, 3),
+                "mean_ms": round(seconds * 1000 / attempts, 3) if attempts else 0.0,
+                "ms_per_hit": round(seconds * 1000 / hits, 3) if hits else None,
+            })
+        return rows
+
+    def format_report(self) -> str:
+        lines = [f"Profil d'extraction ({self.documents} pages)",
+                 f"{'champ':<18}{'stratégie':<22}{'essais':>8}{'succès':>8}{'taux':>8}{'ms/essai':>10}{'ms total':>10}"]
+        for row in self.report():
+            lines.append(f"{row['field']:<18}{row['strategy']:<22}{row['attempts']:>8}{row['hits']:>8}"
+                         f"{row['hit_rate']:>8.0%}{row['mean_ms']:>10.3f}{row['total_ms']:>10.1f}")
+        return "\n".join(lines)
+
+    def write_report(self, path: str, **extra) -> str:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"documents": self.documents, **extra, "strategies": self.report()}, f, ensure_ascii=False, indent=2)
+        return path
+
+
+extraction_profiler = ExtractionProfiler()
+
+
+class ExtractionWatch:
+    """
+    Chronomètre à tours pour les stratégies d'extraction successives d'une page:
+    chaque lap(champ, stratégie, valeur) enregistre le temps écoulé depuis le tour précédent.
+    Une stratégie compte comme tentée si le champ n'avait pas encore de valeur, et comme
+    réussie si elle lui en a donné une.
+    """
+
+    def __init__(self, profiler: Optional[ExtractionProfiler] = None):
+        self.profiler = profiler or extraction_profiler
+        self._found = set()
+        self._last = time.perf_counter()
+        if self.profiler.enabled:
+            self.profiler.start_document()
+
+    def lap(self, field: str, strategy: str, value=None):
+        now = time.perf_counter()
+        seconds = now - self._last
+        self._last = now
+        EXTRACTION_SECONDS.observe(seconds, field=field, strategy=strategy)
+
+        if field in self._found:
+            return
+        if value:
+            self._found.add(field)
+        if self.profiler.enabled:
+            self.profiler.record(field, strategy, seconds, bool(value))
+
+
+# --- Instrumentation HTTP (requests / urllib3) ---
+
+def instrument_session(session):
+    """Monte l'adaptateur instrumenté sur une session requests"""
+    # requests/urllib3 ne sont importés qu'à la première session (import de metrics léger)
+    from .http_metrics import InstrumentedAdapter
+    adapter = InstrumentedAdapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def count_http_bytes(wire: int, decoded: int, encoding: Optional[str]):
+    """Octets de corps reçus sur le réseau (compressés) et après décodage, par Content-Encoding"""
+    encoding = (encoding or "identity").lower()
+    HTTP_BYTES.inc(wire, kind="wire", encoding=encoding)
+    HTTP_BYTES.inc(decoded, kind="decoded", encoding=encoding)
+
+
+# --- Rapport de fin d'exécution ---
+
+def stage_summary(wall_time: Optional[float] = None) -> List[dict]:
+    """Temps total par étape (somme des histogrammes), trié par temps décroissant"""
+    stages = []
+    for metric in registry.metrics():
+        if metric.kind != "histogram":
+            continue
+        for series in metric.snapshot():
+            label = ",".join(f"{k}={v}" for k, v in series["labels"].items())
+            stage = {
+                "stage": f"{metric.name}{{{label}}}" if label else metric.name,
+                "count": series["count"],
+                "seconds": round(series["sum"], 6),
+            }
+            if wall_time:
+                stage["share_of_wall_time"] = round(series["sum"] / wall_time, 4)
+            stages.append(stage)
+    return sorted(stages, key=lambda s: s["seconds"], reverse=True)
+
+
+def write_report(path: str, wall_time: Optional[float] = None, **extra) -> str:
+    """Écrit le rapport JSON des métriques (étapes + séries détaillées)"""
+    report = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "wall_time_seconds": wall_time,
+        **extra,
+        "stages": stage_summary(wall_time),
+        "metrics": registry.snapshot(),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return path
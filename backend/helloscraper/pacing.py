@@ -0,0 +1,92 @@
+"""
+Débit adaptatif (AIMD) par hôte, partagé par tous les Fetcher du processus
+Le débit (requêtes/s) augmente de façon additive tant que la latence p95 et les réponses restent saines,
+et diminue de façon multiplicative sur 429/503 ou pic de latence. Il reste entre min_rate et max_rate
+(le plafond configuré): le régime établi se stabilise au débit le plus élevé que le serveur tolère.
+Les jobs concurrents d'un même processus se partagent les créneaux: c'est le débit total vers l'hôte
+qui est contrôlé, pas celui de chaque job.
+"""
+import time
+import random
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+from . import metrics
+
+# Statuts qui signalent une surcharge du serveur
+OVERLOAD_STATUSES = (429, 503)
+
+
+class AIMDController:
+
+    def __init__(self, host: str, initial_rate: float = 0.25, min_rate: float = 0.05, max_rate: float = 1.0,
+                 increase: float = 0.02, decrease: float = 0.5, target_p95: float = 3.0, window: int = 20):
+        self.host = host
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.target_p95 = target_p95
+        self.rate = min(max_rate, max(min_rate, initial_rate))
+        self._latencies = deque(maxlen=window)
+        self._next_slot = 0.0
+        # Pas de nouvelle réduction avant ce moment: une rafale d'erreurs ne compte qu'une fois
+        self._hold_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Réserve le prochain créneau de requête; retourne l'attente (secondes) avant de requêter"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            # Variation de ±20% autour de l'intervalle pour éviter un rythme trop régulier
+            self._next_slot = slot + random.uniform(0.8, 1.2) / self.rate
+            return slot - now
+
+    def p95(self) -> float:
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0
+
+    def observe(self, latency: float, status: Optional[int]):
+        """Enregistre une réponse (latence en secondes, statut HTTP; None si la requête a échoué) et ajuste le débit"""
+        with self._lock:
+            self._latencies.append(latency)
+            now = time.monotonic()
+            if status in OVERLOAD_STATUSES:
+                self._decrease(now, str(status))
+            elif len(self._latencies) >= self._latencies.maxlen // 2 and self.p95() > self.target_p95:
+                self._decrease(now, "latency")
+            elif status is not None and status < 400:
+                # Hausse additive: environ +increase requête/s par seconde de trafic sain
+                self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def _decrease(self, now: float, reason: str):
+        if now < self._hold_until:
+            return
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        # Les latences mesurées au débit précédent ne doivent pas déclencher une seconde réduction
+        self._latencies.clear()
+        self._hold_until = now + 2 / self.rate
+        metrics.RATE_DECREASES.inc(host=self.host, reason=reason)
+
+
+_controllers: Dict[str, AIMDController] = {}
+_controllers_lock = threading.Lock()
+
+
+def controller_for(host: str, config) -> AIMDController:
+    """Contrôleur de débit partagé de `host` (créé avec les réglages de `config` au premier appel)"""
+    with _controllers_lock:
+        controller = _controllers.get(host)
+        if controller is None:
+            controller = _controllers[host] = AIMDController(
+                host,
+                initial_rate=config.initial_rate,
+                min_rate=config.min_rate,
+                max_rate=config.max_rate,
+                increase=config.rate_increase,
+                decrease=config.rate_decrease,
+                target_p95=config.target_p95_latency,
+            )
+        return controller
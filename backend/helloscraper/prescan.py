@@ -0,0 +1,50 @@
+"""
+Pré-filtrage du HTML avant les regex d'extraction
+Les pages d'associations embarquent des bundles JS, du CSS et des images en base64
+qui représentent l'essentiel du document: les regex email/téléphone/prix y perdent
+du temps et y trouvent des faux positifs. On réduit le document une seule fois:
+- markup: HTML sans <script>, <style>, <template>, <svg>, commentaires ni URIs data:
+- text: texte visible + valeurs d'attributs utiles (data-email, data-phone, liens mailto:/tel:)
+"""
+import re
+import html
+from functools import cached_property
+
+_SKIPPED_BLOCKS = re.compile(r'<(script|style|template|svg)\b[^>]*>.*?</\1\s*>|<!--.*?-->', re.S | re.I)
+_DATA_URI = re.compile(r'data:[\w/+.-]+;base64,[A-Za-z0-9+/=]+')
+_TAG = re.compile(r'<[^>]*>')
+_USEFUL_ATTRIBUTE = re.compile(r'''\b(data-email|data-phone|href)\s*=\s*["']([^"']*)["']''', re.I)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def _tag_replacement(match) -> str:
+    """Remplace une balise par les seules valeurs d'attributs utiles à l'extraction"""
+    tag = match.group(0)
+    if "=" not in tag:
+        return " "
+    kept = []
+    for name, value in _USEFUL_ATTRIBUTE.findall(tag):
+        name = name.lower()
+        if name == "href":
+            if value.startswith(("mailto:", "tel:")):
+                kept.append(value)
+        else:
+            kept.append(f'{name}="{value}"')
+    return f" {' '.join(kept)} " if kept else " "
+
+
+class PrescannedHTML:
+    """Vues réduites d'un document HTML, calculées à la demande puis mises en cache"""
+
+    def __init__(self, raw_html: str):
+        self.raw = raw_html
+
+    @cached_property
+    def markup(self) -> str:
+        stripped = _SKIPPED_BLOCKS.sub(" ", self.raw)
+        return _DATA_URI.sub("", stripped)
+
+    @cached_property
+    def text(self) -> str:
+        text = _TAG.sub(_tag_replacement, self.markup)
+        return _WHITESPACE.sub(" ", html.unescape(text)).strip()
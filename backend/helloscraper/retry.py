@@ -0,0 +1,89 @@
+"""
+Politique de nouvelles tentatives du moteur
+Une URL n'immobilise jamais longtemps l'appelant: les attentes sont bornées (backoff exponentiel
+plafonné, avec variation aléatoire) et une URL qui demanderait d'attendre plus longtemps, ou qui
+dépasse son délai total, est reportée dans une file différée, retraitée après la passe principale.
+"""
+import time
+import random
+import email.utils
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Backoff exponentiel plafonné avec variation aléatoire ("full jitter"): entre base et min(cap, base * 2^attempt)"""
+    ceiling = min(cap, base * (2 ** attempt))
+    return random.uniform(min(base, ceiling), ceiling)
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Secondes à attendre d'après un en-tête Retry-After (nombre de secondes ou date HTTP), None si absent ou invalide"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        moment = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment is None:
+        return None
+    return max(0.0, moment.timestamp() - (time.time() if now is None else now))
+
+
+@dataclass
+class FetchFailure:
+    """Échec d'une récupération: raison ('403', '429', '5xx', 'error', 'deadline', 'http_404'...) et date de reprise possible"""
+    url: str
+    reason: str
+    attempts: int
+    retryable: bool = True
+    # Horodatage (time.time()) avant lequel il est inutile de réessayer
+    not_before: float = 0.0
+
+
+class DeferredQueue:
+    """
+    File des URLs en échec, retraitées après la passe principale
+    Une URL reportée plus de `max_rounds` fois (ou en échec définitif) passe dans les échecs du rapport final
+    """
+
+    def __init__(self, max_rounds: int = 2):
+        self.max_rounds = max_rounds
+        self._pending: Dict[str, FetchFailure] = {}
+        self._rounds: Dict[str, int] = {}
+        self.failed: Dict[str, FetchFailure] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, url: str, failure: Optional[FetchFailure]):
+        """Reporte `url` (failure vaut None si la page a été récupérée mais sans résultat exploitable)"""
+        failure = failure or FetchFailure(url, "no_result", 1, retryable=False)
+        rounds = self._rounds.get(url, 0)
+        if not failure.retryable or rounds >= self.max_rounds:
+            self.failed[url] = failure
+            self._pending.pop(url, None)
+            return
+        self._rounds[url] = rounds + 1
+        self._pending[url] = failure
+
+    def drain(self, wait) -> Iterator[str]:
+        """
+        Itère sur les URLs reportées, par date de reprise croissante
+        `wait(secondes)` est appelé avant une URL qui n'est pas encore réessayable
+        Les URLs reportées à nouveau pendant l'itération le sont pour le tour suivant
+        """
+        batch = sorted(self._pending.values(), key=lambda failure: failure.not_before)
+        self._pending = {}
+        for failure in batch:
+            remaining = failure.not_before - time.time()
+            if remaining > 0:
+                wait(remaining)
+            yield failure.url
+
+    def report(self) -> List[FetchFailure]:
+        """URLs toujours en échec: définitif, après max_rounds reports, ou encore en attente (exécution interrompue)"""
+        return list(self.failed.values()) + list(self._pending.values())
@@ -0,0 +1,379 @@
+"""
+Découverte des associations par les pages de recherche
+Les liens trouvés sont transmis page par page à `add_links` (liste en mémoire, fichier,
+frontière sur disque...), qui retourne le nombre de liens encore inconnus.
+parse_search_page() analyse une page déjà téléchargée: état JSON embarqué d'abord, DOM en repli.
+Les pages suivantes sont préchargées (EngineConfig.search_prefetch) et traitées dans l'ordre.
+"""
+import re
+import json
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional
+from urllib.parse import urljoin, urlparse
+
+from . import metrics
+from .charset import decode_page
+
+logger = logging.getLogger(__name__)
+
+
+def get_all_association_links(fetcher, search_term, limit=None):
+    """Récupère tous les liens d'associations à partir des pages de recherche (au plus `limit`)"""
+    all_links = []
+    seen = set()
+    
+    def add_links(links):
+        new_links = [link for link in links if link not in seen]
+        seen.update(new_links)
+        all_links.extend(new_links)
+        return len(new_links)
+    
+    crawl_association_links(fetcher, search_term, add_links, limit)
+    logger.info(f"Total des liens uniques trouvés: {len(all_links)}")
+    return all_links
+
+def _fetch_search_page(fetcher, search_term, page):
+    """Télécharge une page de recherche (URL alternative en repli); None si les deux tentatives échouent"""
+    search_url = fetcher.config.search_url
+    params = {
+        "query": search_term,
+        "page": page
+    }
+    
+    # Ajouter un paramètre aléatoire pour éviter la mise en cache
+    if random.random() < 0.7:  # 70% de chance
+        params['_'] = int(time.time() * 1000)
+    
+    response = fetcher.get(search_url, params)
+    if not response and not fetcher.cancelled:
+        # En cas d'échec, tenter une autre approche
+        logger.info(f"Échec sur la page {page}, tentative avec une approche alternative...")
+        
+        # Changer l'URL légèrement pour contourner les limitations
+        alt_url = f"{search_url}?q={search_term}&page={page}"
+        response = fetcher.get(alt_url)
+    return response
+
+
+def crawl_association_links(fetcher, search_term, add_links, limit=None):
+    """
+    Parcourt les pages de recherche et transmet les liens trouvés à `add_links` page par page
+    `add_links(liens)` retourne le nombre de liens encore inconnus (liste en mémoire ou frontière sur disque)
+    La pagination s'arrête dès que `limit` nouveaux liens ont été trouvés (si précisé)
+    Les config.search_prefetch pages suivantes sont téléchargées en avance, dans le débit adaptatif de l'hôte;
+    les pages encore en attente sont annulées dès que la fin de la pagination est détectée
+    Retourne le nombre total de nouveaux liens
+    """
+    base_url = fetcher.config.base_url
+    search_url = fetcher.config.search_url
+    total_new_links = 0
+    page = 1
+    more_pages = True
+    consecutive_empty_pages = 0
+    max_empty_pages = 3  # Arrêter après 3 pages vides consécutives
+    
+    # Fenêtre de préchargement: pages demandées en parallèle, chacune par un Fetcher dérivé (même session)
+    window = max(1, fetcher.config.search_prefetch)
+    pool = ThreadPoolExecutor(max_workers=window, thread_name_prefix="search-prefetch") if window > 1 else None
+    cancel = threading.Event()
+    pending = {}
+    
+    logger.info(f"Récupération des liens d'associations avec le terme '{search_term}'...")
+    
+    try:
+        while more_pages and consecutive_empty_pages < max_empty_pages:
+            logger.info(f"Traitement de la page {page}...")
+            if pool is None:
+                response = _fetch_search_page(fetcher, search_term, page)
+            else:
+                for ahead in range(page, page + window):
+                    if ahead not in pending:
+                        pending[ahead] = pool.submit(_fetch_search_page, fetcher.fork(cancel), search_term, ahead)
+                response = pending.pop(page).result()
+                metrics.SEARCH_PREFETCH.inc(outcome="used")
+            
+            if not response:
+                # Si l'approche alternative échoue aussi, passer à la page suivante
+                # (le débit adaptatif de l'hôte a déjà été réduit si le serveur est surchargé)
+                logger.warning(f"Échec des tentatives pour la page {page}, passage à la page suivante...")
+                page += 1
+                consecutive_empty_pages += 1
+                continue
+            
+            html = decode_page(response, search_url)
+            with metrics.PARSE_SECONDS.time(page="search"):
+                results = parse_search_page(html, base_url, page)
+            metrics.SEARCH_PAGES.inc(source=results.source)
+            
+            # Seuls les liens encore inconnus comptent
+            new_links = add_links(results.links) if results.links else 0
+            
+            if not new_links:
+                logger.info(f"Aucun lien trouvé sur la page {page} ({results.source})")
+                consecutive_empty_pages += 1
+            else:
+                consecutive_empty_pages = 0
+                logger.info(f"{new_links} liens trouvés sur la page {page} ({results.source})")
+            
+            if results.has_next is False:
+                logger.info("Fin de la pagination détectée")
+                more_pages = False
+            
+            if new_links:
+                total_new_links += new_links
+                if limit and total_new_links >= limit:
+                    logger.info(f"{total_new_links} liens trouvés, limite de {limit} atteinte")
+                    more_pages = False
+            elif consecutive_empty_pages >= max_empty_pages:
+                # Si 3 pages vides consécutives, arrêter
+                logger.info(f"{max_empty_pages} pages vides consécutives, fin de la pagination")
+                more_pages = False
+            page += 1
+            
+            # Le délai entre les pages vient du débit adaptatif de l'hôte (Fetcher.get)
+            # Petite chance (20%) de faire une pause plus longue pour simuler un comportement humain
+            # (les pages déjà demandées continuent d'arriver pendant la pause)
+            if more_pages and random.random() < 0.2:
+                logger.debug("Pause plus longue pour simuler une navigation humaine...")
+                fetcher.wait(random.uniform(5, 15))
+    finally:
+        if pool is not None:
+            _cancel_prefetch(pool, cancel, pending)
+    
+    return total_new_links
+
+
+def _cancel_prefetch(pool, cancel, pending):
+    """
+    Abandonne les pages préchargées au-delà de la fin: celles pas encore envoyées ne le seront pas
+    Attend les requêtes déjà parties (au plus une latence), pour ne pas laisser de threads sur la session
+    """
+    cancel.set()
+    pool.shutdown(wait=True, cancel_futures=True)
+    for future in pending.values():
+        fetched = not future.cancelled() and future.exception() is None and future.result() is not None
+        metrics.SEARCH_PREFETCH.inc(outcome="wasted" if fetched else "cancelled")
+    if pending:
+        logger.debug(f"{len(pending)} pages de recherche préchargées abandonnées")
+
+
+# --- Analyse d'une page de recherche ---
+
+@dataclass
+class SearchResults:
+    """Résultat de l'analyse d'une page de recherche"""
+    links: List[str] = field(default_factory=list)
+    # Métadonnées des cartes: slug, url, et selon la source name, city, postal_code, category
+    cards: List[dict] = field(default_factory=list)
+    # Chemin utilisé: "json" (état d'hydratation embarqué), "dom", "regex" ou "none"
+    source: str = "none"
+    # False si la page est la dernière, None si la pagination est inconnue
+    has_next: Optional[bool] = None
+
+
+_SCRIPT = re.compile(r'<script\b([^>]*)>(.*?)</script\s*>', re.S | re.I)
+_SCRIPT_ID = re.compile(r'\bid\s*=\s*["\']([^"\']+)["\']', re.I)
+_JSON_TYPE = re.compile(r'\btype\s*=\s*["\']application/json["\']', re.I)
+# État affecté en JS (`window.__NUXT__ = {...}`): seul un littéral JSON est décodable
+_STATE_ASSIGNMENT = re.compile(r'window\.(__NUXT__|__INITIAL_STATE__|__NEXT_DATA__|__APOLLO_STATE__)\s*=\s*')
+_ASSOCIATION_PATH = re.compile(r'/associations/([^/?#"\'\s]+)')
+_ASSOCIATION_HREF = re.compile(r'href=["\']/associations/([^"\'/]+)["\']')
+
+_URL_KEYS = ("url", "organizationUrl", "organization_url", "href", "link", "path")
+_SLUG_KEYS = ("organizationSlug", "organization_slug")
+_CARD_FIELDS = {
+    "name": ("name", "organizationName", "title"),
+    "city": ("city",),
+    "postal_code": ("zipCode", "postalCode", "postal_code", "zip_code"),
+    "category": ("category", "type", "organizationType"),
+}
+_TOTAL_PAGES_KEYS = ("totalPages", "total_pages", "pageCount", "nbPages", "lastPage")
+_PAGE_KEYS = ("pageIndex", "currentPage", "current_page", "page")
+
+# Types spéciaux de devalue (charge utile __NUXT_DATA__ de Nuxt 3)
+_DEVALUE_WRAPPERS = ("Reactive", "ShallowReactive", "Ref", "ShallowRef", "EmptyRef", "EmptyShallowRef")
+
+
+def _revive_devalue(values: list):
+    """
+    Reconstruit une charge utile devalue: un tableau plat où objets et listes référencent
+    leurs valeurs par indice (indices négatifs: undefined, NaN, infinis)
+    """
+    revived = {}
+
+    def hydrate(index):
+        if not isinstance(index, int) or index < 0 or index >= len(values):
+            return None
+        if index in revived:
+            return revived[index]
+        value = values[index]
+        if isinstance(value, dict):
+            result = revived[index] = {}
+            for key, child in value.items():
+                result[key] = hydrate(child)
+        elif isinstance(value, list) and value and isinstance(value[0], str):
+            kind = value[0]
+            if kind in _DEVALUE_WRAPPERS:
+                result = revived[index] = hydrate(value[1]) if len(value) > 1 else None
+            elif kind == "Set":
+                result = revived[index] = [hydrate(child) for child in value[1:]]
+            elif kind in ("Map", "null"):
+                result = revived[index] = {}
+                for key, child in zip(value[1::2], value[2::2]):
+                    result[str(hydrate(key) if kind == "Map" else key)] = hydrate(child)
+            else:
+                # Date, RegExp, BigInt, Object...: valeur brute
+                result = revived[index] = value[1] if len(value) > 1 else None
+        elif isinstance(value, list):
+            result = revived[index] = []
+            result.extend(hydrate(child) for child in value)
+        else:
+            result = revived[index] = value
+        return result
+
+    return hydrate(0)
+
+
+def _embedded_states(html: str):
+    """États d'hydratation embarqués dans la page, décodés (un json.loads par script candidat)"""
+    for match in _SCRIPT.finditer(html):
+        attributes, content = match.group(1), match.group(2)
+        script_id = _SCRIPT_ID.search(attributes)
+        script_id = script_id.group(1) if script_id else ""
+        if _JSON_TYPE.search(attributes) or script_id in ("__NEXT_DATA__", "__NUXT_DATA__"):
+            # Les scripts JSON-LD (application/ld+json) décrivent la page, pas les résultats
+            if "/associations/" not in content:
+                continue
+            try:
+                state = json.loads(content)
+            except ValueError:
+                continue
+            if script_id == "__NUXT_DATA__" or "data-nuxt-data" in attributes:
+                if isinstance(state, list) and state:
+                    state = _revive_devalue(state)
+            yield state
+            continue
+        assignment = _STATE_ASSIGNMENT.search(content)
+        if assignment and "/associations/" in content:
+            try:
+                state, _ = json.JSONDecoder().raw_decode(content, assignment.end())
+            except ValueError:
+                continue
+            yield state
+
+
+def _first(mapping: dict, keys):
+    for key in keys:
+        value = mapping.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _walk(state):
+    """Tous les objets (dict) de l'état, une seule fois chacun (références partagées ou cycliques)"""
+    stack, seen = [state], set()
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            if id(value) in seen:
+                continue
+            seen.add(id(value))
+            yield value
+            stack.extend(reversed(list(value.values())))
+        elif isinstance(value, list):
+            if id(value) in seen:
+                continue
+            seen.add(id(value))
+            stack.extend(reversed(value))
+
+
+def _cards_from_state(state, base_url: str, page: Optional[int], results: SearchResults):
+    slugs = {card["slug"] for card in results.cards}
+    for item in _walk(state):
+        slug = None
+        for key in _URL_KEYS:
+            value = item.get(key)
+            if isinstance(value, str):
+                match = _ASSOCIATION_PATH.search(value)
+                if match:
+                    slug = match.group(1)
+                    break
+        if slug is None:
+            value = _first(item, _SLUG_KEYS)
+            slug = value if isinstance(value, str) else None
+        if slug and slug not in slugs and slug != "paiement":
+            slugs.add(slug)
+            card = {"slug": slug, "url": f"{base_url}/associations/{slug}"}
+            for name, keys in _CARD_FIELDS.items():
+                value = _first(item, keys)
+                if isinstance(value, (str, int, float)):
+                    card[name] = value
+            results.cards.append(card)
+
+        total_pages = _first(item, _TOTAL_PAGES_KEYS)
+        if isinstance(total_pages, int) and results.has_next is None:
+            current = _first(item, _PAGE_KEYS)
+            current = current if isinstance(current, int) else page
+            if current is not None:
+                results.has_next = current < total_pages
+
+
+def _cards_from_dom(html: str, base_url: str, results: SearchResults):
+    """Repli: un seul passage sur les liens de la page"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    slugs = set()
+    host = urlparse(base_url).netloc
+    for a_tag in soup.find_all('a', href=True):
+        target = urlparse(urljoin(base_url, a_tag['href']))
+        match = _ASSOCIATION_PATH.match(target.path)
+        if not match or target.netloc != host or target.path.endswith('/paiement'):
+            continue
+        slug = match.group(1)
+        if slug in slugs:
+            continue
+        slugs.add(slug)
+        card = {"slug": slug, "url": f"{base_url}/associations/{slug}"}
+        name = a_tag.get_text(" ", strip=True)
+        if name:
+            card["name"] = name
+        results.cards.append(card)
+
+    pagination = soup.select('.pagination, .paging, nav[aria-label="pagination"]')
+    if pagination:
+        next_button = soup.select('.pagination__next, .next-page, [aria-label="Next"]')
+        if not next_button or 'disabled' in str(next_button):
+            results.has_next = False
+
+
+def parse_search_page(html: str, base_url: str, page: Optional[int] = None) -> SearchResults:
+    """
+    Extrait les associations d'une page de recherche, sans requête
+    Chemin préféré: l'état d'hydratation embarqué (__NUXT_DATA__, __NEXT_DATA__, scripts application/json,
+    window.__NUXT__ = {...}), lu en un seul décodage JSON, sans construire le DOM.
+    Replis: un passage sur les liens du DOM, puis une regex sur le HTML brut.
+    """
+    results = SearchResults()
+    for state in _embedded_states(html):
+        _cards_from_state(state, base_url, page, results)
+    if results.cards:
+        results.source = "json"
+    else:
+        _cards_from_dom(html, base_url, results)
+        if results.cards:
+            results.source = "dom"
+        elif len(html) > 5000:  # Page non vide: peut-être un changement de format
+            for slug in dict.fromkeys(_ASSOCIATION_HREF.findall(html)):
+                if slug != "paiement":
+                    results.cards.append({"slug": slug, "url": f"{base_url}/associations/{slug}"})
+            if results.cards:
+                results.source = "regex"
+    results.links = [card["url"] for card in results.cards]
+    return results
@@ -0,0 +1,322 @@
+"""
+Découverte des associations par les sitemaps XML du site, alternative à la pagination de la recherche
+- les sitemaps (index et sitemaps d'URLs, compressés gzip ou non) sont téléchargés en flux (stream=True)
+  et donnés par tranches, décompressées à la volée, à un parseur XML incrémental: ni le corps ni l'arbre
+  ne sont gardés en mémoire, seulement une tranche et l'élément <url> en cours, même pour 50 000 URLs
+  (les entrées d'un index de sitemaps, quelques dizaines, sont gardées jusqu'à la fin de sa lecture)
+- le terme de recherche est appliqué localement aux slugs des URLs /associations/<slug>
+- avec un LastmodIndex, seules les pages nouvelles ou modifiées (<lastmod>) depuis le dernier scraping
+  sont retournées, et les sitemaps inchangés depuis le dernier passage ne sont pas retéléchargés
+Toutes les requêtes passent par le Fetcher (débit adaptatif, disjoncteur, nouvelles tentatives).
+"""
+import re
+import time
+import zlib
+import sqlite3
+import logging
+import datetime
+import threading
+import unicodedata
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+from xml.etree.ElementTree import XMLPullParser, ParseError
+
+from . import metrics
+from .transport import iter_body
+
+logger = logging.getLogger(__name__)
+
+# Taille des tranches données au parseur XML (octets décompressés)
+CHUNK_SIZE = 64 * 1024
+_GZIP_MAGIC = b"\x1f\x8b"
+_ASSOCIATION_PATH = re.compile(r'^/associations/([^/?#]+)/?$')
+
+
+@dataclass
+class SitemapEntry:
+    """Une entrée <url> (ou <sitemap> d'un index): adresse et date de dernière modification (timestamp)"""
+    loc: str
+    lastmod: Optional[float] = None
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[float]:
+    """Date W3C d'un <lastmod> (2024-05-01, 2024-05-01T10:00:00+02:00...) en timestamp, None si invalide"""
+    if not value:
+        return None
+    try:
+        moment = datetime.datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=datetime.timezone.utc)
+    return moment.timestamp()
+
+
+def _chunks(stream: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Tranches du corps d'un sitemap, décompressées à la volée s'il est gzippé (fichiers .xml.gz servis tels quels)
+    Une tranche décompressée ne dépasse jamais CHUNK_SIZE octets, quel que soit le taux de compression
+    """
+    gzipped = None
+    head = b""
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for chunk in stream:
+        if gzipped is None:
+            head += chunk
+            if len(head) < len(_GZIP_MAGIC):
+                continue
+            gzipped = head.startswith(_GZIP_MAGIC)
+            chunk, head = head, b""
+        if not gzipped:
+            yield chunk
+            continue
+        data = decompressor.decompress(chunk, CHUNK_SIZE)
+        while data:
+            yield data
+            data = decompressor.decompress(decompressor.unconsumed_tail, CHUNK_SIZE)
+    if head:
+        yield head
+    elif gzipped:
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+
+
+def _parse_elements(stream: Iterable[bytes]) -> Iterator[Tuple[str, SitemapEntry]]:
+    """
+    Éléments ("url" ou "sitemap") d'un sitemap donné par tranches, au fil du parsing
+    Chaque élément est retiré de l'arbre dès qu'il est lu
+    """
+    parser = XMLPullParser(events=("start", "end"))
+    root = None
+    for chunk in _chunks(stream):
+        parser.feed(chunk)
+        for event, element in parser.read_events():
+            if event == "start":
+                if root is None:
+                    root = element
+                continue
+            kind = element.tag.rsplit("}", 1)[-1]
+            if kind not in ("url", "sitemap"):
+                continue
+            loc = lastmod = None
+            for child in element:
+                name = child.tag.rsplit("}", 1)[-1]
+                if name == "loc":
+                    loc = (child.text or "").strip()
+                elif name == "lastmod":
+                    lastmod = parse_lastmod(child.text)
+            if root is not None and element is not root:
+                root.remove(element)
+            if loc:
+                yield kind, SitemapEntry(loc, lastmod)
+    parser.close()
+
+
+def parse_sitemap(body: Union[bytes, Iterable[bytes]]) -> Iterator[SitemapEntry]:
+    """Entrées d'un sitemap (<urlset>) ou d'un index de sitemaps (<sitemapindex>), corps entier ou par tranches"""
+    chunks = body
+    if isinstance(body, bytes):
+        chunks = (body[start:start + CHUNK_SIZE] for start in range(0, len(body), CHUNK_SIZE))
+    for _, entry in _parse_elements(chunks):
+        yield entry
+
+
+def _normalize(text: str) -> str:
+    """Forme comparable à un slug: minuscules, sans accents, mots séparés par des tirets"""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+    return re.sub(r"[^a-z0-9]+", "-", text).strip("-")
+
+
+def slug_matches(slug: str, search_term: Optional[str]) -> bool:
+    """Le slug contient-il chaque mot du terme (mot entier entre tirets)? Un terme vide ou '*' accepte tout"""
+    if not search_term or search_term.strip() == "*":
+        return True
+    words = _normalize(search_term).split("-")
+    padded = f"-{_normalize(slug)}-"
+    return all(f"-{word}-" in padded for word in words if word)
+
+
+class LastmodIndex:
+    """
+    Dates de dernière modification vues dans les sitemaps et dates des versions scrapées, par URL (SQLite)
+    Une page est à (re)scraper si elle n'a jamais été scrapée ou si son <lastmod> est plus récent
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY, slug TEXT NOT NULL, lastmod REAL, scraped_lastmod REAL, scraped_at REAL);
+            CREATE TABLE IF NOT EXISTS sitemaps (loc TEXT PRIMARY KEY, lastmod REAL, read_at REAL);
+        """)
+
+    def sitemap_unchanged(self, entry: SitemapEntry) -> bool:
+        """Le sitemap `entry` (d'un index) a-t-il déjà été lu dans sa version actuelle?"""
+        if entry.lastmod is None:
+            return False
+        with self._lock:
+            row = self._conn.execute("SELECT lastmod FROM sitemaps WHERE loc = ?", (entry.loc,)).fetchone()
+        return bool(row and row[0] is not None and row[0] >= entry.lastmod)
+
+    def sitemap_read(self, entry: SitemapEntry):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO sitemaps (loc, lastmod, read_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(loc) DO UPDATE SET lastmod = excluded.lastmod, read_at = excluded.read_at",
+                (entry.loc, entry.lastmod, time.time()))
+
+    def record(self, entries: List[SitemapEntry], slugs: List[str]):
+        """Enregistre les <lastmod> d'un lot d'URLs d'associations"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO pages (url, slug, lastmod) VALUES (?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET lastmod = COALESCE(excluded.lastmod, pages.lastmod)",
+                [(entry.loc, slug, entry.lastmod) for entry, slug in zip(entries, slugs)])
+
+    def stale(self, search_term: Optional[str] = None) -> Iterator[str]:
+        """URLs jamais scrapées ou modifiées depuis leur dernier scraping, dont le slug correspond au terme"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, slug FROM pages WHERE scraped_at IS NULL "
+                "OR (lastmod IS NOT NULL AND (scraped_lastmod IS NULL OR lastmod > scraped_lastmod)) "
+                "ORDER BY url").fetchall()
+        return (url for url, slug in rows if slug_matches(slug, search_term))
+
+    def mark_scraped(self, url: str):
+        """La version actuelle de `url` vient d'être scrapée"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE pages SET scraped_lastmod = lastmod, scraped_at = ? WHERE url = ?", (time.time(), url))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def iter_sitemap_entries(fetcher, sitemap_url: str, index: Optional[LastmodIndex] = None,
+                         read: Optional[List[SitemapEntry]] = None, depth: int = 0) -> Iterator[SitemapEntry]:
+    """
+    Entrées <url> de `sitemap_url`, en suivant les index de sitemaps
+    Dans un index, seuls les sitemaps d'associations sont suivis s'il y en a, et ceux dont le <lastmod>
+    n'a pas changé depuis le dernier passage (`index`) sont ignorés; les sitemaps lus en entier sont
+    ajoutés à `read`
+    """
+    import requests
+
+    # Corps lu en flux: la connexion est libérée à la fin de la lecture, ou dès que l'appelant s'arrête
+    response = fetcher.get(sitemap_url, stream=True)
+    if not response:
+        logger.warning(f"Sitemap inaccessible: {sitemap_url}")
+        return
+    children = []
+    counted = False
+    try:
+        for kind, entry in _parse_elements(iter_body(response, CHUNK_SIZE)):
+            if not counted:
+                metrics.SITEMAP_FETCHES.inc(kind="index" if kind == "sitemap" else "urlset")
+                counted = True
+            if kind == "url":
+                yield entry
+            else:
+                children.append(entry)
+    except (ParseError, requests.RequestException) as e:
+        logger.warning(f"Sitemap illisible ({sitemap_url}): {e}")
+        return
+    finally:
+        response.close()
+    if not counted:
+        metrics.SITEMAP_FETCHES.inc(kind="urlset")
+    if children and depth >= 3:
+        logger.warning(f"Index de sitemaps trop imbriqué, ignoré: {sitemap_url}")
+        return
+
+    relevant = [child for child in children if "association" in child.loc.lower()]
+    for child in relevant or children:
+        if index is not None and index.sitemap_unchanged(child):
+            logger.info(f"Sitemap inchangé depuis le dernier passage, ignoré: {child.loc}")
+            metrics.SITEMAP_FETCHES.inc(kind="skipped")
+            continue
+        yield from iter_sitemap_entries(fetcher, child.loc, index, read, depth + 1)
+        if read is not None:
+            read.append(child)
+
+
+def crawl_sitemap_links(fetcher, search_term, add_links, limit=None, index: Optional[LastmodIndex] = None,
+                        batch_size: int = 500):
+    """
+    Parcourt les sitemaps de fetcher.config.sitemap_url et transmet à `add_links` (par lots) les URLs
+    d'associations dont le slug correspond à `search_term`; même contrat que crawl_association_links
+    Avec `index`, seules les pages nouvelles ou modifiées depuis leur dernier scraping sont transmises
+    Retourne le nombre total de nouveaux liens
+    """
+    logger.info(f"Découverte des associations par les sitemaps ({fetcher.config.sitemap_url}), terme '{search_term}'...")
+    total_new_links = 0
+    seen = 0
+    batch, slugs = [], []
+
+    def flush():
+        nonlocal total_new_links
+        if index is not None:
+            index.record(batch, slugs)
+        else:
+            matching = [entry.loc for entry, slug in zip(batch, slugs) if slug_matches(slug, search_term)]
+            if matching:
+                total_new_links += add_links(matching)
+        batch.clear()
+        slugs.clear()
+
+    host = urlparse(fetcher.config.base_url).netloc
+    read_sitemaps = []
+    for entry in iter_sitemap_entries(fetcher, fetcher.config.sitemap_url, index, read_sitemaps):
+        parsed = urlparse(entry.loc)
+        match = _ASSOCIATION_PATH.match(parsed.path)
+        if not match or (parsed.netloc and parsed.netloc != host):
+            continue
+        seen += 1
+        batch.append(SitemapEntry(f"{fetcher.config.base_url}/associations/{match.group(1)}", entry.lastmod))
+        slugs.append(match.group(1))
+        if len(batch) >= batch_size:
+            flush()
+            if limit and total_new_links >= limit:
+                break
+    if batch:
+        flush()
+
+    if index is not None:
+        # Sitemaps marqués lus une fois leurs entrées enregistrées: un passage interrompu les relira
+        for sitemap in read_sitemaps:
+            index.sitemap_read(sitemap)
+        # L'index fait foi: pages modifiées, et pages découvertes lors d'un passage interrompu avant leur scraping
+        links = []
+        for url in index.stale(search_term):
+            links.append(url)
+            if len(links) >= batch_size:
+                total_new_links += add_links(links)
+                links = []
+            if limit and total_new_links >= limit:
+                break
+        if links:
+            total_new_links += add_links(links)
+
+    logger.info(f"{seen} associations dans les sitemaps, {total_new_links} nouveaux liens à traiter")
+    return total_new_links
+
+
+def get_sitemap_association_links(fetcher, search_term, limit=None, index: Optional[LastmodIndex] = None):
+    """Liens d'associations découverts par les sitemaps (au plus `limit`), comme get_all_association_links"""
+    all_links = []
+    known = set()
+
+    def add_links(links):
+        new_links = [link for link in links if link not in known]
+        known.update(new_links)
+        all_links.extend(new_links)
+        return len(new_links)
+
+    crawl_sitemap_links(fetcher, search_term, add_links, limit, index)
+    return all_links[:limit] if limit else all_links
@@ -0,0 +1,176 @@
+"""
+Transports HTTP du moteur
+- HTTP/1.1 (défaut): session requests instrumentée, une par Fetcher
+- HTTP/2 (optionnel, EngineConfig.http2 / HTTP2=true): pool de connexions httpx partagé par tous les Fetcher
+  du processus; les requêtes des jobs concurrents vers un même hôte sont multiplexées sur une seule connexion,
+  dans le même budget de débit (pacing) que le transport HTTP/1.1. Chaque Fetcher garde son client,
+  donc ses propres cookies: les jobs concurrents n'écrasent pas ceux des autres
+
+Le client HTTP/2 expose la même interface que requests (get(), y compris stream=True et iter_content(),
+cookies, close()) et convertit ses erreurs en exceptions requests: le reste du moteur ne dépend pas du transport.
+Nécessite `pip install "httpx[http2]"`; sinon le moteur reste en HTTP/1.1.
+
+Chaque transport n'annonce (Accept-Encoding) que les compressions qu'il sait décoder: br et zstd
+seulement si leurs décodeurs natifs sont installés (brotli, zstd), faute de quoi le serveur pourrait
+renvoyer un corps illisible.
+"""
+import time
+import logging
+import threading
+import importlib.util
+from typing import Dict, Iterator, Optional, Tuple
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+try:
+    import httpx
+    # httpx n'active HTTP/2 que si h2 est installé
+    HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def _installed(*modules) -> bool:
+    for module in modules:
+        try:
+            if importlib.util.find_spec(module) is not None:
+                return True
+        except ImportError:  # paquet parent absent (backports)
+            pass
+    return False
+
+
+def supported_encodings(session=None) -> Tuple[str, ...]:
+    """Content-Encoding que le transport de `session` sait décoder (requests par défaut)"""
+    if isinstance(session, Http2Session):
+        return session.encodings
+    # urllib3 détecte lui-même ses décodeurs brotli (brotli, brotlicffi) et zstd (compression.zstd, backports.zstd)
+    from urllib3.util.request import ACCEPT_ENCODING
+    return tuple(ACCEPT_ENCODING.split(","))
+
+
+def iter_body(response, chunk_size: int) -> Iterator[bytes]:
+    """
+    Corps d'une réponse demandée avec stream=True, par tranches décodées (Content-Encoding)
+    Les octets reçus et décodés sont comptés une fois le corps lu en entier
+    """
+    decoded = 0
+    for chunk in response.iter_content(chunk_size):
+        decoded += len(chunk)
+        yield chunk
+    raw = getattr(response, "raw", None)
+    # tell(): octets lus sur la connexion, avant décompression
+    metrics.count_http_bytes(raw.tell() if raw is not None else decoded, decoded, response.headers.get("Content-Encoding"))
+
+
+class Http2StreamedResponse:
+    """Réponse httpx lue en flux, avec l'interface de requests utilisée par le moteur"""
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+
+    @property
+    def raw(self):
+        # Compteur d'octets reçus, comme urllib3.HTTPResponse.tell() pour requests
+        return self
+
+    def tell(self) -> int:
+        return self._response.num_bytes_downloaded
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        import requests
+
+        try:
+            yield from self._response.iter_bytes(chunk_size)
+        except httpx.HTTPError as e:
+            metrics.HTTP_ERRORS.inc(error=type(e).__name__)
+            raise requests.ConnectionError(str(e)) from e
+
+    def close(self):
+        self._response.close()
+
+
+class Http2Session:
+    """
+    Client httpx (HTTP/2) avec l'interface de requests.Session utilisée par le Fetcher
+    `transport` (pool de connexions) peut être partagé entre sessions; les cookies restent propres à chacune
+    """
+
+    def __init__(self, transport):
+        self.client = httpx.Client(transport=transport, event_hooks={"response": [self._count_response]})
+        self.cookies = self.client.cookies
+        # Décodeurs de httpx: brotli/brotlicffi pour br, zstandard pour zstd
+        self.encodings = ("gzip", "deflate") + (("br",) if _installed("brotli", "brotlicffi") else ()) \
+            + (("zstd",) if _installed("zstandard") else ())
+
+    @staticmethod
+    def _count_response(response):
+        metrics.HTTP_RESPONSES.inc(status=response.status_code)
+
+    def get(self, url, params=None, headers=None, timeout=None, allow_redirects=True, stream=False):
+        import requests
+
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            timeout = httpx.Timeout(read, connect=connect)
+        # En-têtes de connexion propres à HTTP/1.1, interdits en HTTP/2
+        headers = {name: value for name, value in (headers or {}).items()
+                   if name.lower() not in ("connection", "upgrade-insecure-requests", "keep-alive")}
+        start = time.perf_counter()
+        try:
+            request = self.client.build_request("GET", url, params=params, headers=headers, timeout=timeout)
+            response = self.client.send(request, stream=stream, follow_redirects=allow_redirects)
+        except httpx.TimeoutException as e:
+            metrics.HTTP_ERRORS.inc(error=type(e).__name__)
+            raise requests.Timeout(str(e)) from e
+        except httpx.HTTPError as e:
+            metrics.HTTP_ERRORS.inc(error=type(e).__name__)
+            raise requests.ConnectionError(str(e)) from e
+        metrics.HTTP_PHASE_SECONDS.observe(time.perf_counter() - start, phase="request")
+        if stream:
+            return Http2StreamedResponse(response)
+        metrics.count_http_bytes(response.num_bytes_downloaded, len(response.content), response.headers.get("Content-Encoding"))
+        return response
+
+    def close(self):
+        # Pool de connexions partagé: fermé avec le processus; seuls les cookies de la session disparaissent
+        self.cookies.clear()
+
+
+_http2_transports: Dict[bool, "httpx.HTTPTransport"] = {}
+_http2_lock = threading.Lock()
+
+
+def http2_session(prior_knowledge: bool = False) -> Optional[Http2Session]:
+    """
+    Nouvelle session HTTP/2 sur le pool de connexions partagé du processus
+    (None si httpx[http2] n'est pas installé)
+    """
+    if not HTTP2_AVAILABLE:
+        return None
+    with _http2_lock:
+        transport = _http2_transports.get(prior_knowledge)
+        if transport is None:
+            # prior_knowledge: HTTP/2 en clair (h2c) sans négociation, pour les URLs http:// (serveur de rejeu)
+            transport = _http2_transports[prior_knowledge] = httpx.HTTPTransport(
+                http1=not prior_knowledge,
+                http2=True,
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=10),
+            )
+    return Http2Session(transport)
+
+
+def open_session(config):
+    """Session du transport choisi par `config` (HTTP/2 si demandé et disponible, sinon requests)"""
+    if config.http2:
+        session = http2_session(config.http2_prior_knowledge)
+        if session is not None:
+            return session
+        logger.warning("HTTP/2 demandé mais httpx[http2] n'est pas installé: utilisation de HTTP/1.1")
+    import requests
+    return metrics.instrument_session(requests.Session())
@@ -0,0 +1,367 @@
+"""
+Rapport HTML des résultats, écrit en streaming
+Les lignes ne sont plus insérées une à une dans un <table>: elles sont écrites en JSON compact
+dans une balise <script type="application/json">, ligne par ligne, puis affichées côté navigateur
+par une table virtualisée (seules les lignes visibles existent dans le DOM), avec tri par colonne,
+recherche et navigation par page. Le document n'est jamais construit entièrement en mémoire.
+"""
+import json
+import html
+import datetime
+from typing import Iterable, List, Optional
+
+from columnar import COLUMN_TYPES, clean_value
+from result_stats import ResultStats
+
+# Colonnes triées numériquement côté navigateur
+NUMERIC_KINDS = ('int32', 'float64')
+
+REPORT_CSS = """
+        * { margin: 0; padding: 0; box-sizing: border-box; }
+        body {
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            padding: 20px;
+        }
+        .container {
+            max-width: 1400px;
+            margin: 0 auto;
+            background: white;
+            border-radius: 20px;
+            box-shadow: 0 20px 60px rgba(0,0,0,0.3);
+            overflow: hidden;
+        }
+        header {
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: white;
+            padding: 40px;
+            text-align: center;
+        }
+        header h1 { font-size: 2.5em; margin-bottom: 10px; }
+        .stats {
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+            gap: 20px;
+            padding: 30px 40px;
+            background: #f8f9fa;
+        }
+        .stat-card {
+            background: white;
+            padding: 20px;
+            border-radius: 10px;
+            text-align: center;
+            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+        }
+        .stat-card .number { font-size: 2.5em; color: #667eea; font-weight: bold; }
+        .stat-card .label { color: #666; margin-top: 10px; }
+        .toolbar {
+            display: flex;
+            gap: 15px;
+            align-items: center;
+            padding: 20px 40px 0;
+        }
+        .toolbar input {
+            flex: 1;
+            padding: 10px 15px;
+            border: 1px solid #e0e0e0;
+            border-radius: 8px;
+            font-size: 1em;
+        }
+        .toolbar button {
+            padding: 10px 15px;
+            border: none;
+            border-radius: 8px;
+            background: #667eea;
+            color: white;
+            cursor: pointer;
+        }
+        .toolbar span { color: #666; white-space: nowrap; }
+        .table-container { margin: 20px 40px 40px; height: 70vh; overflow: auto; }
+        table {
+            width: 100%;
+            border-collapse: collapse;
+        }
+        th, td {
+            padding: 0 15px;
+            height: 44px;
+            text-align: left;
+            border-bottom: 1px solid #e0e0e0;
+            white-space: nowrap;
+            overflow: hidden;
+            text-overflow: ellipsis;
+            max-width: 320px;
+        }
+        th {
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: white;
+            font-weight: 600;
+            position: sticky;
+            top: 0;
+            cursor: pointer;
+            user-select: none;
+        }
+        th.asc::after { content: " ▲"; }
+        th.desc::after { content: " ▼"; }
+        tr.spacer td { padding: 0; border: none; }
+        tbody tr:not(.spacer):hover { background: #f8f9fa; }
+        a { color: #667eea; text-decoration: none; }
+        a:hover { text-decoration: underline; }
+        footer {
+            background: #2c3e50;
+            color: white;
+            text-align: center;
+            padding: 20px;
+        }
+"""
+
+# Table virtualisée: hauteur de ligne fixe, seules les lignes visibles (+ marge) sont dans le DOM
+REPORT_SCRIPT = """
+    <script>
+    (function () {
+        const data = JSON.parse(document.getElementById('report-data').textContent);
+        const columns = data.columns;
+        const ROW_HEIGHT = 44;
+        const OVERSCAN = 10;
+        const viewport = document.getElementById('table-viewport');
+        const head = document.getElementById('table-head');
+        const body = document.getElementById('table-body');
+        const info = document.getElementById('table-info');
+        const search = document.getElementById('table-search');
+        const collator = new Intl.Collator('fr', { numeric: true, sensitivity: 'base' });
+
+        let filtered = data.rows.map((row, index) => index);
+        let view = filtered;
+        let sortColumn = -1;
+        let sortAscending = true;
+        let haystack = null;
+        let pending = false;
+
+        function isMissing(value) {
+            return value === null || value === '';
+        }
+
+        function makeCell(column, value) {
+            const td = document.createElement('td');
+            if (isMissing(value)) {
+                td.textContent = '-';
+                return td;
+            }
+            const text = String(value);
+            td.title = text;
+            let href = null;
+            if (column.key === 'email') href = 'mailto:' + text;
+            else if (column.key === 'phone') href = 'tel:' + text;
+            else if (column.key === 'url' && /^https?:\\/\\//.test(text)) href = text;
+            if (href) {
+                const link = document.createElement('a');
+                link.href = href;
+                if (column.key === 'url') link.target = '_blank';
+                link.textContent = text;
+                td.appendChild(link);
+            } else {
+                td.textContent = text;
+            }
+            return td;
+        }
+
+        function spacer(height) {
+            const tr = document.createElement('tr');
+            tr.className = 'spacer';
+            const td = document.createElement('td');
+            td.colSpan = columns.length;
+            td.style.height = height + 'px';
+            tr.appendChild(td);
+            return tr;
+        }
+
+        function render() {
+            pending = false;
+            const firstVisible = Math.floor(viewport.scrollTop / ROW_HEIGHT);
+            const visibleCount = Math.ceil(viewport.clientHeight / ROW_HEIGHT);
+            const first = Math.max(0, firstVisible - OVERSCAN);
+            const last = Math.min(view.length, firstVisible + visibleCount + OVERSCAN);
+
+            const fragment = document.createDocumentFragment();
+            fragment.appendChild(spacer(first * ROW_HEIGHT));
+            for (let i = first; i < last; i++) {
+                const row = data.rows[view[i]];
+                const tr = document.createElement('tr');
+                columns.forEach((column, c) => tr.appendChild(makeCell(column, row[c])));
+                fragment.appendChild(tr);
+            }
+            fragment.appendChild(spacer((view.length - last) * ROW_HEIGHT));
+            body.replaceChildren(fragment);
+
+            info.textContent = view.length
+                ? 'Lignes ' + (Math.min(firstVisible, view.length - 1) + 1) + '–'
+                  + Math.min(view.length, firstVisible + visibleCount) + ' sur ' + view.length
+                : 'Aucun résultat';
+        }
+
+        function scheduleRender() {
+            if (!pending) {
+                pending = true;
+                requestAnimationFrame(render);
+            }
+        }
+
+        function applySort() {
+            view = filtered.slice();
+            if (sortColumn >= 0) {
+                const c = sortColumn;
+                const numeric = columns[c].numeric;
+                view.sort((a, b) => {
+                    const x = data.rows[a][c];
+                    const y = data.rows[b][c];
+                    // Valeurs absentes toujours en fin de liste
+                    if (isMissing(x) || isMissing(y)) return isMissing(x) === isMissing(y) ? 0 : isMissing(x) ? 1 : -1;
+                    const order = numeric ? x - y : collator.compare(String(x), String(y));
+                    return sortAscending ? order : -order;
+                });
+            }
+            head.querySelectorAll('th').forEach((th, c) => {
+                th.className = c === sortColumn ? (sortAscending ? 'asc' : 'desc') : '';
+            });
+            viewport.scrollTop = 0;
+            render();
+        }
+
+        function applyFilter() {
+            const query = search.value.trim().toLowerCase();
+            if (!query) {
+                filtered = data.rows.map((row, index) => index);
+            } else {
+                haystack = haystack || data.rows.map(row => row.join(' ').toLowerCase());
+                filtered = [];
+                haystack.forEach((text, index) => {
+                    if (text.includes(query)) filtered.push(index);
+                });
+            }
+            applySort();
+        }
+
+        columns.forEach((column, c) => {
+            const th = document.createElement('th');
+            th.textContent = column.label;
+            th.addEventListener('click', () => {
+                sortAscending = sortColumn === c ? !sortAscending : true;
+                sortColumn = c;
+                applySort();
+            });
+            head.appendChild(th);
+        });
+
+        let searchTimer = null;
+        search.addEventListener('input', () => {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(applyFilter, 150);
+        });
+        document.getElementById('page-previous').addEventListener('click', () => {
+            viewport.scrollTop -= viewport.clientHeight - ROW_HEIGHT;
+        });
+        document.getElementById('page-next').addEventListener('click', () => {
+            viewport.scrollTop += viewport.clientHeight - ROW_HEIGHT;
+        });
+        viewport.addEventListener('scroll', scheduleRender);
+        window.addEventListener('resize', scheduleRender);
+        render();
+    })();
+    </script>
+"""
+
+
+def json_for_script(value) -> str:
+    """JSON compact utilisable dans une balise <script> (pas de '</' qui fermerait la balise)"""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+
+
+def write_results_report(
+    path: str,
+    records: Iterable[dict],
+    fields: List[str],
+    search_term: str,
+    stats: Optional[ResultStats] = None,
+    generated_at: Optional[datetime.datetime] = None
+) -> int:
+    """
+    Écrit le rapport HTML des résultats dans `path`, enregistrement par enregistrement
+    `records` peut être un itérateur; les cartes de synthèse viennent de `stats` (déjà à jour)
+    Retourne le nombre de lignes écrites
+    """
+    generated_at = generated_at or datetime.datetime.now()
+    title = html.escape(search_term)
+    columns = [
+        {
+            "key": field,
+            "label": field.replace('_', ' ').title(),
+            "numeric": COLUMN_TYPES.get(field) in NUMERIC_KINDS,
+        }
+        for field in fields
+    ]
+
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"""<!DOCTYPE html>
+<html lang="fr">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Résultats - {title}</title>
+    <style>{REPORT_CSS}    </style>
+</head>
+<body>
+    <div class="container">
+        <header>
+            <h1>🎯 Résultats HelloAsso</h1>
+            <p>Recherche: <strong>{title}</strong></p>
+            <p>Date: {generated_at.strftime("%d/%m/%Y %H:%M")}</p>
+        </header>
+""")
+        if stats is not None:
+            cards = [
+                (stats.total, "Associations"),
+                (stats.field_counts['email'], "Avec Email"),
+                (stats.field_counts['phone'], "Avec Téléphone"),
+                (len(stats.city_counts), "Villes"),
+            ]
+            f.write('\n        <div class="stats">\n')
+            for number, label in cards:
+                f.write(f"""            <div class="stat-card">
+                <div class="number">{number}</div>
+                <div class="label">{label}</div>
+            </div>
+""")
+            f.write('        </div>\n')
+
+        f.write("""
+        <div class="toolbar">
+            <input id="table-search" type="search" placeholder="Rechercher (nom, ville, email...)">
+            <button id="page-previous" type="button">◀ Page précédente</button>
+            <button id="page-next" type="button">Page suivante ▶</button>
+            <span id="table-info"></span>
+        </div>
+
+        <div class="table-container" id="table-viewport">
+            <table>
+                <thead><tr id="table-head"></tr></thead>
+                <tbody id="table-body"></tbody>
+            </table>
+        </div>
+
+        <footer>
+            <p>Généré par HelloAsso Scraper WebApp</p>
+            <p>⚠️ Fichier temporaire - Téléchargez maintenant!</p>
+        </footer>
+    </div>
+""")
+        # Données: une ligne JSON par enregistrement, valeurs typées (null pour les valeurs absentes)
+        f.write('    <script type="application/json" id="report-data">')
+        f.write(f'{{"columns":{json_for_script(columns)},"rows":[')
+        for record in records:
+            row = [clean_value(field, record.get(field)) for field in fields]
+            f.write(("," if count else "") + "\n" + json_for_script(row))
+            count += 1
+        f.write("\n]}</script>\n")
+        f.write(REPORT_SCRIPT)
+        f.write("</body>\n</html>\n")
+    return count
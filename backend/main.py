@@ -1,15 +1,22 @@
-from fastapi import FastAPI, BackgroundTasks, HTTPException
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from pydantic import BaseModel, HttpUrl
 from typing import Optional, Dict, List
 import os
 import json
 import asyncio
 import uuid
+import hashlib
+import csv
+import io
+import itertools
 from datetime import datetime
-import glob
-from scraper_wrapper import ScraperWrapper
+from scraper_wrapper import ScraperWrapper, RESULT_FIELDS
+from file_index import FileIndex, encode_cursor, decode_position_cursor
+import downloads
+from frontier import open_frontier
+from helloscraper import metrics
 from collections import deque
 
 app = FastAPI(title="HelloAsso Scraper API")
@@ -21,18 +28,42 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 # Stockage en mémoire des jobs (en production, utiliser Redis ou une DB)
 jobs: Dict[str, dict] = {}
 
+# Ordre de création des jobs (pour la pagination de /api/jobs)
+job_order: List[str] = []
+
 # Stockage des logs pour chaque job (max 1000 lignes par job)
 job_logs: Dict[str, deque] = {}
 
+# Associations scrapées pour chaque job en cours; retirées à la fin du job (relues ensuite depuis son CSV)
+job_results: Dict[str, List[dict]] = {}
+
 # Dossier pour stocker les résultats
 RESULTS_DIR = "results"
 os.makedirs(RESULTS_DIR, exist_ok=True)
 
+# Index des fichiers de résultats (scan unique au démarrage, puis mis à jour à l'écriture/suppression)
+file_index = FileIndex(RESULTS_DIR, ignore_suffixes=downloads.VARIANT_SUFFIXES)
+file_index.refresh()
+
+# Frontière partagée optionnelle (sqlite:///... ou redis://...) pour répartir les jobs sur plusieurs workers
+FRONTIER_URL = os.getenv("FRONTIER_URL")
+frontier = open_frontier(FRONTIER_URL) if FRONTIER_URL else None
+
+# Taille de page maximale pour les listings
+MAX_PAGE_SIZE = 500
+
+# Durée maximale d'attente en long-polling (secondes)
+MAX_WAIT_SECONDS = 60
+
+# Notifié à chaque changement d'état d'un job ou de l'index des fichiers
+state_changed = asyncio.Condition()
+
 class ScrapeRequest(BaseModel):
     url: HttpUrl
     date_debut: Optional[str] = None
@@ -53,6 +84,7 @@ class JobStatusResponse(BaseModel):
     error: Optional[str] = None
     created_at: str
     completed_at: Optional[str] = None
+    version: int = 0
 
 @app.get("/")
 async def root():
@@ -62,9 +94,12 @@ async def root():
         "endpoints": {
             "POST /api/scrape": "Launch a new scraping job",
             "GET /api/status/{job_id}": "Get job status",
-            "GET /api/files": "List all result files",
+            "GET /api/jobs/{job_id}/results": "Stream job results (NDJSON or CSV) while the job runs",
+            "GET /api/files": "List result files (paginated)",
+            "GET /api/jobs": "List jobs (paginated, filterable)",
             "GET /api/download/{filename}": "Download a result file",
-            "DELETE /api/files/{filename}": "Delete a result file"
+            "DELETE /api/files/{filename}": "Delete a result file",
+            "GET /metrics": "Prometheus metrics (per-stage timings, HTTP statuses, retries, cache hits)"
         }
     }
 
@@ -72,6 +107,11 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Métriques au format d'exposition texte Prometheus"""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 def add_log(job_id: str, message: str, level: str = "info"):
     """Ajoute un log pour un job"""
     if job_id not in job_logs:
@@ -85,11 +125,51 @@ def add_log(job_id: str, message: str, level: str = "info"):
     }
     job_logs[job_id].append(log_entry)
 
+async def notify_state_changed():
+    """Réveille les requêtes en long-polling"""
+    async with state_changed:
+        state_changed.notify_all()
+
+async def update_job(job_id: str, **fields):
+    """Met à jour un job, incrémente sa version et notifie les clients en attente"""
+    jobs[job_id].update(fields)
+    jobs[job_id]["version"] = jobs[job_id].get("version", 0) + 1
+    await notify_state_changed()
+
+def make_etag(*parts) -> str:
+    """Construit un ETag fort à partir des éléments qui déterminent la réponse"""
+    digest = hashlib.sha1(json.dumps(parts, default=str).encode("utf-8")).hexdigest()[:16]
+    return f'"{digest}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Vérifie l'en-tête If-None-Match"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [c.strip().removeprefix("W/") for c in if_none_match.split(",")]
+    return etag in candidates or "*" in candidates
+
+async def wait_for_change(compute_etag, etag: str, wait: float) -> str:
+    """Attend (au plus `wait` secondes) que l'ETag courant diffère de celui du client"""
+    if wait > 0:
+        try:
+            async with state_changed:
+                await asyncio.wait_for(
+                    state_changed.wait_for(lambda: compute_etag() != etag),
+                    timeout=wait
+                )
+        except asyncio.TimeoutError:
+            pass
+    return compute_etag()
+
+def not_modified(etag: str) -> Response:
+    metrics.CACHE_HITS.inc(cache="etag")
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
 async def run_scraper(job_id: str, url: str, date_debut: Optional[str], date_fin: Optional[str], search_term: str, max_results: int):
     """Fonction qui exécute le scraper en arrière-plan"""
     try:
-        jobs[job_id]["status"] = "running"
-        jobs[job_id]["progress"] = "Initialisation du scraper..."
+        await update_job(job_id, status="running", progress="Initialisation du scraper...")
         add_log(job_id, "🚀 Démarrage du scraping...", "info")
         add_log(job_id, f"🔍 Recherche: {search_term or url}", "info")
         add_log(job_id, f"📊 Maximum: {max_results} résultats", "info")
@@ -103,24 +183,46 @@ async def run_scraper(job_id: str, url: str, date_debut: Optional[str], date_fin
             job_id=job_id,
             results_dir=RESULTS_DIR,
             max_results=max_results,
-            log_callback=lambda msg, lvl="info": add_log(job_id, msg, lvl)
+            log_callback=lambda msg, lvl="info": add_log(job_id, msg, lvl),
+            record_callback=job_results.setdefault(job_id, []).append,
+            frontier=frontier
         )
 
         # Exécuter le scraping
         result_files = await scraper.run()
-
-        jobs[job_id]["status"] = "completed"
-        jobs[job_id]["progress"] = "Scraping terminé avec succès"
-        jobs[job_id]["result_files"] = result_files
-        jobs[job_id]["completed_at"] = datetime.now().isoformat()
+        for filename in result_files:
+            file_index.add(filename)
+
+        await update_job(
+            job_id,
+            status="completed",
+            progress="Scraping terminé avec succès",
+            result_files=result_files,
+            completed_at=datetime.now().isoformat()
+        )
         add_log(job_id, f"✅ Scraping terminé! {len(result_files)} fichier(s) généré(s)", "success")
 
     except Exception as e:
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["error"] = str(e)
-        jobs[job_id]["completed_at"] = datetime.now().isoformat()
+        await update_job(
+            job_id,
+            status="failed",
+            error=str(e),
+            completed_at=datetime.now().isoformat()
+        )
         add_log(job_id, f"❌ Erreur: {str(e)}", "error")
         print(f"Error in job {job_id}: {str(e)}")
+    finally:
+        # Statut final déjà publié: les flux en cours poursuivent depuis le fichier CSV
+        job_results.pop(job_id, None)
+
+def job_csv_path(job_id: str) -> Optional[str]:
+    """Fichier CSV des résultats d'un job terminé, None s'il n'y en a pas (ou plus)"""
+    for filename in jobs[job_id].get("result_files") or []:
+        if filename.endswith(".csv"):
+            path = os.path.join(RESULTS_DIR, filename)
+            if os.path.exists(path):
+                return path
+    return None
 
 @app.post("/api/scrape", response_model=JobResponse)
 async def start_scraping(request: ScrapeRequest, background_tasks: BackgroundTasks):
@@ -138,8 +240,10 @@ async def start_scraping(request: ScrapeRequest, background_tasks: BackgroundTas
         "date_debut": request.date_debut,
         "date_fin": request.date_fin,
         "search_term": request.search_term,
-        "max_results": request.max_results
+        "max_results": request.max_results,
+        "version": 0
     }
+    job_order.append(job_id)
 
     # Lancer le scraping en arrière-plan
     background_tasks.add_task(
@@ -159,13 +263,33 @@ async def start_scraping(request: ScrapeRequest, background_tasks: BackgroundTas
     )
 
 @app.get("/api/status/{job_id}", response_model=JobStatusResponse)
-async def get_job_status(job_id: str):
-    """Récupère le statut d'un job"""
+async def get_job_status(
+    job_id: str,
+    request: Request,
+    response: Response,
+    wait: float = Query(0, ge=0, le=MAX_WAIT_SECONDS)
+):
+    """
+    Récupère le statut d'un job.
+    Avec If-None-Match, répond 304 si rien n'a changé; avec `wait`, attend un changement avant de répondre.
+    """
 
     if job_id not in jobs:
         raise HTTPException(status_code=404, detail="Job non trouvé")
 
+    def compute_etag():
+        return make_etag("status", job_id, jobs[job_id].get("version", 0))
+
+    etag = compute_etag()
+    if etag_matches(request, etag):
+        if jobs[job_id]["status"] in ["pending", "running"]:
+            etag = await wait_for_change(compute_etag, etag, wait)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
     job = jobs[job_id]
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
 
     return JobStatusResponse(
         job_id=job_id,
@@ -174,35 +298,49 @@ async def get_job_status(job_id: str):
         result_files=job.get("result_files"),
         error=job.get("error"),
         created_at=job["created_at"],
-        completed_at=job.get("completed_at")
+        completed_at=job.get("completed_at"),
+        version=job.get("version", 0)
     )
 
 @app.get("/api/files")
-async def list_files():
-    """Liste tous les fichiers de résultats disponibles"""
+async def list_files(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    q: Optional[str] = None,
+    wait: float = Query(0, ge=0, le=MAX_WAIT_SECONDS)
+):
+    """
+    Liste les fichiers de résultats (plus récents en premier), paginés par curseur.
+    Supporte If-None-Match (304) et le long-polling via `wait`.
+    """
+
+    def compute_etag():
+        return make_etag("files", file_index.version, limit, cursor, q)
+
+    etag = compute_etag()
+    if etag_matches(request, etag):
+        etag = await wait_for_change(compute_etag, etag, wait)
+        if etag_matches(request, etag):
+            return not_modified(etag)
 
-    if not os.path.exists(RESULTS_DIR):
-        return {"files": []}
-
-    files = []
-    for file_path in glob.glob(os.path.join(RESULTS_DIR, "*")):
-        if os.path.isfile(file_path):
-            stat = os.stat(file_path)
-            files.append({
-                "filename": os.path.basename(file_path),
-                "size": stat.st_size,
-                "created_at": datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                "modified_at": datetime.fromtimestamp(stat.st_mtime).isoformat()
-            })
+    try:
+        files, next_cursor = file_index.page(limit=limit, cursor=cursor, term=q)
+    except (ValueError, TypeError, IndexError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    # Trier par date de modification (plus récent en premier)
-    files.sort(key=lambda x: x["modified_at"], reverse=True)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
 
-    return {"files": files}
+    return {"files": files, "next_cursor": next_cursor, "total": len(file_index)}
 
 @app.get("/api/download/{filename}")
-async def download_file(filename: str):
-    """Télécharge un fichier de résultat"""
+async def download_file(filename: str, request: Request):
+    """
+    Télécharge un fichier de résultat.
+    Sert la variante gzip/br selon Accept-Encoding et supporte les requêtes Range.
+    """
 
     # Sécurité: éviter les path traversal
     if ".." in filename or "/" in filename or "\\" in filename:
@@ -210,14 +348,20 @@ async def download_file(filename: str):
 
     file_path = os.path.join(RESULTS_DIR, filename)
 
-    if not os.path.exists(file_path):
+    if downloads.is_variant(filename) or not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="Fichier non trouvé")
 
-    return FileResponse(
-        path=file_path,
-        filename=filename,
-        media_type="application/octet-stream"
-    )
+    encoding = downloads.negotiate_encoding(request.headers.get("accept-encoding"))
+    served_path = file_path
+    if encoding:
+        # Variante pré-calculée à l'écriture, sinon générée ici une seule fois
+        variant = await asyncio.to_thread(downloads.ensure_variant, file_path, encoding)
+        if variant:
+            served_path = variant
+        else:
+            encoding = None
+
+    return downloads.file_response(served_path, filename, request.headers, encoding)
 
 @app.delete("/api/files/{filename}")
 async def delete_file(filename: str):
@@ -234,14 +378,120 @@ async def delete_file(filename: str):
 
     try:
         os.remove(file_path)
+        downloads.remove_variants(file_path)
+        file_index.remove(filename)
+        await notify_state_changed()
         return {"message": f"Fichier {filename} supprimé avec succès"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la suppression: {str(e)}")
 
 @app.get("/api/jobs")
-async def list_jobs():
-    """Liste tous les jobs"""
-    return {"jobs": jobs}
+async def list_jobs(
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    q: Optional[str] = None
+):
+    """Liste les jobs (plus récents en premier), paginés par curseur et filtrables par statut/terme"""
+
+    start = len(job_order) - 1
+    if cursor:
+        try:
+            start = min(decode_position_cursor(cursor) - 1, len(job_order) - 1)
+        except (ValueError, TypeError, IndexError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    term = q.lower() if q else None
+    page = {}
+    next_cursor = None
+    last_position = None
+    position = start
+    while position >= 0:
+        job_id = job_order[position]
+        job = jobs[job_id]
+        if (not status or job["status"] == status) and \
+                (not term or term in (job.get("search_term") or "").lower() or term in job.get("url", "").lower()):
+            if len(page) >= limit:
+                next_cursor = encode_cursor(last_position)
+                break
+            page[job_id] = job
+            last_position = position
+        position -= 1
+
+    return {"jobs": page, "next_cursor": next_cursor, "total": len(jobs)}
+
+@app.get("/api/jobs/{job_id}/results")
+async def stream_results(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    follow: bool = True
+):
+    """
+    Stream les associations d'un job au fur et à mesure du scraping (NDJSON ou CSV).
+    `offset` permet de reprendre après les N premiers enregistrements déjà reçus;
+    avec `follow=false`, seuls les enregistrements déjà disponibles sont renvoyés.
+    Les résultats d'un job terminé sont relus depuis son fichier CSV (valeurs en texte).
+    """
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail="Job non trouvé")
+
+    def format_record(record: dict) -> str:
+        if format == "csv":
+            buffer = io.StringIO()
+            csv.DictWriter(buffer, fieldnames=RESULT_FIELDS, extrasaction="ignore").writerow(record)
+            return buffer.getvalue()
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+    async def csv_records(start: int):
+        """Enregistrements du CSV d'un job terminé à partir du `start`-ième, lus par lots hors de la boucle"""
+        path = job_csv_path(job_id)
+        if not path:
+            return
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            await asyncio.to_thread(lambda: next(itertools.islice(reader, start, start), None))
+            while True:
+                batch = await asyncio.to_thread(lambda: list(itertools.islice(reader, 500)))
+                if not batch:
+                    break
+                for record in batch:
+                    yield record
+
+    async def results_generator():
+        """Générateur d'enregistrements (envoie les nouveaux toutes les 500ms)"""
+        if format == "csv" and offset == 0:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow(RESULT_FIELDS)
+            yield buffer.getvalue()
+
+        position = offset
+        while True:
+            # Lire le statut avant les enregistrements pour ne rien perdre à la fin du job
+            running = jobs[job_id]["status"] in ["pending", "running"]
+            records = job_results.get(job_id)
+            if records is None and not running:
+                async for record in csv_records(position):
+                    yield format_record(record)
+                break
+            records = records or []
+            while position < len(records):
+                yield format_record(records[position])
+                position += 1
+
+            if not follow or not running:
+                break
+            await asyncio.sleep(0.5)
+
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        results_generator(),
+        media_type=media_type,
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
 
 @app.get("/api/logs/{job_id}")
 async def stream_logs(job_id: str):
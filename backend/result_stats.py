@@ -0,0 +1,269 @@
+"""
+Statistiques des résultats de scraping, calculées au fil de l'eau
+Un seul passage sur les enregistrements et une mémoire bornée: compteurs par type,
+ville et code postal, agrégats numériques, jamais la liste des enregistrements.
+Accepte aussi bien les dicts du scraper que les lignes relues d'un CSV (valeurs texte).
+
+Les statistiques se fusionnent (merge) et se sérialisent en JSON: un fichier
+`<résultats>.stats.json` accompagne chaque CSV, et plusieurs exécutions se combinent
+sans relire leurs CSV:
+    python backend/result_stats.py a.stats.json b.stats.json --output total.stats.json
+"""
+import os
+import json
+import argparse
+from typing import Iterable, Optional
+
+# Champs dont on mesure la complétude
+COMPLETENESS_FIELDS = {
+    'name': 'Nom',
+    'email': 'Email',
+    'phone': 'Téléphone',
+    'street_address': 'Adresse',
+    'postal_code': 'Code postal',
+    'city': 'Ville'
+}
+
+# Valeurs sentinelles écrites à la place d'une donnée absente
+MISSING_VALUES = ("None", "Non dispo")
+
+# Tranches de l'histogramme des prix moyens
+PRICE_BINS = [
+    (0, 10, '0-10€'),
+    (10, 20, '10-20€'),
+    (20, 30, '20-30€'),
+    (30, 50, '30-50€'),
+    (50, 100, '50-100€'),
+    (100, float('inf'), '100€+'),
+]
+
+# Nombre de noms d'associations conservés par ville pour la carte
+MAP_SAMPLE_SIZE = 5
+
+# Version du format JSON de ResultStats.to_dict()
+STATS_FORMAT_VERSION = 1
+
+
+def _add_counts(target: dict, counts: dict):
+    for key, count in counts.items():
+        target[key] = target.get(key, 0) + count
+
+
+def _min(a, b):
+    return b if a is None else a if b is None else min(a, b)
+
+
+def _max(a, b):
+    return b if a is None else a if b is None else max(a, b)
+
+
+def to_number(value) -> Optional[float]:
+    """Convertit un nombre ou sa représentation texte (CSV) en float, None si absent"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    value = str(value).strip().replace(',', '.')
+    if not value or value in MISSING_VALUES:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class ResultStats:
+    """Statistiques agrégées, mises à jour enregistrement par enregistrement"""
+
+    # Attributs sérialisés par to_dict(), dans l'ordre
+    FIELDS = (
+        "total", "type_counts", "city_counts", "postal_code_counts", "field_counts",
+        "event_records", "event_total", "event_max", "with_events",
+        "price_count", "price_total", "price_min", "price_max", "price_bins", "cities",
+    )
+
+    def __init__(self):
+        self.total = 0
+        self.type_counts = {}
+        self.city_counts = {}
+        self.postal_code_counts = {}
+        self.field_counts = {field: 0 for field in COMPLETENESS_FIELDS}
+        # Événements: enregistrements renseignés, somme, maximum, associations avec au moins un événement
+        self.event_records = 0
+        self.event_total = 0.0
+        self.event_max = None
+        self.with_events = 0
+        # Prix moyens des événements
+        self.price_count = 0
+        self.price_total = 0.0
+        self.price_min = None
+        self.price_max = None
+        self.price_bins = {label: 0 for _, _, label in PRICE_BINS}
+        # Carte: par ville, code postal, nombre, types et quelques noms
+        self.cities = {}
+
+    def add(self, record: dict):
+        self.total += 1
+
+        assoc_type = record.get('association_type', 'Non défini')
+        self.type_counts[assoc_type] = self.type_counts.get(assoc_type, 0) + 1
+
+        city = record.get('city')
+        if city and city != "None":
+            self.city_counts[city] = self.city_counts.get(city, 0) + 1
+
+        postal_code = record.get('postal_code')
+        if postal_code and postal_code != "None":
+            self.postal_code_counts[postal_code] = self.postal_code_counts.get(postal_code, 0) + 1
+
+        for field in COMPLETENESS_FIELDS:
+            value = record.get(field)
+            if value and value not in MISSING_VALUES:
+                self.field_counts[field] += 1
+
+        event_count = to_number(record.get('event_count'))
+        if event_count is not None:
+            self.event_records += 1
+            self.event_total += event_count
+            self.event_max = event_count if self.event_max is None else max(self.event_max, event_count)
+            if event_count > 0:
+                self.with_events += 1
+
+        price = to_number(record.get('avg_event_price'))
+        if price is not None:
+            self.price_count += 1
+            self.price_total += price
+            self.price_min = price if self.price_min is None else min(self.price_min, price)
+            self.price_max = price if self.price_max is None else max(self.price_max, price)
+            for low, high, label in PRICE_BINS:
+                if low <= price < high:
+                    self.price_bins[label] += 1
+                    break
+
+        if city and postal_code and city != "None" and postal_code != "None":
+            entry = self.cities.get(city)
+            if entry is None:
+                entry = self.cities[city] = {"count": 0, "postal_code": postal_code, "types": {}, "associations": []}
+            entry["count"] += 1
+            map_type = record.get('association_type', 'Autre')
+            entry["types"][map_type] = entry["types"].get(map_type, 0) + 1
+            if len(entry["associations"]) < MAP_SAMPLE_SIZE:
+                entry["associations"].append(record.get('name', 'Association'))
+
+    def add_all(self, records: Iterable[dict]) -> "ResultStats":
+        for record in records:
+            self.add(record)
+        return self
+
+    def merge(self, other: "ResultStats") -> "ResultStats":
+        """Ajoute les statistiques d'une autre exécution (enregistrements supposés distincts)"""
+        self.total += other.total
+        _add_counts(self.type_counts, other.type_counts)
+        _add_counts(self.city_counts, other.city_counts)
+        _add_counts(self.postal_code_counts, other.postal_code_counts)
+        _add_counts(self.field_counts, other.field_counts)
+
+        self.event_records += other.event_records
+        self.event_total += other.event_total
+        self.event_max = _max(self.event_max, other.event_max)
+        self.with_events += other.with_events
+
+        self.price_count += other.price_count
+        self.price_total += other.price_total
+        self.price_min = _min(self.price_min, other.price_min)
+        self.price_max = _max(self.price_max, other.price_max)
+        _add_counts(self.price_bins, other.price_bins)
+
+        for city, other_entry in other.cities.items():
+            entry = self.cities.get(city)
+            if entry is None:
+                entry = self.cities[city] = {
+                    "count": 0, "postal_code": other_entry["postal_code"], "types": {}, "associations": []
+                }
+            entry["count"] += other_entry["count"]
+            _add_counts(entry["types"], other_entry["types"])
+            room = MAP_SAMPLE_SIZE - len(entry["associations"])
+            if room > 0:
+                entry["associations"].extend(other_entry["associations"][:room])
+        return self
+
+    def to_dict(self) -> dict:
+        data = {"version": STATS_FORMAT_VERSION}
+        for field in self.FIELDS:
+            data[field] = getattr(self, field)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ResultStats":
+        if data.get("version") != STATS_FORMAT_VERSION:
+            raise ValueError(f"Format de statistiques non supporté: {data.get('version')}")
+        stats = cls()
+        for field in cls.FIELDS:
+            if field in data:
+                setattr(stats, field, data[field])
+        # Champs ajoutés depuis l'écriture du fichier
+        for field in COMPLETENESS_FIELDS:
+            stats.field_counts.setdefault(field, 0)
+        return stats
+
+    def save(self, path: str, **extra) -> str:
+        """Écrit les statistiques en JSON (écriture atomique: jamais de fichier à moitié écrit)"""
+        data = self.to_dict()
+        data.update(extra)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "ResultStats":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def percent(self, count: float) -> float:
+        return (count / self.total) * 100 if self.total else 0.0
+
+    @property
+    def avg_event_count(self) -> Optional[float]:
+        return self.event_total / self.event_records if self.event_records else None
+
+    @property
+    def avg_price(self) -> Optional[float]:
+        return self.price_total / self.price_count if self.price_count else None
+
+    def top_types(self):
+        return sorted(self.type_counts.items(), key=lambda x: x[1], reverse=True)
+
+    def top_cities(self, limit: int = 10):
+        return sorted(self.city_counts.items(), key=lambda x: x[1], reverse=True)[:limit]
+
+    def summary(self) -> str:
+        """Résumé sur une ligne, pour les statistiques partielles en cours d'exécution"""
+        parts = [f"{self.total} associations"]
+        for field in ("email", "phone"):
+            parts.append(f"{COMPLETENESS_FIELDS[field]} {self.percent(self.field_counts[field]):.0f}%")
+        parts.append(f"{len(self.city_counts)} villes")
+        if self.with_events:
+            parts.append(f"{self.with_events} avec événements")
+        return ", ".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fusionne les statistiques de plusieurs exécutions")
+    parser.add_argument("files", nargs="+", help="Fichiers .stats.json à fusionner")
+    parser.add_argument("--output", help="Écrire les statistiques fusionnées dans ce fichier")
+    args = parser.parse_args()
+
+    merged = ResultStats()
+    for path in args.files:
+        merged.merge(ResultStats.load(path))
+
+    print(merged.summary())
+    for assoc_type, count in merged.top_types():
+        print(f"  {assoc_type}: {count} ({merged.percent(count):.1f}%)")
+    if args.output:
+        merged.save(args.output, sources=[os.path.basename(path) for path in args.files])
+        print(f"Statistiques fusionnées écrites dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,33 @@
 """
 Wrapper pour le scraper HelloAsso
-Version simplifiée qui réutilise les fonctions du scraper original
+Adapte le moteur partagé (helloscraper) aux jobs de l'API: logs, exports et frontière partagée
 """
 import os
-import sys
 import datetime
 from typing import Optional, List
-import requests
-from bs4 import BeautifulSoup
-import time
-import random
 import csv
-import re
-import json
-from urllib.parse import urljoin
+from urllib.parse import urlparse
 import asyncio
-
-# Liste de User-Agents pour rotation
-USER_AGENTS = [
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
-    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/113.0",
-    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.5 Safari/605.1.15",
-    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
-]
-
-BASE_URL = "https://www.helloasso.com"
-SEARCH_URL = "https://www.helloasso.com/e/recherche/associations"
+from downloads import write_compressed_variants
+from frontier import run_worker, make_worker_id
+from helloscraper import metrics
+from result_stats import ResultStats
+from columnar import ParquetResultsWriter, parquet_available
+from html_report import write_results_report
+from helloscraper import (
+    EngineConfig, Fetcher, RESULT_FIELDS, get_association_details, get_all_association_links,
+    get_sitemap_association_links,
+)
+from helloscraper.config import BASE_URL, SEARCH_URL, SITEMAP_URL
+from helloscraper.retry import DeferredQueue
+
+# Statistiques partielles dans les logs toutes les N associations
+PARTIAL_STATS_EVERY = 10
 
 class ScraperWrapper:
     """Wrapper qui réutilise la logique du scraper original"""
 
-    def __init__(self, url: str, date_debut: Optional[str], date_fin: Optional[str], search_term: str, job_id: str, results_dir: str, max_results: int = 50, log_callback=None):
+    def __init__(self, url: str, date_debut: Optional[str], date_fin: Optional[str], search_term: str, job_id: str, results_dir: str, max_results: int = 50, log_callback=None, record_callback=None, frontier=None, worker_id: Optional[str] = None):
         self.url = url
         self.date_debut = date_debut
         self.date_fin = date_fin
@@ -40,15 +36,23 @@ class ScraperWrapper:
         self.results_dir = results_dir
         self.max_results = max_results
         self.log_callback = log_callback  # Callback pour envoyer les logs
+        self.record_callback = record_callback  # Callback appelé pour chaque association scrapée
+        self.frontier = frontier  # Frontière partagée (SQLite/Redis) pour répartir les URLs entre workers
+        self.worker_id = worker_id or make_worker_id()
         self.timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.consecutive_403_errors = 0
-        self.MAX_CONSECUTIVE_403 = 5
-
-        # Session avec cookies persistants
-        self.session = requests.Session()
-        self.session.cookies.set("consent", "true", domain=".helloasso.com")
-        self.session.cookies.set("_ga", f"GA1.2.{random.randint(100000000, 999999999)}.{int(time.time())}", domain=".helloasso.com")
-        self.session.cookies.set("_gid", f"GA1.2.{random.randint(100000000, 999999999)}.{int(time.time())}", domain=".helloasso.com")
+        self.stats = ResultStats()  # Statistiques mises à jour à chaque association
+        self.parquet_writer = None  # Export Parquet écrit au fil du scraping (si pyarrow est installé)
+
+        # Session persistante, nouvelles tentatives et délais: moteur partagé avec la CLI
+        self.fetcher = Fetcher(
+            EngineConfig.from_env(base_url=BASE_URL, search_url=SEARCH_URL,
+                                  sitemap_url=url if self._is_sitemap(url) else SITEMAP_URL,
+                                  max_retries=3, warmup_probability=0),
+            log=self.log,
+            # Avec une frontière partagée, l'ouverture du disjoncteur met aussi en pause les autres workers
+            on_circuit_open=frontier.hold if frontier else None
+        )
+        self.politeness_interval = self.fetcher.config.politeness_interval
 
     def log(self, message: str, level: str = "info"):
         """Log un message (console + callback)"""
@@ -65,243 +69,27 @@ class ScraperWrapper:
             return params.get('query', [''])[0] or params.get('q', [''])[0]
         return ""
 
-    def generate_headers(self):
-        """Génère des headers HTTP réalistes avec tous les détails d'un vrai navigateur"""
-        return {
-            "User-Agent": random.choice(USER_AGENTS),
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-            "Accept-Language": "fr-FR,fr;q=0.9,en-US;q=0.8,en;q=0.7",
-            "Accept-Encoding": "gzip, deflate, br, zstd",
-            "Connection": "keep-alive",
-            "Upgrade-Insecure-Requests": "1",
-            "Referer": "https://www.helloasso.com/",
-            "DNT": "1",
-            "Sec-Fetch-Dest": "document",
-            "Sec-Fetch-Mode": "navigate",
-            "Sec-Fetch-Site": "same-origin",
-            "Sec-Fetch-User": "?1",
-            "Sec-Ch-Ua": '"Chromium";v="123", "Not(A:Brand";v="8"',
-            "Sec-Ch-Ua-Mobile": "?0",
-            "Sec-Ch-Ua-Platform": '"macOS"',
-            "Cache-Control": "max-age=0",
-        }
-
-    def random_delay(self, min_seconds=3, max_seconds=7):
-        """Délai aléatoire entre requêtes (plus longs pour éviter la détection)"""
-        delay = random.uniform(min_seconds, max_seconds)
-        time.sleep(delay)
-
-    def make_request(self, url: str, params=None, retry_count=0):
-        """Effectue une requête HTTP avec gestion des erreurs"""
-        max_retries = 3
-
-        try:
-            headers = self.generate_headers()
-            response = self.session.get(url, headers=headers, params=params, timeout=30)
-
-            if response.status_code == 403:
-                self.consecutive_403_errors += 1
-                if self.consecutive_403_errors >= self.MAX_CONSECUTIVE_403:
-                    self.log(f"⚠️  Trop d'erreurs 403. Pause de 60 secondes...", "warning")
-                    time.sleep(60)
-                    self.consecutive_403_errors = 0
-
-                if retry_count < max_retries:
-                    wait_time = (retry_count + 1) * 15
-                    self.log(f"⚠️  Erreur 403. Nouvelle tentative dans {wait_time}s...", "warning")
-                    time.sleep(wait_time)
-                    return self.make_request(url, params, retry_count + 1)
-                return None
-
-            elif response.status_code == 429:
-                if retry_count < max_retries:
-                    wait_time = (retry_count + 1) * 30
-                    self.log(f"⚠️  Rate limit. Attente de {wait_time}s...", "warning")
-                    time.sleep(wait_time)
-                    return self.make_request(url, params, retry_count + 1)
-                return None
-
-            elif response.status_code == 200:
-                self.consecutive_403_errors = 0
-                return response
-            else:
-                self.log(f"⚠️  Erreur HTTP {response.status_code}", "warning")
-                return None
-
-        except Exception as e:
-            self.log(f"❌ Erreur requête: {e}", "error")
-            if retry_count < max_retries:
-                time.sleep(random.uniform(5, 10))
-                return self.make_request(url, params, retry_count + 1)
-            return None
+    @staticmethod
+    def _is_sitemap(url: str) -> bool:
+        """URL de sitemap (découverte par les sitemaps XML, terme filtré sur les slugs)"""
+        path = urlparse(url).path.lower()
+        return "sitemap" in path and path.endswith((".xml", ".xml.gz"))
 
     def get_all_association_links(self):
-        """Récupère les liens d'associations depuis la recherche"""
-        all_links = []
-        page = 1
-        consecutive_empty = 0
-        max_empty = 3
-
+        """Récupère les liens d'associations depuis la recherche ou les sitemaps (au plus max_results)"""
+        if self._is_sitemap(self.url):
+            self.log(f"🗺️ Découverte par les sitemaps pour '{self.search_term}'...")
+            all_links = get_sitemap_association_links(self.fetcher, self.search_term, limit=self.max_results)
+            self.log(f"✅ Total: {len(all_links)} associations uniques")
+            return all_links
         self.log(f"🔍 Recherche d'associations pour '{self.search_term}'...")
-
-        while consecutive_empty < max_empty:
-            self.log(f"📄 Page {page}...")
-
-            params = {
-                "query": self.search_term,
-                "page": page
-            }
-
-            response = self.make_request(SEARCH_URL, params)
-            if not response:
-                consecutive_empty += 1
-                page += 1
-                continue
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-            association_links = []
-
-            # Méthode 1: Liens directs /associations/
-            for a_tag in soup.find_all('a', href=True):
-                href = a_tag.get('href', '')
-                if href.startswith('/associations/') and not href.endswith('/paiement'):
-                    full_url = urljoin(BASE_URL, href)
-                    if full_url not in all_links and full_url not in association_links:
-                        association_links.append(full_url)
-
-            # Méthode 2: Cartes d'associations
-            for card in soup.select('.association-card, .card, .result-item'):
-                link_elem = card.find('a', href=True)
-                if link_elem:
-                    href = link_elem.get('href', '')
-                    if '/associations/' in href:
-                        full_url = urljoin(BASE_URL, href)
-                        if full_url not in all_links and full_url not in association_links:
-                            association_links.append(full_url)
-
-            # Méthode 3: Extraction par regex
-            if not association_links:
-                url_pattern = r'href=["\']\/associations\/([^"\'\/]+)["\']'
-                matches = re.findall(url_pattern, response.text)
-                for match in matches:
-                    if match and not match.endswith('paiement'):
-                        full_url = f"{BASE_URL}/associations/{match}"
-                        if full_url not in all_links and full_url not in association_links:
-                            association_links.append(full_url)
-
-            if association_links:
-                all_links.extend(association_links)
-                consecutive_empty = 0
-                self.log(f"✅ {len(association_links)} associations trouvées")
-            else:
-                consecutive_empty += 1
-                self.log(f"⚠️  Aucune association sur cette page", "warning")
-
-            page += 1
-            self.random_delay(2, 4)
-
-        all_links = list(set(all_links))
+        all_links = get_all_association_links(self.fetcher, self.search_term, limit=self.max_results)
         self.log(f"✅ Total: {len(all_links)} associations uniques")
         return all_links
 
-    def extract_email(self, html_content: str):
-        """Extrait l'email du HTML"""
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, html_content)
-
-        unwanted = [r'\.png$', r'\.jpg$', r'example\.com$', r'test\.com$']
-        for email in emails:
-            if not any(re.search(p, email, re.IGNORECASE) for p in unwanted):
-                return email
-        return None
-
-    def extract_phone(self, html_content: str):
-        """Extrait le téléphone du HTML"""
-        patterns = [
-            r'\b0[1-9](?:[\s.-]?\d{2}){4}\b',
-            r'\+33[\s.-]?[1-9](?:[\s.-]?\d{2}){4}\b',
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, html_content)
-            if match:
-                return match.group(0)
-        return None
-
-    def parse_address(self, address_text: str):
-        """Parse une adresse en composants"""
-        if not address_text:
-            return {"street_address": None, "postal_code": None, "city": None}
-
-        postal_match = re.search(r'\b(\d{5})\b', address_text)
-        postal_code = postal_match.group(1) if postal_match else None
-
-        city = None
-        street = address_text
-
-        if postal_code:
-            parts = address_text.split(postal_code, 1)
-            if len(parts) > 1:
-                city_part = parts[1].strip()
-                if city_part.startswith(','):
-                    city_part = city_part[1:].strip()
-
-                words = city_part.split()
-                city = ' '.join([w for w in words[:3] if w.lower() not in ['cedex', 'france']])
-
-                if parts[0]:
-                    street = parts[0].strip().rstrip(',')
-
-        return {
-            "street_address": street,
-            "postal_code": postal_code,
-            "city": city
-        }
-
     def get_association_details(self, url: str):
-        """Récupère les détails d'une association"""
-        response = self.make_request(url)
-        if not response:
-            return None
-
-        soup = BeautifulSoup(response.text, 'html.parser')
-        html = response.text
-
-        # Nom
-        name = None
-        h1 = soup.find('h1')
-        if h1:
-            name = h1.text.strip()
-        if not name:
-            name = url.split('/')[-1].replace('-', ' ').title()
-
-        # Email et téléphone
-        email = self.extract_email(html)
-        phone = self.extract_phone(html)
-
-        # Adresse
-        address_text = None
-        address_div = soup.select_one('div[itemprop="address"]')
-        if address_div:
-            address_text = address_div.text.strip()
-
-        if not address_text:
-            for elem in soup.find_all(['address', 'p', 'div']):
-                text = elem.text.strip()
-                if re.search(r'\b\d{5}\b', text) and len(text) < 100:
-                    address_text = text
-                    break
-
-        address = self.parse_address(address_text)
-
-        return {
-            'name': name,
-            'url': url,
-            'street_address': address['street_address'],
-            'postal_code': address['postal_code'],
-            'city': address['city'],
-            'email': email or "Non dispo",
-            'phone': phone or "Non dispo",
-        }
+        """Récupère les détails d'une association (extraction complète du moteur)"""
+        return get_association_details(self.fetcher, url)
 
     async def run(self) -> List[str]:
         """Exécute le scraping"""
@@ -318,7 +106,7 @@ class ScraperWrapper:
 
         try:
             # Récupérer les liens
-            if "recherche" in self.url or "search" in self.url:
+            if "recherche" in self.url or "search" in self.url or self._is_sitemap(self.url):
                 all_links = self.get_all_association_links()
 
                 if len(all_links) > self.max_results:
@@ -327,22 +115,25 @@ class ScraperWrapper:
             else:
                 all_links = [self.url]
 
-            # Scraper chaque association
-            total = len(all_links)
-            for idx, link in enumerate(all_links, 1):
-                self.log(f"📊 {idx}/{total}: {link}")
-
-                try:
-                    details = self.get_association_details(link)
-                    if details:
-                        results.append(details)
-                        self.log(f"✅ {details['name']}")
-
-                    self.random_delay(2, 4)
-
-                except Exception as e:
-                    self.log(f"❌ Erreur: {e}", "error")
-                    continue
+            # Répartir les associations entre les workers de la frontière partagée
+            if self.frontier:
+                results = self._run_with_frontier(all_links)
+                all_links = []
+
+            # Scraper chaque association; une association en échec est reportée et retraitée à la fin
+            deferred = DeferredQueue(self.fetcher.config.deferred_rounds)
+            self._scrape_links(all_links, len(all_links), results, deferred)
+            while len(deferred):
+                total = len(deferred)
+                self.log(f"🔁 Nouvelle passe sur {total} associations reportées...")
+                self._scrape_links(deferred.drain(lambda seconds: self.fetcher.wait(seconds, reason="backoff")),
+                                   total, results, deferred)
+
+            failures = deferred.report()
+            if failures:
+                self.log(f"⚠️  {len(failures)} associations toujours en échec:", "warning")
+                for failure in failures:
+                    self.log(f"   {failure.url} ({failure.reason}, {failure.attempts} tentatives)", "warning")
 
         except Exception as e:
             self.log(f"❌ Erreur générale: {e}", "error")
@@ -362,12 +153,118 @@ class ScraperWrapper:
             if html_file:
                 result_files.append(html_file)
 
+            parquet_file = self._close_parquet()
+            if parquet_file:
+                result_files.append(parquet_file)
+
+            # Variantes compressées servies par /api/download
+            with metrics.WRITE_SECONDS.time(format="compressed"):
+                for filename in result_files:
+                    write_compressed_variants(os.path.join(self.results_dir, filename))
+
             self.log(f"✅ Scraping terminé!")
         else:
             self.log(f"⚠️  Aucun résultat", "warning")
 
+        # Profil cumulé des stratégies d'extraction du processus (PROFILE_EXTRACTION=true)
+        if metrics.extraction_profiler.enabled:
+            for line in metrics.extraction_profiler.format_report().splitlines():
+                self.log(f"🔬 {line}")
+
         return result_files
 
+    def _scrape_links(self, links, total: int, results: List[dict], deferred: DeferredQueue):
+        """Scrape chaque association de `links`; les échecs sont ajoutés à `deferred`"""
+        for idx, link in enumerate(links, 1):
+            self.log(f"📊 {idx}/{total}: {link}")
+
+            try:
+                details = self.get_association_details(link)
+                if details:
+                    results.append(details)
+                    if self.record_callback:
+                        self.record_callback(details)
+                    self.log(f"✅ {details['name']}")
+                    self._record_result(details)
+                else:
+                    deferred.add(link, self.fetcher.last_failure)
+
+            except Exception as e:
+                self.log(f"❌ Erreur: {e}", "error")
+                continue
+
+    def _run_with_frontier(self, links: List[str]) -> List[dict]:
+        """Publie les liens dans la frontière, y participe comme worker et collecte les résultats de tous les workers"""
+        added = self.frontier.add(self.job_id, links)
+        self.log(f"🗂️  {added} associations ajoutées à la frontière partagée (worker {self.worker_id})")
+
+        results = []
+        cursor = 0
+
+        def collect():
+            nonlocal cursor
+            records, cursor = self.frontier.results(self.job_id, cursor)
+            for record in records:
+                results.append(record)
+                if self.record_callback:
+                    self.record_callback(record)
+                self.log(f"✅ {record['name']}")
+                self._record_result(record)
+
+        self.run_frontier_worker(on_progress=collect)
+        collect()
+
+        failed = self.frontier.failed_urls(self.job_id)
+        if failed:
+            self.log(f"⚠️  {len(failed)} associations abandonnées après plusieurs tentatives:", "warning")
+            for url in failed:
+                self.log(f"   {url}", "warning")
+        return results
+
+    def _record_result(self, record: dict):
+        """Met à jour les statistiques et l'export Parquet avec une nouvelle association"""
+        self.stats.add(record)
+        if self.stats.total % PARTIAL_STATS_EVERY == 0:
+            self.log(f"📈 {self.stats.summary()}")
+
+        if parquet_available():
+            try:
+                if self.parquet_writer is None:
+                    filename = f"associations_{self.search_term}_{self.job_id}_{self.timestamp}.parquet"
+                    self.parquet_writer = ParquetResultsWriter(os.path.join(self.results_dir, filename), RESULT_FIELDS)
+                self.parquet_writer.write(record)
+            except Exception as e:
+                self.log(f"⚠️  Export Parquet impossible: {e}", "warning")
+                self.parquet_writer = None
+
+    @metrics.WRITE_SECONDS.time(format="parquet")
+    def _close_parquet(self) -> Optional[str]:
+        """Termine l'export Parquet; retourne le nom du fichier"""
+        if self.parquet_writer is None:
+            return None
+        writer, self.parquet_writer = self.parquet_writer, None
+        path = writer.close()
+        return os.path.basename(path) if path else None
+
+    def run_frontier_worker(self, idle_timeout: float = 0, on_progress=None) -> int:
+        """Traite les URLs du job depuis la frontière partagée jusqu'à ce qu'elle soit vide"""
+        def process_url(url):
+            self.log(f"📊 {url}")
+            return self.get_association_details(url)
+
+        return run_worker(
+            self.frontier,
+            self.job_id,
+            self.worker_id,
+            process_url,
+            politeness_key=urlparse(BASE_URL).netloc,
+            politeness_interval=self.politeness_interval,
+            idle_timeout=idle_timeout,
+            on_progress=on_progress,
+            log=self.log
+        )
+
+    @metrics.WRITE_SECONDS.time(format="csv")
     def _save_csv(self, results: List[dict]) -> Optional[str]:
         """Sauvegarde en CSV"""
         if not results:
@@ -377,171 +274,24 @@ class ScraperWrapper:
         filepath = os.path.join(self.results_dir, filename)
 
         with open(filepath, 'w', newline='', encoding='utf-8-sig') as f:
-            writer = csv.DictWriter(f, fieldnames=results[0].keys())
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
             writer.writeheader()
             writer.writerows(results)
 
         self.log(f"✅ CSV: {filename}")
         return filename
 
+    @metrics.WRITE_SECONDS.time(format="html")
     def _save_html(self, results: List[dict]) -> Optional[str]:
-        """Sauvegarde en HTML"""
+        """Sauvegarde en HTML (données en JSON compact, table virtualisée côté navigateur)"""
         if not results:
             return None
 
         filename = f"associations_{self.search_term}_{self.job_id}_{self.timestamp}.html"
         filepath = os.path.join(self.results_dir, filename)
 
-        # Statistiques
-        with_email = len([r for r in results if r.get('email') and r['email'] != 'Non dispo'])
-        with_phone = len([r for r in results if r.get('phone') and r['phone'] != 'Non dispo'])
-        cities = len(set(r.get('city') for r in results if r.get('city')))
-
-        html = f"""<!DOCTYPE html>
-<html lang="fr">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Résultats - {self.search_term}</title>
-    <style>
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            padding: 20px;
-        }}
-        .container {{
-            max-width: 1400px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 20px;
-            box-shadow: 0 20px 60px rgba(0,0,0,0.3);
-            overflow: hidden;
-        }}
-        header {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 40px;
-            text-align: center;
-        }}
-        header h1 {{ font-size: 2.5em; margin-bottom: 10px; }}
-        .stats {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 20px;
-            padding: 30px 40px;
-            background: #f8f9fa;
-        }}
-        .stat-card {{
-            background: white;
-            padding: 20px;
-            border-radius: 10px;
-            text-align: center;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }}
-        .stat-card .number {{ font-size: 2.5em; color: #667eea; font-weight: bold; }}
-        .stat-card .label {{ color: #666; margin-top: 10px; }}
-        .table-container {{ padding: 40px; overflow-x: auto; }}
-        table {{
-            width: 100%;
-            border-collapse: collapse;
-        }}
-        th, td {{
-            padding: 15px;
-            text-align: left;
-            border-bottom: 1px solid #e0e0e0;
-        }}
-        th {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            font-weight: 600;
-            position: sticky;
-            top: 0;
-        }}
-        tr:hover {{ background: #f8f9fa; }}
-        a {{ color: #667eea; text-decoration: none; }}
-        a:hover {{ text-decoration: underline; }}
-        footer {{
-            background: #2c3e50;
-            color: white;
-            text-align: center;
-            padding: 20px;
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <header>
-            <h1>🎯 Résultats HelloAsso</h1>
-            <p>Recherche: <strong>{self.search_term}</strong></p>
-            <p>Date: {datetime.datetime.now().strftime("%d/%m/%Y %H:%M")}</p>
-        </header>
-
-        <div class="stats">
-            <div class="stat-card">
-                <div class="number">{len(results)}</div>
-                <div class="label">Associations</div>
-            </div>
-            <div class="stat-card">
-                <div class="number">{with_email}</div>
-                <div class="label">Avec Email</div>
-            </div>
-            <div class="stat-card">
-                <div class="number">{with_phone}</div>
-                <div class="label">Avec Téléphone</div>
-            </div>
-            <div class="stat-card">
-                <div class="number">{cities}</div>
-                <div class="label">Villes</div>
-            </div>
-        </div>
-
-        <div class="table-container">
-            <table>
-                <thead>
-                    <tr>
-"""
-
-        # Headers
-        for key in results[0].keys():
-            html += f"<th>{key.replace('_', ' ').title()}</th>"
-
-        html += """
-                    </tr>
-                </thead>
-                <tbody>
-"""
-
-        # Rows
-        for result in results:
-            html += "<tr>"
-            for key, value in result.items():
-                if key == 'email' and value and value != 'Non dispo':
-                    html += f'<td><a href="mailto:{value}">{value}</a></td>'
-                elif key == 'phone' and value and value != 'Non dispo':
-                    html += f'<td><a href="tel:{value}">{value}</a></td>'
-                elif key == 'url':
-                    html += f'<td><a href="{value}" target="_blank">{value}</a></td>'
-                else:
-                    html += f"<td>{value if value else '-'}</td>"
-            html += "</tr>"
-
-        html += f"""
-                </tbody>
-            </table>
-        </div>
-
-        <footer>
-            <p>Généré par HelloAsso Scraper WebApp</p>
-            <p>⚠️ Fichier temporaire - Téléchargez maintenant!</p>
-        </footer>
-    </div>
-</body>
-</html>
-"""
-
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(html)
+        # Statistiques tenues à jour pendant le scraping
+        write_results_report(filepath, results, RESULT_FIELDS, self.search_term, stats=self.stats)
 
         self.log(f"✅ HTML: {filename}")
         return filename
\ No newline at end of file
@@ -47,6 +47,24 @@ def test_files():
     result = response.json()
     print(f"Nombre de fichiers: {len(result['files'])}\n")
 
+def test_files_pagination():
+    print("🔍 Test de pagination des fichiers...")
+    response = requests.get(f"{API_URL}/api/files", params={"limit": 1})
+    print(f"✅ Status: {response.status_code}")
+    result = response.json()
+    print(f"Page: {len(result['files'])} fichier(s) sur {result['total']}")
+    if result["next_cursor"]:
+        response = requests.get(f"{API_URL}/api/files", params={"limit": 1, "cursor": result["next_cursor"]})
+        print(f"Page suivante: {len(response.json()['files'])} fichier(s)")
+    print()
+
+def test_jobs():
+    print("🔍 Test de listage des jobs...")
+    response = requests.get(f"{API_URL}/api/jobs", params={"limit": 10, "status": "completed"})
+    print(f"✅ Status: {response.status_code}")
+    result = response.json()
+    print(f"Jobs terminés: {len(result['jobs'])} (total: {result['total']})\n")
+
 if __name__ == "__main__":
     print("=" * 50)
     print("TEST DE L'API HELLOASSO SCRAPER")
@@ -56,6 +74,8 @@ if __name__ == "__main__":
         test_health()
         test_root()
         test_files()
+        test_files_pagination()
+        test_jobs()
 
         # Test de scraping (commenté par défaut pour ne pas faire de vraies requêtes)
         # job_id = test_scrape()
@@ -0,0 +1,5 @@
+"""Tests hors-ligne du backend: les modules de backend/ s'importent comme depuis main.py"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,127 @@
+"""Transitions du disjoncteur par hôte: fermé -> ouvert -> semi-ouvert -> fermé ou rouvert"""
+import pytest
+
+from helloscraper import breaker as breaker_module
+from helloscraper.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(breaker_module, "time", clock)
+    return clock
+
+
+def make_breaker():
+    return CircuitBreaker("breaker.test", window=4, min_requests=4, failure_rate=0.5,
+                          open_seconds=60, max_open_seconds=200)
+
+
+def trip(breaker):
+    opened = [breaker.record(failure) for failure in (False, True, False, True)]
+    assert opened == [False, False, False, True]
+
+
+def test_stays_closed_below_failure_rate(clock):
+    breaker = make_breaker()
+    for failure in (True, False, False, False, True, False):
+        assert not breaker.record(failure)
+    assert breaker.state == CLOSED
+    assert breaker.before_request() == (0.0, None)
+
+
+def test_opens_at_failure_rate_and_blocks_until_expiry(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    assert breaker.state == OPEN
+    assert breaker.before_request() == (pytest.approx(60), None)
+    clock.now += 45
+    assert breaker.before_request() == (pytest.approx(15), None)
+    assert breaker.state == OPEN
+
+
+def test_half_open_lets_a_single_probe_through(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 60
+    blocked, probe = breaker.before_request()
+    assert blocked == 0.0 and probe is not None
+    assert breaker.state == HALF_OPEN
+    # Les autres appelants attendent le résultat de la sonde
+    blocked, other = breaker.before_request()
+    assert blocked > 0 and other is None
+
+
+def test_successful_probe_closes_the_circuit(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 60
+    _, probe = breaker.before_request()
+    assert not breaker.record(False, probe)
+    assert breaker.state == CLOSED
+    assert breaker.open_seconds == 60
+    assert breaker.before_request() == (0.0, None)
+
+
+def test_failed_probe_reopens_with_doubled_duration(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    for expected in (120, 200, 200):
+        clock.now = breaker.opened_until
+        blocked, probe = breaker.before_request()
+        assert blocked == 0.0
+        assert breaker.record(True, probe)
+        assert breaker.state == OPEN
+        assert breaker.open_seconds == expected
+        assert breaker.before_request() == (pytest.approx(expected), None)
+
+
+def test_released_probe_lets_another_caller_probe(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 60
+    _, probe = breaker.before_request()
+    breaker.release(probe)
+    blocked, other = breaker.before_request()
+    assert blocked == 0.0 and other not in (None, probe)
+    assert breaker.state == HALF_OPEN
+    # La sonde abandonnée ne peut plus décider de l'état du circuit
+    assert not breaker.record(True, probe)
+    assert breaker.state == HALF_OPEN
+
+
+def test_stale_result_during_half_open_is_ignored(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 60
+    _, probe = breaker.before_request()
+    # Réponse tardive d'une requête admise quand le circuit était encore fermé
+    assert not breaker.record(False)
+    assert not breaker.record(True)
+    assert breaker.state == HALF_OPEN
+    assert breaker.before_request()[0] > 0
+    # Seul le résultat de la sonde referme le circuit
+    assert not breaker.record(False, probe)
+    assert breaker.state == CLOSED
+
+
+def test_probe_from_a_previous_half_open_is_ignored(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 60
+    _, first = breaker.before_request()
+    assert breaker.record(True, first)
+    clock.now = breaker.opened_until
+    _, second = breaker.before_request()
+    assert not breaker.record(True, first)
+    assert breaker.state == HALF_OPEN
+    assert not breaker.record(False, second)
+    assert breaker.state == CLOSED
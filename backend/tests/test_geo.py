@@ -0,0 +1,63 @@
+"""Validation des codes postaux et géocodage avec l'index livré dans data/"""
+import pytest
+
+from helloscraper import geo
+from helloscraper.extract import parse_address
+
+
+def test_data_file_is_shipped():
+    index = geo.get_index()
+    assert len(index) > 30000
+    assert "75002" in index and "15000" in index
+
+
+def test_price_before_address_is_not_a_postal_code():
+    address = parse_address("Prix 15000 euros, 12 rue de la Paix 75002 Paris")
+    assert address["postal_code"] == "75002"
+    assert address["city"] == "Paris"
+
+
+def test_unknown_code_with_existing_department_is_rejected():
+    assert geo.department_of("75999") == "75"
+    assert not geo.is_valid_postal_code("75999")
+    assert geo.is_valid_postal_code("75999", cedex=True)
+
+
+def test_overseas_addresses_keep_postal_code_and_city():
+    assert parse_address("1 rue de Paris, 97400 Saint-Denis") == {
+        "street_address": "1 rue de Paris", "postal_code": "97400", "city": "Saint-Denis"}
+    assert parse_address("Rue Victor Hugo 97200 Fort-de-France")["city"] == "Fort-de-France"
+    assert parse_address("Gustavia, 97133 Saint-Barthélemy")["postal_code"] == "97133"
+
+
+def test_territory_without_codes_in_index_is_checked_on_prefix(monkeypatch):
+    monkeypatch.setattr(geo, "_index", geo.PostalCodeIndex([("75002", 48.86, 2.34, "Paris")]))
+    # Aucun code polynésien dans cet index: le préfixe 987 suffit
+    assert geo.is_valid_postal_code("98714")
+    assert parse_address("BP 42, 98714 Papeete")["postal_code"] == "98714"
+    assert not geo.is_valid_postal_code("75999")
+
+
+def test_missing_index_only_accepts_cedex(monkeypatch):
+    monkeypatch.setattr(geo, "_index", geo.PostalCodeIndex())
+    assert geo.find_postal_code("Prix 15000 euros") is None
+    assert geo.locate_postal_code("12 rue de la Paix 75002 Paris") is None
+    assert geo.find_postal_code("BP 12, 24053 Périgueux Cedex 9").group(1) == "24053"
+
+
+def test_communes_of_same_department_have_distinct_coordinates():
+    aurillac = geo.coordinates_for("15000", "Aurillac")
+    saint_flour = geo.coordinates_for("15100", "Saint-Flour")
+    assert aurillac == pytest.approx((44.93, 2.44), abs=0.05)
+    assert saint_flour == pytest.approx((45.03, 3.09), abs=0.05)
+
+
+def test_map_places_each_commune_rather_than_its_department():
+    data = geo.build_map_data({
+        "Aurillac": {"postal_code": "15000", "count": 2, "types": {}, "associations": []},
+        "Saint-Flour": {"postal_code": "15100", "count": 1, "types": {}, "associations": []},
+    })
+    assert data["unlocated"] == 0
+    positions = {city[0]: (city[1], city[2]) for city in data["cities"]}
+    assert positions["Aurillac"] != positions["Saint-Flour"]
+    assert geo.DEPARTMENTS["15"] not in positions.values()
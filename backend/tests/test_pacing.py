@@ -0,0 +1,85 @@
+"""Débit adaptatif AIMD: hausse additive sur réponses saines, baisse multiplicative sur surcharge"""
+import pytest
+
+from helloscraper import pacing
+from helloscraper.pacing import AIMDController
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(pacing, "time", clock)
+    return clock
+
+
+def make_controller(**overrides):
+    settings = {"initial_rate": 0.5, "min_rate": 0.05, "max_rate": 1.0, "increase": 0.02,
+                "decrease": 0.5, "target_p95": 3.0, "window": 10}
+    settings.update(overrides)
+    return AIMDController("pacing.test", **settings)
+
+
+def test_healthy_responses_increase_rate_additively(clock):
+    controller = make_controller()
+    controller.observe(0.2, 200)
+    assert controller.rate == pytest.approx(0.5 + 0.02 / 0.5)
+    for _ in range(500):
+        controller.observe(0.2, 200)
+    assert controller.rate == 1.0
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_overload_halves_rate(clock, status):
+    controller = make_controller()
+    controller.observe(0.2, status)
+    assert controller.rate == pytest.approx(0.25)
+
+
+def test_burst_of_errors_decreases_once(clock):
+    controller = make_controller()
+    for _ in range(5):
+        controller.observe(0.2, 429)
+    assert controller.rate == pytest.approx(0.25)
+    # Après la période de maintien (2 intervalles au nouveau débit), une nouvelle surcharge compte
+    clock.now += 2 / 0.25
+    controller.observe(0.2, 429)
+    assert controller.rate == pytest.approx(0.125)
+
+
+def test_rate_never_drops_below_minimum(clock):
+    controller = make_controller(initial_rate=0.06)
+    controller.observe(0.2, 503)
+    assert controller.rate == 0.05
+
+
+def test_latency_spike_decreases_rate(clock):
+    controller = make_controller()
+    for _ in range(4):
+        controller.observe(0.2, 200)
+    rate = controller.rate
+    controller.observe(10.0, 200)
+    assert controller.rate == pytest.approx(rate * 0.5)
+
+
+def test_other_errors_leave_rate_unchanged(clock):
+    controller = make_controller()
+    controller.observe(0.2, 404)
+    controller.observe(0.2, None)
+    assert controller.rate == 0.5
+
+
+def test_acquire_spaces_slots_by_current_rate(clock):
+    controller = make_controller(initial_rate=1.0)
+    assert controller.acquire() == 0.0
+    second = controller.acquire()
+    assert 0.8 <= second <= 1.2
+    clock.now += 10
+    assert controller.acquire() == 0.0
@@ -0,0 +1,124 @@
+"""Backoff, Retry-After et report des URLs en échec, sans réseau (session simulée)"""
+import time
+import itertools
+import email.utils
+
+import pytest
+
+from helloscraper import EngineConfig, Fetcher
+from helloscraper.retry import DeferredQueue, FetchFailure, backoff_delay, parse_retry_after
+
+_hosts = itertools.count()
+
+
+class StubResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class StubSession:
+    """Rejoue une suite de réponses, puis 200"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        return self.responses.pop(0) if self.responses else StubResponse(200)
+
+
+def make_fetcher(responses, **config):
+    # Un hôte par test: disjoncteur et débit adaptatif sont partagés par hôte dans le processus
+    host = f"https://retry-{next(_hosts)}.test"
+    config = {"warmup_probability": 0, "initial_rate": 1000.0, "max_rate": 1000.0, **config}
+    fetcher = Fetcher(EngineConfig(base_url=host, **config))
+    fetcher._session = StubSession(responses)
+    waits = []
+    fetcher.wait = lambda seconds, reason="politeness": waits.append((reason, seconds))
+    return fetcher, f"{host}/page", waits
+
+
+def backoffs(waits):
+    return [seconds for reason, seconds in waits if reason == "backoff"]
+
+
+def test_backoff_delay_grows_and_is_capped():
+    for attempt in range(8):
+        ceiling = min(30.0, 2.0 * 2 ** attempt)
+        for _ in range(50):
+            assert 2.0 <= backoff_delay(attempt, 2.0, 30.0) <= ceiling
+    assert max(backoff_delay(10, 2.0, 30.0) for _ in range(200)) <= 30.0
+
+
+def test_parse_retry_after_seconds_and_http_date():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after(" 5 ") == 5.0
+    now = 1_700_000_000.0
+    assert parse_retry_after(email.utils.formatdate(now + 90, usegmt=True), now=now) == pytest.approx(90)
+    assert parse_retry_after(email.utils.formatdate(now - 90, usegmt=True), now=now) == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("bientôt") is None
+
+
+def test_retry_after_is_honoured_before_retrying():
+    fetcher, url, waits = make_fetcher([StubResponse(429, {"Retry-After": "7"}), StubResponse(200)])
+    response = fetcher.get(url)
+    assert response.status_code == 200
+    assert fetcher._session.calls == 2
+    assert backoffs(waits) == [7.0]
+
+
+def test_server_errors_are_retried_with_backoff():
+    fetcher, url, waits = make_fetcher([StubResponse(503), StubResponse(502), StubResponse(200)])
+    assert fetcher.get(url).status_code == 200
+    delays = backoffs(waits)
+    assert len(delays) == 2
+    assert delays[0] == 2.0 and 2.0 <= delays[1] <= 4.0
+
+
+def test_long_retry_after_defers_the_url_without_waiting():
+    fetcher, url, waits = make_fetcher([StubResponse(429, {"Retry-After": "3600"})])
+    assert fetcher.get(url) is None
+    assert backoffs(waits) == []
+    failure = fetcher.last_failure
+    assert (failure.reason, failure.attempts, failure.retryable) == ("429", 1, True)
+    assert failure.not_before >= time.time() + 3500
+
+
+def test_retries_are_bounded():
+    fetcher, url, waits = make_fetcher([StubResponse(500)] * 10, max_retries=2)
+    assert fetcher.get(url) is None
+    assert fetcher._session.calls == 3
+    assert len(backoffs(waits)) == 2
+    assert fetcher.last_failure.reason == "5xx"
+
+
+def test_logs_count_every_attempt():
+    fetcher, url, _ = make_fetcher([StubResponse(403)] * 10, max_retries=2)
+    messages = []
+    fetcher.log = lambda message, level="info": messages.append(message)
+    assert fetcher.get(url) is None
+    assert [message.rsplit(" ", 1)[-1] for message in messages if "Tentative" in message] == ["1/3", "2/3", "3/3"]
+    assert [message for message in messages if "reprise" in message][-1].startswith("Nouvelle tentative (reprise 2/2)")
+    assert f"Échec après 3 tentatives pour {url}" in messages
+
+
+def test_client_errors_are_not_retried():
+    fetcher, url, waits = make_fetcher([StubResponse(404)])
+    assert fetcher.get(url) is None
+    assert fetcher._session.calls == 1
+    assert (fetcher.last_failure.reason, fetcher.last_failure.retryable) == ("http_404", False)
+
+
+def test_deferred_queue_gives_up_after_max_rounds():
+    queue = DeferredQueue(max_rounds=1)
+    queue.add("a", FetchFailure("a", "429", 1))
+    queue.add("b", FetchFailure("b", "http_404", 1, retryable=False))
+    assert len(queue) == 1 and [failure.url for failure in queue.report()] == ["b", "a"]
+
+    assert list(queue.drain(wait=lambda seconds: None)) == ["a"]
+    queue.add("a", FetchFailure("a", "429", 2))
+    assert len(queue) == 0
+    assert sorted(failure.url for failure in queue.report()) == ["a", "b"]
@@ -0,0 +1,169 @@
+"""
+Analyse des pages de recherche hors-ligne: état Nuxt (devalue) d'abord, DOM en repli
+Pagination avec préchargement: les pages en attente sont annulées dès que la fin est détectée
+"""
+import json
+import threading
+
+from helloscraper import EngineConfig, Fetcher, crawl_association_links, get_all_association_links, metrics
+from helloscraper import parse_search_page
+from helloscraper.search import _revive_devalue
+
+BASE_URL = "https://www.helloasso.com"
+
+# Charge utile __NUXT_DATA__: tableau plat, objets et listes référencent leurs valeurs par indice
+NUXT_DATA = [
+    {"data": 1, "state": 15, "serverRendered": 12},
+    ["ShallowReactive", 2],
+    {"search": 3},
+    {"organizations": 4, "pagination": 9},
+    [5, 8, 5],
+    {"url": 6, "name": 7, "city": 13, "zipCode": 14},
+    "https://www.helloasso.com/associations/club-echecs-lyon",
+    "Club d'échecs de Lyon",
+    {"organizationSlug": 16, "name": 17, "category": 18},
+    {"pageIndex": 10, "totalPages": 11},
+    2,
+    3,
+    True,
+    "Lyon",
+    "69007",
+    ["Reactive", 19],
+    "chorale-insa",
+    "Chorale de l'INSA",
+    "Association étudiante",
+    {"tags": 20},
+    ["Set", 13],
+]
+
+
+def nuxt_page(payload):
+    return (f'<html><body><div id="__nuxt"></div>'
+            f'<script type="application/json" id="__NUXT_DATA__" data-ssr="true">{json.dumps(payload)}</script>'
+            f'</body></html>')
+
+
+def test_revive_devalue_resolves_references_and_wrappers():
+    state = _revive_devalue(NUXT_DATA)
+    organizations = state["data"]["search"]["organizations"]
+    assert [organization["name"] for organization in organizations] == [
+        "Club d'échecs de Lyon", "Chorale de l'INSA", "Club d'échecs de Lyon"]
+    # Une valeur référencée deux fois est reconstruite une seule fois
+    assert organizations[0] is organizations[2]
+    assert state["state"] == {"tags": ["Lyon"]}
+    assert state["serverRendered"] is True
+
+
+def test_nuxt_data_gives_cards_and_pagination():
+    results = parse_search_page(nuxt_page(NUXT_DATA), BASE_URL, page=2)
+    assert results.source == "json"
+    assert results.links == [f"{BASE_URL}/associations/club-echecs-lyon", f"{BASE_URL}/associations/chorale-insa"]
+    assert results.cards[0] == {
+        "slug": "club-echecs-lyon", "url": f"{BASE_URL}/associations/club-echecs-lyon",
+        "name": "Club d'échecs de Lyon", "city": "Lyon", "postal_code": "69007",
+    }
+    assert results.cards[1]["category"] == "Association étudiante"
+    assert results.has_next is True
+
+
+def test_last_page_stops_pagination():
+    payload = list(NUXT_DATA)
+    payload[10] = 3
+    assert parse_search_page(nuxt_page(payload), BASE_URL).has_next is False
+
+
+def test_invalid_state_falls_back_to_dom():
+    html = ('<script id="__NUXT_DATA__" type="application/json">[{"url": "/associations/</script>'
+            '<a href="/associations/amis-du-velo">Amis du vélo</a>'
+            '<a href="/associations/amis-du-velo/paiement">Adhérer</a>'
+            '<a href="https://example.org/associations/ailleurs">Ailleurs</a>')
+    results = parse_search_page(html, BASE_URL)
+    assert results.source == "dom"
+    assert results.cards == [{"slug": "amis-du-velo", "url": f"{BASE_URL}/associations/amis-du-velo",
+                              "name": "Amis du vélo"}]
+    assert results.has_next is None
+
+
+def test_page_without_associations_is_empty():
+    results = parse_search_page("<html><body>Aucun résultat</body></html>", BASE_URL)
+    assert (results.source, results.links, results.has_next) == ("none", [], None)
+
+
+class SearchResponse:
+    status_code = 200
+
+    def __init__(self, url, html):
+        self.url = url
+        self.content = html.encode("utf-8")
+        self.headers = {"Content-Type": "text/html; charset=utf-8"}
+
+
+class SearchSession:
+    """Pages de recherche en mémoire: 5 associations par page, `last_page` pages au total"""
+
+    def __init__(self, last_page):
+        self.last_page = last_page
+        self.requested = []
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, **kwargs):
+        page = params["page"]
+        with self._lock:
+            self.requested.append(page)
+        organizations = [{"url": f"/associations/asso-{page}-{i}", "name": f"Asso {page}.{i}"} for i in range(5)]
+        state = {"organizations": organizations, "pagination": {"pageIndex": page, "totalPages": self.last_page}}
+        return SearchResponse(url, f'<script type="application/json">{json.dumps(state)}</script>')
+
+
+def search_fetcher(last_page, prefetch, initial_rate):
+    # Hôte propre à chaque test: le débit adaptatif est partagé par hôte dans le processus
+    host = f"https://prefetch-{prefetch}-{last_page}-{initial_rate}.test"
+    config = EngineConfig(base_url=host, search_url=f"{host}/e/recherche/associations", search_prefetch=prefetch,
+                          initial_rate=initial_rate, max_rate=initial_rate, warmup_probability=0)
+    fetcher = Fetcher(config)
+    fetcher._session = SearchSession(last_page)
+    # Pas de pause « humaine » entre deux pages
+    fetcher.wait = lambda seconds, reason="politeness": None
+    return fetcher
+
+
+def prefetch_outcomes():
+    return {outcome: metrics.SEARCH_PREFETCH.value(outcome=outcome) for outcome in ("used", "wasted", "cancelled")}
+
+
+def test_prefetch_keeps_page_order():
+    fetcher = search_fetcher(last_page=6, prefetch=4, initial_rate=1000.0)
+    links = get_all_association_links(fetcher, "asso")
+    assert links == [f"{fetcher.config.base_url}/associations/asso-{page}-{i}" for page in range(1, 7) for i in range(5)]
+
+
+def test_early_end_cancels_pages_not_yet_sent():
+    before = prefetch_outcomes()
+    # 10 requêtes/s: les pages 3 à 7 (fenêtre de 6 glissée d'une page) attendent encore leur créneau
+    # quand la page 2 signale la fin
+    fetcher = search_fetcher(last_page=2, prefetch=6, initial_rate=10.0)
+    found = []
+    total = crawl_association_links(fetcher, "asso", lambda links: found.extend(links) or len(links))
+    assert total == 10 and len(found) == 10
+    after = prefetch_outcomes()
+    assert after["used"] - before["used"] == 2
+    assert (after["wasted"] - before["wasted"]) + (after["cancelled"] - before["cancelled"]) == 5
+    assert after["cancelled"] - before["cancelled"] >= 3
+    requested = fetcher._session.requested
+    assert sorted(requested)[:2] == [1, 2]
+    assert len(requested) < 7
+    # Aucune requête ne part après l'annulation (threads du préchargement terminés)
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith("search-prefetch")]
+
+
+def test_limit_stops_pagination_and_cancels_the_window():
+    before = prefetch_outcomes()
+    fetcher = search_fetcher(last_page=50, prefetch=4, initial_rate=10.0)
+    found = []
+    crawl_association_links(fetcher, "asso", lambda links: found.extend(links) or len(links), limit=5)
+    assert len(found) == 5
+    after = prefetch_outcomes()
+    assert after["used"] - before["used"] == 1
+    assert (after["wasted"] - before["wasted"]) + (after["cancelled"] - before["cancelled"]) == 3
+    assert after["cancelled"] - before["cancelled"] >= 1
+    assert len(fetcher._session.requested) < 4
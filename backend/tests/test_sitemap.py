@@ -0,0 +1,176 @@
+"""Lecture incrémentale des sitemaps (XMLPullParser) et découverte des associations, sans réseau"""
+import gzip
+
+import pytest
+
+from helloscraper import EngineConfig, LastmodIndex, get_sitemap_association_links
+from helloscraper import sitemap
+from helloscraper.sitemap import parse_lastmod, parse_sitemap, slug_matches, XMLPullParser
+
+BASE_URL = "https://www.helloasso.com"
+NAMESPACE = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def urlset(*entries):
+    urls = "".join(f"<url><loc>{loc}</loc>{f'<lastmod>{lastmod}</lastmod>' if lastmod else ''}</url>"
+                   for loc, lastmod in entries)
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset {NAMESPACE}>{urls}</urlset>'.encode()
+
+
+def sitemapindex(*entries):
+    sitemaps = "".join(f"<sitemap><loc>{loc}</loc><lastmod>{lastmod}</lastmod></sitemap>" for loc, lastmod in entries)
+    return f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex {NAMESPACE}>{sitemaps}</sitemapindex>'.encode()
+
+
+class StubResponse:
+    """Réponse lue en flux: le corps n'est accessible que par tranches (iter_content)"""
+
+    def __init__(self, body):
+        self.body = body
+        self.headers = {}
+        self.chunk_sizes = []
+        self.closed = False
+
+    @property
+    def content(self):
+        raise AssertionError("sitemap lu en entier au lieu d'être lu en flux")
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            self.chunk_sizes.append(chunk_size)
+            yield self.body[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class StubFetcher:
+    """Sert des sitemaps en mémoire et compte les téléchargements"""
+
+    def __init__(self, pages):
+        self.config = EngineConfig(base_url=BASE_URL, sitemap_url=f"{BASE_URL}/sitemap.xml")
+        self.pages = pages
+        self.requested = []
+        self.responses = []
+
+    def get(self, url, params=None, stream=False):
+        assert stream
+        self.requested.append(url)
+        if url not in self.pages:
+            return None
+        self.responses.append(StubResponse(self.pages[url]))
+        return self.responses[-1]
+
+
+def test_urlset_entries_with_lastmod():
+    entries = list(parse_sitemap(urlset(
+        (f"{BASE_URL}/associations/club-echecs", "2024-05-01"),
+        (f"{BASE_URL}/associations/chorale", "2024-05-01T10:00:00+02:00"),
+        (f"{BASE_URL}/associations/sans-date", None),
+    )))
+    assert [entry.loc for entry in entries] == [
+        f"{BASE_URL}/associations/club-echecs", f"{BASE_URL}/associations/chorale", f"{BASE_URL}/associations/sans-date"]
+    assert entries[0].lastmod == parse_lastmod("2024-05-01T00:00:00Z")
+    assert entries[1].lastmod == parse_lastmod("2024-05-01T08:00:00Z")
+    assert entries[2].lastmod is None
+
+
+def test_large_gzipped_urlset_is_parsed_in_chunks(monkeypatch):
+    monkeypatch.setattr(sitemap, "CHUNK_SIZE", 256)
+    body = gzip.compress(urlset(*((f"{BASE_URL}/associations/asso-{i}", "2024-01-01") for i in range(2000))))
+    entries = list(parse_sitemap(body))
+    assert len(entries) == 2000
+    assert entries[-1].loc == f"{BASE_URL}/associations/asso-1999"
+
+
+def test_sitemap_index_entries():
+    entries = list(parse_sitemap(sitemapindex((f"{BASE_URL}/sitemap-associations-1.xml", "2024-05-01"))))
+    assert [(entry.loc, entry.lastmod) for entry in entries] == [
+        (f"{BASE_URL}/sitemap-associations-1.xml", parse_lastmod("2024-05-01"))]
+
+
+@pytest.mark.parametrize("value", [None, "", "hier", "2024-13-45"])
+def test_invalid_lastmod(value):
+    assert parse_lastmod(value) is None
+
+
+def test_slug_matches_whole_words_without_accents():
+    assert slug_matches("club-d-echecs-de-lyon", "Échecs Lyon")
+    assert not slug_matches("club-d-echecs-de-lyonnais", "lyon")
+    assert slug_matches("n-importe-quoi", "*")
+
+
+def make_site():
+    return StubFetcher({
+        f"{BASE_URL}/sitemap.xml": sitemapindex(
+            (f"{BASE_URL}/sitemap-associations-1.xml.gz", "2024-05-01"),
+            (f"{BASE_URL}/sitemap-associations-2.xml", "2024-05-01"),
+            (f"{BASE_URL}/sitemap-events.xml", "2024-05-01"),
+        ),
+        f"{BASE_URL}/sitemap-associations-1.xml.gz": gzip.compress(urlset(
+            (f"{BASE_URL}/associations/club-echecs-lyon", "2024-04-01"),
+            (f"{BASE_URL}/associations/club-echecs-lyon/paiement", "2024-04-01"),
+            (f"{BASE_URL}/associations/chorale-paris", "2024-04-01"),
+        )),
+        f"{BASE_URL}/sitemap-associations-2.xml": urlset(
+            (f"{BASE_URL}/associations/echecs-et-mat", "2024-04-01"),
+            ("https://ailleurs.example/associations/echecs", "2024-04-01"),
+        ),
+    })
+
+
+class RecordingParser(XMLPullParser):
+    fed = []
+
+    def feed(self, data):
+        RecordingParser.fed.append(len(data))
+        super().feed(data)
+
+
+def test_sitemap_is_streamed_to_the_parser_in_chunks(monkeypatch):
+    monkeypatch.setattr(sitemap, "CHUNK_SIZE", 1024)
+    monkeypatch.setattr(sitemap, "XMLPullParser", RecordingParser)
+    RecordingParser.fed = []
+    # Corps très compressible: décompressé d'un bloc, il dépasserait largement une tranche
+    body = gzip.compress(urlset(*((f"{BASE_URL}/associations/asso-{i}", "2024-01-01") for i in range(3000))))
+    fetcher = StubFetcher({f"{BASE_URL}/sitemap.xml": body})
+
+    links = get_sitemap_association_links(fetcher, "asso")
+    assert len(links) == 3000
+    response, = fetcher.responses
+    assert response.chunk_sizes and set(response.chunk_sizes) == {1024}
+    assert response.closed
+    assert len(RecordingParser.fed) > 100
+    assert max(RecordingParser.fed) <= 1024
+
+
+def test_stopping_early_closes_the_response():
+    fetcher = make_site()
+    entries = sitemap.iter_sitemap_entries(fetcher, f"{BASE_URL}/sitemap-associations-2.xml")
+    next(entries)
+    entries.close()
+    assert fetcher.responses[0].closed
+
+
+def test_index_is_followed_and_slugs_filtered():
+    fetcher = make_site()
+    links = get_sitemap_association_links(fetcher, "echecs")
+    assert links == [f"{BASE_URL}/associations/club-echecs-lyon", f"{BASE_URL}/associations/echecs-et-mat"]
+    # Seuls les sitemaps d'associations de l'index sont suivis
+    assert f"{BASE_URL}/sitemap-events.xml" not in fetcher.requested
+
+
+def test_lastmod_index_skips_unchanged_sitemaps_and_pages(tmp_path):
+    index = LastmodIndex(str(tmp_path / "lastmod.db"))
+    try:
+        fetcher = make_site()
+        first = get_sitemap_association_links(fetcher, "*", index=index)
+        assert len(first) == 3
+        for url in first:
+            index.mark_scraped(url)
+
+        fetcher = make_site()
+        assert get_sitemap_association_links(fetcher, "*", index=index) == []
+        assert fetcher.requested == [f"{BASE_URL}/sitemap.xml"]
+    finally:
+        index.close()
@@ -0,0 +1,69 @@
+"""Transport HTTP/2: pool de connexions partagé, cookies propres à chaque Fetcher (sans réseau)"""
+import itertools
+from http.cookies import SimpleCookie
+
+import pytest
+
+from helloscraper import EngineConfig, Fetcher
+from helloscraper import transport
+
+httpx = pytest.importorskip("httpx")
+if not transport.HTTP2_AVAILABLE:
+    pytest.skip("httpx[http2] n'est pas installé", allow_module_level=True)
+
+_hosts = itertools.count()
+
+
+def cookies_sent(request):
+    cookie = SimpleCookie(request.headers.get("Cookie", ""))
+    return {name: morsel.value for name, morsel in cookie.items()}
+
+
+@pytest.fixture
+def shared_pool(monkeypatch):
+    """Pool partagé simulé: chaque réponse pose un cookie propre à la requête (?job=...)"""
+    received = []
+
+    def handler(request):
+        received.append(cookies_sent(request))
+        return httpx.Response(200, headers={"Set-Cookie": f"job={request.url.params['job']}; Path=/"},
+                              text="<html></html>")
+
+    pool = httpx.MockTransport(handler)
+    monkeypatch.setattr(transport, "_http2_transports", {False: pool})
+    return pool, received
+
+
+def make_fetcher():
+    host = f"https://transport-{next(_hosts)}.test"
+    config = EngineConfig(base_url=host, http2=True, warmup_probability=0, initial_rate=1000.0, max_rate=1000.0)
+    fetcher = Fetcher(config)
+    fetcher.wait = lambda seconds, reason="politeness": None
+    return fetcher, f"{host}/page"
+
+
+def test_fetchers_share_the_pool_but_not_their_cookies(shared_pool):
+    pool, received = shared_pool
+    first, first_url = make_fetcher()
+    second, second_url = make_fetcher()
+    assert first.session.client._transport is pool and second.session.client._transport is pool
+
+    assert first.get(first_url, params={"job": "a"}).status_code == 200
+    assert second.get(second_url, params={"job": "b"}).status_code == 200
+    assert first.get(first_url, params={"job": "a"}).status_code == 200
+
+    # Cookies aléatoires propres à chaque Fetcher, jamais écrasés par ceux de l'autre
+    assert received[0]["session_id"] != received[1]["session_id"]
+    assert received[2]["session_id"] == received[0]["session_id"]
+    # Cookie posé par le serveur: renvoyé au seul Fetcher qui l'a reçu
+    assert "job" not in received[1]
+    assert received[2]["job"] == "a"
+
+
+def test_fork_keeps_the_cookies_of_its_job(shared_pool):
+    _, received = shared_pool
+    fetcher, url = make_fetcher()
+    fetcher.get(url, params={"job": "a"})
+    fetcher.fork().get(url, params={"job": "a"})
+    assert received[1]["session_id"] == received[0]["session_id"]
+    assert received[1]["job"] == "a"
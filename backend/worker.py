@@ -0,0 +1,73 @@
+"""
+Worker de scraping autonome
+Traite les associations publiées dans une frontière partagée (SQLite ou Redis)
+par l'API, pour répartir un job sur plusieurs processus ou machines.
+
+Usage:
+    python worker.py --frontier redis://hote:6379/0              # sert tous les jobs actifs
+    python worker.py --frontier sqlite:///results/frontier.db --job <job_id>
+"""
+import os
+import time
+import logging
+import argparse
+from urllib.parse import urlparse
+
+from frontier import open_frontier, make_worker_id, run_worker
+from helloscraper import EngineConfig, Fetcher, get_association_details
+
+
+def run_job(frontier, fetcher, job_id: str, worker_id: str, idle_timeout: float) -> int:
+    # Le worker n'utilise que le moteur: ni exports (pyarrow, rapport HTML) ni API à importer
+    def process_url(url):
+        print(f"📊 {url}")
+        return get_association_details(fetcher, url)
+
+    return run_worker(
+        frontier,
+        job_id,
+        worker_id,
+        process_url,
+        politeness_key=urlparse(fetcher.config.base_url).netloc,
+        politeness_interval=fetcher.config.politeness_interval,
+        idle_timeout=idle_timeout
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de scraping HelloAsso sur frontière partagée")
+    parser.add_argument("--frontier", default=os.getenv("FRONTIER_URL"),
+                        help="URL de la frontière (sqlite:///chemin.db ou redis://hote:port/db)")
+    parser.add_argument("--job", help="Ne traiter que ce job (sinon, tous les jobs actifs)")
+    parser.add_argument("--idle-timeout", type=float, default=30,
+                        help="Secondes d'inactivité avant de considérer un job terminé")
+    parser.add_argument("--poll-interval", type=float, default=5,
+                        help="Secondes entre deux recherches de jobs actifs")
+    args = parser.parse_args()
+
+    if not args.frontier:
+        parser.error("--frontier (ou la variable FRONTIER_URL) est requis")
+
+    # Avertissements du moteur (erreurs HTTP, nouvelles tentatives) sur la console
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    frontier = open_frontier(args.frontier)
+    # Disjoncteur ouvert: la pause est publiée dans la frontière pour tous les workers
+    fetcher = Fetcher(EngineConfig.from_env(), on_circuit_open=frontier.hold)
+    worker_id = make_worker_id()
+    print(f"👷 Worker {worker_id} démarré sur {args.frontier}")
+
+    if args.job:
+        processed = run_job(frontier, fetcher, args.job, worker_id, args.idle_timeout)
+        print(f"✅ {processed} associations traitées pour le job {args.job}")
+        return
+
+    while True:
+        for job_id in frontier.active_jobs():
+            print(f"📋 Job {job_id}")
+            processed = run_job(frontier, fetcher, job_id, worker_id, idle_timeout=0)
+            print(f"✅ {processed} associations traitées pour le job {job_id}")
+        time.sleep(args.poll_interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Corpus de pages pour le serveur de rejeu
+- generate_corpus: corpus synthétique réaliste (aucun accès réseau)
+- record_corpus: enregistre de vraies pages de recherche et d'associations
+
+Structure d'un corpus:
+    index.json              {"pages": N, "slugs": [...]}
+    search/<page>.html      pages de résultats de recherche (1..N)
+    associations/<slug>.html
+"""
+import os
+import re
+import sys
+import json
+import random
+import base64
+import argparse
+
+CITIES = [
+    ("75005", "Paris"), ("69007", "Lyon"), ("13001", "Marseille"), ("31000", "Toulouse"),
+    ("33000", "Bordeaux"), ("59000", "Lille"), ("44000", "Nantes"), ("67000", "Strasbourg"),
+    ("34000", "Montpellier"), ("35000", "Rennes"), ("38000", "Grenoble"), ("06000", "Nice"),
+]
+KINDS = ["BDE", "BDS", "BDA", "Club", "Association Humanitaire", "Chorale", "Junior Entreprise"]
+SCHOOLS = ["Sciences", "Médecine", "Droit", "Ingénieurs", "Commerce", "Lettres", "Arts"]
+
+
+def _devalue(root):
+    """Sérialise `root` au format devalue de Nuxt 3 (__NUXT_DATA__): tableau plat de valeurs référencées par indice"""
+    values = []
+
+    def flatten(value):
+        index = len(values)
+        values.append(None)
+        if isinstance(value, tuple):  # type spécial: ("ShallowReactive", valeur), ("Set", valeurs...)
+            values[index] = [value[0]] + [flatten(child) for child in value[1:]]
+        elif isinstance(value, dict):
+            values[index] = {key: flatten(child) for key, child in value.items()}
+        elif isinstance(value, list):
+            values[index] = [flatten(child) for child in value]
+        else:
+            values[index] = value
+        return index
+
+    flatten(root)
+    return values
+
+
+def _search_page(slugs, page, last_page, hydration=True):
+    cards = "\n".join(
+        f"""<div class="association-card"><a href="/associations/{slug}">
+            <h3>{slug.replace('-', ' ').title()}</h3></a><p>Association étudiante</p></div>"""
+        for slug in slugs
+    )
+    disabled = " disabled" if page >= last_page else ""
+    payload = ""
+    if hydration:
+        # État d'hydratation de Nuxt 3, comme sur le site: résultats et pagination de la recherche
+        state = {"data": ("ShallowReactive", {f"search-{page}": {
+            "items": [{"name": slug.replace('-', ' ').title(), "url": f"https://www.helloasso.com/associations/{slug}",
+                       "city": CITIES[i % len(CITIES)][1], "zipCode": CITIES[i % len(CITIES)][0],
+                       "category": "Association étudiante"} for i, slug in enumerate(slugs)],
+            "pagination": {"pageIndex": page, "totalPages": last_page, "pageSize": len(slugs)},
+        }}), "state": ("ShallowReactive", {}), "once": ("Set",), "serverRendered": True}
+        payload = f'<script type="application/json" id="__NUXT_DATA__" data-ssr="true">{json.dumps(_devalue(state), ensure_ascii=False)}</script>'
+    return f"""<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8">
+<title>Recherche d'associations - page {page}</title>
+<script>window.__APP_CONFIG__ = {{"page": {page}, "locale": "fr"}};</script>
+</head><body><main><section class="results">{cards}</section>
+<nav class="pagination" aria-label="pagination">
+<a class="pagination__prev" href="?page={max(page - 1, 1)}">Précédent</a>
+<a class="pagination__next{disabled}" href="?page={page + 1}">Suivant</a>
+</nav></main>{payload}</body></html>"""
+
+
+def _association_page(rng, slug, index):
+    postal_code, city = rng.choice(CITIES)
+    kind = rng.choice(KINDS)
+    name = f"{kind} {rng.choice(SCHOOLS)} {city} {index}"
+    email = f"contact@{slug}.fr"
+    phone = "0{} {:02d} {:02d} {:02d} {:02d}".format(rng.randint(1, 9), *(rng.randint(0, 99) for _ in range(4)))
+    prices = [rng.choice([5, 8, 10, 12.5, 15, 20, 25, 35, 50]) for _ in range(rng.randint(0, 6))]
+    events = "\n".join(
+        f"""<div class="campaign-card"><h4>Événement {i + 1}</h4>
+            <span class="campaign-card__price">{price:.2f} €</span></div>"""
+        for i, price in enumerate(prices)
+    )
+    # Les vraies pages embarquent des bundles JS et des images en base64 volumineux
+    blob = base64.b64encode(rng.randbytes(rng.randint(20_000, 60_000))).decode("ascii")
+    bundle = "var a=" + json.dumps([rng.random() for _ in range(500)]) + ";"
+    has_contact = rng.random() < 0.7
+    contact = f"""<section class="organization-contact"><h2>Coordonnées</h2>
+        <div itemprop="address">{rng.randint(1, 120)} rue de l'Université, {postal_code} {city}</div>
+        {f'<a href="mailto:{email}">{email}</a>' if has_contact else ''}
+        {f'<a href="tel:{phone.replace(" ", "")}">{phone}</a>' if has_contact else ''}
+    </section>"""
+    json_ld = json.dumps({
+        "@context": "https://schema.org", "@type": "Organization", "name": name,
+        "address": {"streetAddress": "rue de l'Université", "postalCode": postal_code, "addressLocality": city},
+    }, ensure_ascii=False)
+    return f"""<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8">
+<title>{name} | HelloAsso</title>
+<meta name="description" content="{name}, association étudiante de {city}.">
+<style>.organization-header{{color:#333}} .campaign-card{{padding:1em}}</style>
+<script type="application/ld+json">{json_ld}</script>
+<script>{bundle}</script>
+</head><body>
+<header class="organization-header"><h1>{name}</h1></header>
+<main><section><h2>À propos</h2><p>Le {kind} de {city} organise des événements toute l'année.</p></section>
+{contact}
+<section class="organization-campaigns">{events}</section>
+<img src="data:image/png;base64,{blob}" alt="logo"></main>
+</body></html>"""
+
+
+def generate_corpus(directory, count=200, per_page=20, seed=0, hydration=True):
+    """
+    Génère un corpus synthétique de `count` associations réparties sur des pages de recherche
+    `hydration=False`: pages de recherche sans état JSON embarqué (mesure du repli DOM)
+    """
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(directory, "search"), exist_ok=True)
+    os.makedirs(os.path.join(directory, "associations"), exist_ok=True)
+
+    slugs = [f"association-{i:05d}" for i in range(count)]
+    pages = max(1, (count + per_page - 1) // per_page)
+    for page in range(1, pages + 1):
+        page_slugs = slugs[(page - 1) * per_page:page * per_page]
+        with open(os.path.join(directory, "search", f"{page}.html"), "w", encoding="utf-8") as f:
+            f.write(_search_page(page_slugs, page, pages, hydration))
+
+    for index, slug in enumerate(slugs):
+        with open(os.path.join(directory, "associations", f"{slug}.html"), "w", encoding="utf-8") as f:
+            f.write(_association_page(rng, slug, index))
+
+    with open(os.path.join(directory, "index.json"), "w", encoding="utf-8") as f:
+        json.dump({"pages": pages, "slugs": slugs, "synthetic": True}, f)
+    return directory
+
+
+def record_corpus(directory, term, max_pages=5, max_associations=100):
+    """Enregistre de vraies pages HelloAsso (au débit adaptatif du moteur)"""
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+    from scraper_wrapper import ScraperWrapper, SEARCH_URL
+    from helloscraper.charset import decode_page
+
+    scraper = ScraperWrapper(url=SEARCH_URL, date_debut=None, date_fin=None, search_term=term,
+                             job_id="record", results_dir=directory)
+    os.makedirs(os.path.join(directory, "search"), exist_ok=True)
+    os.makedirs(os.path.join(directory, "associations"), exist_ok=True)
+
+    slugs = []
+    pages = 0
+    for page in range(1, max_pages + 1):
+        response = scraper.fetcher.get(SEARCH_URL, {"query": term, "page": page})
+        if not response:
+            break
+        html = decode_page(response, SEARCH_URL)
+        with open(os.path.join(directory, "search", f"{page}.html"), "w", encoding="utf-8") as f:
+            f.write(html)
+        pages = page
+        for href in set(re.findall(r'href=["\']/associations/([^"\'/?#]+)["\']', html)):
+            if href not in slugs:
+                slugs.append(href)
+
+    for slug in slugs[:max_associations]:
+        url = f"https://www.helloasso.com/associations/{slug}"
+        response = scraper.fetcher.get(url)
+        if response:
+            with open(os.path.join(directory, "associations", f"{slug}.html"), "w", encoding="utf-8") as f:
+                f.write(decode_page(response, url))
+
+    with open(os.path.join(directory, "index.json"), "w", encoding="utf-8") as f:
+        json.dump({"pages": pages, "slugs": slugs[:max_associations], "synthetic": False, "term": term}, f)
+    return directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Création d'un corpus pour le serveur de rejeu")
+    parser.add_argument("directory")
+    parser.add_argument("--count", type=int, default=200, help="Nombre d'associations (corpus synthétique)")
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--record", metavar="TERME", help="Enregistrer de vraies pages pour ce terme de recherche")
+    parser.add_argument("--max-pages", type=int, default=5)
+    parser.add_argument("--no-hydration", action="store_true", help="Pages de recherche sans état JSON embarqué")
+    args = parser.parse_args()
+
+    if args.record:
+        record_corpus(args.directory, args.record, max_pages=args.max_pages, max_associations=args.count)
+    else:
+        generate_corpus(args.directory, count=args.count, per_page=args.per_page, seed=args.seed,
+                        hydration=not args.no_hydration)
+    print(f"Corpus écrit dans {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
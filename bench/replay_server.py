@@ -0,0 +1,352 @@
+"""
+Serveur local de rejeu d'un corpus HelloAsso
+Sert les pages de recherche et d'associations enregistrées, avec latence
+et injection d'erreurs (403/429/500) configurables, en HTTP/1.1 ou en HTTP/2 en clair
+(h2c avec connaissance préalable, nécessite le paquet h2).
+Avec --compress, les pages sont compressées selon l'Accept-Encoding du client (zstd, br, gzip),
+comme le ferait le CDN de HelloAsso.
+Les associations sont aussi listées dans des sitemaps: /sitemap.xml (index) et
+/sitemaps/associations-<n>.xml.gz (gzip, avec <lastmod>).
+
+Usage:
+    python bench/replay_server.py bench/corpus --port 8765 --latency-ms 80 --error-rate 0.05
+    python bench/replay_server.py bench/corpus --port 8766 --http2
+    python bench/replay_server.py bench/corpus --port 8765 --compress
+"""
+import os
+import gzip
+import datetime
+import json
+import time
+import random
+import argparse
+import threading
+import socketserver
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Associations par sitemap enfant
+SITEMAP_CHUNK = 50
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+HOMEPAGE = b"<!DOCTYPE html><html><head><title>HelloAsso</title></head><body><h1>HelloAsso</h1></body></html>"
+
+
+class ReplayServer:
+    """Serveur HTTP de rejeu, démarré dans un thread"""
+
+    def __init__(self, corpus_dir, host="127.0.0.1", port=0, latency_ms=0.0, jitter_ms=0.0,
+                 error_rate=0.0, error_codes=(403, 429, 500), seed=0, http2=False, compress=False):
+        self.corpus_dir = corpus_dir
+        self.http2 = http2
+        self.compress = compress
+        # Corps compressés, par (encodage, corps): le coût de compression n'entre pas dans les mesures
+        self._compressed = {}
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_codes = tuple(error_codes)
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.stats = Counter()
+        self.bytes_sent = 0
+        self.connections = 0
+
+        with open(os.path.join(corpus_dir, "index.json"), encoding="utf-8") as f:
+            self.index = json.load(f)
+
+        # Le corpus est chargé une fois en mémoire pour ne mesurer que le client
+        self.search_pages = {}
+        for page in range(1, self.index["pages"] + 1):
+            with open(os.path.join(corpus_dir, "search", f"{page}.html"), "rb") as f:
+                self.search_pages[page] = f.read()
+        self.associations = {}
+        for slug in self.index["slugs"]:
+            path = os.path.join(corpus_dir, "associations", f"{slug}.html")
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    self.associations[slug] = f.read()
+        # Date de dernière modification de chaque association (sitemaps), modifiable avec touch()
+        self.lastmod = {slug: datetime.date(2024, 1, 1) + datetime.timedelta(days=i % 300)
+                        for i, slug in enumerate(self.associations)}
+        self._sitemaps = None
+
+        if http2:
+            self.httpd = socketserver.ThreadingTCPServer((host, port), self._make_h2_handler())
+        else:
+            self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def search_url(self):
+        return f"{self.base_url}/e/recherche/associations"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_stats(self):
+        self.stats.clear()
+        self.bytes_sent = 0
+        self.connections = 0
+
+    def _draw(self):
+        """Tire la latence et l'éventuelle erreur injectée pour une requête"""
+        with self._rng_lock:
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            error = self._rng.choice(self.error_codes) if self._rng.random() < self.error_rate else None
+        return delay, error
+
+    @property
+    def sitemap_url(self):
+        return f"{self.base_url}/sitemap.xml"
+
+    def touch(self, slugs, day=datetime.date(2025, 1, 1)):
+        """Simule la modification de pages: leur <lastmod> (et celui de leur sitemap) passe à `day`"""
+        for slug in slugs:
+            self.lastmod[slug] = day
+        self._sitemaps = None
+
+    def _build_sitemaps(self):
+        """Index + sitemaps enfants gzippés, construits à la première requête (l'URL de base dépend du port)"""
+        slugs = list(self.associations)
+        children = {}
+        entries = []
+        for number, start in enumerate(range(0, len(slugs), SITEMAP_CHUNK), 1):
+            chunk = slugs[start:start + SITEMAP_CHUNK]
+            urls = "".join(f"<url><loc>{self.base_url}/associations/{slug}</loc>"
+                           f"<lastmod>{self.lastmod[slug].isoformat()}</lastmod></url>" for slug in chunk)
+            xml = f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="{SITEMAP_NS}">{urls}</urlset>'
+            name = f"associations-{number}.xml.gz"
+            children[f"/sitemaps/{name}"] = gzip.compress(xml.encode("utf-8"), mtime=0)
+            lastmod = max(self.lastmod[slug] for slug in chunk)
+            entries.append(f"<sitemap><loc>{self.base_url}/sitemaps/{name}</loc>"
+                           f"<lastmod>{lastmod.isoformat()}</lastmod></sitemap>")
+        index = f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex xmlns="{SITEMAP_NS}">{"".join(entries)}</sitemapindex>'
+        children["/sitemap.xml"] = index.encode("utf-8")
+        return children
+
+    def _empty_search_page(self, page):
+        return (f"""<!DOCTYPE html><html><body><main><section class="results"></section>
+<nav class="pagination" aria-label="pagination"><a class="pagination__next disabled" href="?page={page + 1}">Suivant</a></nav>
+</main></body></html>""").encode("utf-8")
+
+    def route(self, path, query):
+        """Retourne (status, body) pour une requête GET"""
+        if path in ("", "/"):
+            return 200, HOMEPAGE
+        if path.rstrip("/") == "/e/recherche/associations":
+            try:
+                page = int((query.get("page") or ["1"])[0])
+            except ValueError:
+                page = 1
+            return 200, self.search_pages.get(page) or self._empty_search_page(page)
+        if path == "/sitemap.xml" or path.startswith("/sitemaps/"):
+            if self._sitemaps is None:
+                self._sitemaps = self._build_sitemaps()
+            body = self._sitemaps.get(path)
+            return (200, body) if body is not None else (404, b"Not found")
+        if path.startswith("/associations/"):
+            slug = path[len("/associations/"):].strip("/")
+            body = self.associations.get(slug)
+            return (200, body) if body is not None else (404, b"Not found")
+        return 404, b"Not found"
+
+    def encode(self, body, accept_encoding):
+        """Compresse `body` selon l'Accept-Encoding du client si --compress; retourne (body, encoding ou None)"""
+        if not self.compress or len(body) < 256:
+            return body, None
+        accepted = {value.split(";")[0].strip().lower() for value in (accept_encoding or "").split(",")}
+        for encoding, available in (("zstd", zstandard), ("br", brotli), ("gzip", gzip)):
+            if encoding in accepted and available is not None:
+                key = (encoding, body)
+                compressed = self._compressed.get(key)
+                if compressed is None:
+                    if encoding == "zstd":
+                        compressed = zstandard.ZstdCompressor().compress(body)
+                    elif encoding == "br":
+                        compressed = brotli.compress(body, quality=5)
+                    else:
+                        compressed = gzip.compress(body, compresslevel=6)
+                    self._compressed[key] = compressed
+                return compressed, encoding
+        return body, None
+
+    def respond(self, target, accept_encoding=None):
+        """Latence, erreur injectée et routage d'une requête GET; retourne (status, body, encoding)"""
+        delay, error = self._draw()
+        if delay:
+            time.sleep(delay)
+
+        parsed = urlparse(target)
+        if error:
+            status, body = error, f"Injected {error}".encode("ascii")
+        else:
+            status, body = self.route(parsed.path, parse_qs(parsed.query))
+
+        body, encoding = self.encode(body, accept_encoding)
+        self.stats[status] += 1
+        self.bytes_sent += len(body)
+        return status, body, encoding
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Évite les attentes de 40 ms (Nagle + ACK retardé) sur les connexions keep-alive
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                server.connections += 1
+
+            def do_GET(self):
+                status, body, encoding = server.respond(self.path, self.headers.get("Accept-Encoding"))
+
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                if encoding:
+                    self.send_header("Content-Encoding", encoding)
+                self.send_header("Content-Length", str(len(body)))
+                if status == 429:
+                    self.send_header("Retry-After", "1")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _make_h2_handler(self):
+        """Connexion HTTP/2: chaque flux est servi dans son propre thread (multiplexage réel)"""
+        import socket
+        from h2.config import H2Configuration
+        from h2.connection import H2Connection
+        from h2.events import RequestReceived, WindowUpdated, ConnectionTerminated
+
+        server = self
+
+        class H2Handler(socketserver.BaseRequestHandler):
+
+            def handle(self):
+                server.connections += 1
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self.conn = H2Connection(config=H2Configuration(client_side=False, header_encoding="utf-8"))
+                # Verrou des écritures; la condition réveille les flux bloqués par le contrôle de flux
+                self.lock = threading.Condition()
+                with self.lock:
+                    self.conn.initiate_connection()
+                    self.request.sendall(self.conn.data_to_send())
+
+                while True:
+                    try:
+                        data = self.request.recv(65535)
+                    except OSError:
+                        break
+                    if not data:
+                        break
+                    with self.lock:
+                        events = self.conn.receive_data(data)
+                        self.request.sendall(self.conn.data_to_send())
+                        if any(isinstance(event, WindowUpdated) for event in events):
+                            self.lock.notify_all()
+                    for event in events:
+                        if isinstance(event, RequestReceived):
+                            headers = dict(event.headers)
+                            threading.Thread(target=self.serve_stream,
+                                             args=(event.stream_id, headers.get(":path", "/"),
+                                                   headers.get("accept-encoding")),
+                                             daemon=True).start()
+                        elif isinstance(event, ConnectionTerminated):
+                            return
+
+            def serve_stream(self, stream_id, target, accept_encoding):
+                status, body, encoding = server.respond(target, accept_encoding)
+                headers = [(":status", str(status)), ("content-type", "text/html; charset=utf-8"),
+                           ("content-length", str(len(body)))]
+                if encoding:
+                    headers.append(("content-encoding", encoding))
+                if status == 429:
+                    headers.append(("retry-after", "1"))
+                try:
+                    with self.lock:
+                        self.conn.send_headers(stream_id, headers, end_stream=not body)
+                        self.request.sendall(self.conn.data_to_send())
+                        offset = 0
+                        while offset < len(body):
+                            window = min(self.conn.local_flow_control_window(stream_id),
+                                         self.conn.max_outbound_frame_size)
+                            if window <= 0:
+                                self.lock.wait(timeout=1.0)
+                                continue
+                            chunk = body[offset:offset + window]
+                            offset += len(chunk)
+                            self.conn.send_data(stream_id, chunk, end_stream=offset >= len(body))
+                            self.request.sendall(self.conn.data_to_send())
+                except Exception:
+                    pass  # Client déconnecté ou flux annulé
+
+        return H2Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur de rejeu du corpus HelloAsso")
+    parser.add_argument("corpus")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0, help="Proportion de requêtes en erreur (0-1)")
+    parser.add_argument("--error-codes", default="403,429,500")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--http2", action="store_true", help="HTTP/2 en clair (h2c, connaissance préalable)")
+    parser.add_argument("--compress", action="store_true", help="Compresser les pages selon Accept-Encoding")
+    args = parser.parse_args()
+
+    server = ReplayServer(
+        args.corpus, host=args.host, port=args.port,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, error_codes=[int(c) for c in args.error_codes.split(",") if c],
+        seed=args.seed, http2=args.http2, compress=args.compress
+    )
+    print(f"Serveur de rejeu sur {server.base_url} ({len(server.associations)} associations, {len(server.search_pages)} pages)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,548 @@
+"""
+Benchmark hors-ligne du pipeline de scraping complet
+Mesure, contre le serveur de rejeu local (sans réseau ni délais aléatoires):
+- pages/s et temps de bout en bout de scraper.main (CLI) et ScraperWrapper.run (API)
+- temps de parsing/extraction par page (ms)
+- pic mémoire (tracemalloc)
+
+Usage:
+    python bench/run_bench.py                                   # corpus synthétique de 200 associations
+    python bench/run_bench.py --corpus bench/corpus --latency-ms 50 --error-rate 0.05
+    python bench/run_bench.py --json bench_output.json --compare baseline.json
+    python bench/run_bench.py --transport --latency-ms 50 --concurrency 8   # HTTP/1.1 vs HTTP/2 (h2c)
+    python bench/run_bench.py --compress                        # pages compressées selon Accept-Encoding
+    python bench/run_bench.py --discovery sitemap --term "*"    # découverte par les sitemaps (CLI)
+"""
+import os
+import sys
+import csv
+import re
+import json
+import time
+import types
+import shutil
+import asyncio
+import logging
+import argparse
+import builtins
+import threading
+import tempfile
+import statistics
+import contextlib
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path[:0] = [BENCH_DIR, ROOT_DIR, os.path.join(ROOT_DIR, "backend")]
+
+from corpus import generate_corpus
+from replay_server import ReplayServer
+
+# Métriques comparées avec --compare: (chemin, True si une valeur plus haute est meilleure)
+TRACKED_METRICS = [
+    ("cli.pages_per_s", True),
+    ("cli.wall_s", False),
+    ("wrapper.pages_per_s", True),
+    ("wrapper.wall_s", False),
+    ("parse.cli.ms_per_page", False),
+    ("parse.wrapper.ms_per_page", False),
+    ("parse.search_json.ms_per_page", False),
+    ("parse.search_dom.ms_per_page", False),
+]
+
+
+class FakeResponse:
+    """Réponse minimale pour mesurer le parsing sans passer par le réseau"""
+
+    def __init__(self, body: bytes):
+        self.content = body
+        self.text = body.decode("utf-8")
+        self.status_code = 200
+        self.headers = {"Content-Type": "text/html; charset=utf-8"}
+        self.encoding = "utf-8"
+
+
+class StubFetcher:
+    """Fetcher du moteur qui sert une réponse fixe: mesure l'extraction sans réseau"""
+
+    def __init__(self, config, response=None):
+        self.config = config
+        self.response = response
+
+    def get(self, url, params=None):
+        return self.response
+
+
+def no_sleep_time():
+    """Module `time` dont sleep() ne fait rien: supprime les délais de politesse du scraper"""
+    shim = types.ModuleType("time")
+    shim.__dict__.update(time.__dict__)
+    shim.sleep = lambda seconds: None
+    return shim
+
+
+@contextlib.contextmanager
+def patched(obj, **attrs):
+    saved = {name: getattr(obj, name) for name in attrs}
+    for name, value in attrs.items():
+        setattr(obj, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(obj, name, value)
+
+
+@contextlib.contextmanager
+def environment(**values):
+    saved = {name: os.environ.get(name) for name in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+@contextlib.contextmanager
+def working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+@contextlib.contextmanager
+def measure(memory: bool):
+    """Mesure le temps écoulé et, optionnellement, le pic mémoire Python"""
+    result = {}
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result["wall_s"] = time.perf_counter() - start
+        if memory:
+            result["peak_mem_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            tracemalloc.stop()
+
+
+def summarize(samples_ms):
+    ordered = sorted(samples_ms)
+    return {
+        "pages": len(ordered),
+        "ms_per_page": statistics.fmean(ordered) if ordered else 0.0,
+        "p50_ms": ordered[len(ordered) // 2] if ordered else 0.0,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0,
+    }
+
+
+def bench_parse(scraper, scraper_wrapper, server, limit, profiles=None):
+    """
+    Temps de parsing + extraction par page d'association, réseau exclu.
+    Si `profiles` est un dict, y ajoute le profil des stratégies d'extraction de chaque pipeline.
+    """
+    from helloscraper import metrics
+    from helloscraper import EngineConfig
+    from helloscraper.extract import get_association_details
+    profiler = metrics.extraction_profiler
+    profiler.enabled = profiles is not None
+    pages = list(server.associations.items())[:limit]
+
+    fetcher = StubFetcher(EngineConfig(base_url=server.base_url, search_url=server.search_url))
+    # Le moteur importe BeautifulSoup à la première page: hors mesure
+    if pages:
+        fetcher.response = FakeResponse(pages[0][1])
+        get_association_details(fetcher, f"{server.base_url}/associations/{pages[0][0]}")
+    profiler.reset()
+    cli_samples = []
+    for slug, body in pages:
+        fetcher.response = FakeResponse(body)
+        start = time.perf_counter()
+        get_association_details(fetcher, f"{server.base_url}/associations/{slug}")
+        cli_samples.append((time.perf_counter() - start) * 1000)
+    if profiles is not None:
+        profiles["cli"] = profiler.report()
+        profiles["cli_text"] = profiler.format_report()
+
+    profiler.reset()
+
+    wrapper = scraper_wrapper.ScraperWrapper(url=server.base_url, date_debut=None, date_fin=None,
+                                             search_term="bench", job_id="bench", results_dir=".")
+    wrapper.fetcher = fetcher
+    wrapper_samples = []
+    for slug, body in pages:
+        fetcher.response = FakeResponse(body)
+        start = time.perf_counter()
+        wrapper.get_association_details(f"{server.base_url}/associations/{slug}")
+        wrapper_samples.append((time.perf_counter() - start) * 1000)
+    if profiles is not None:
+        profiles["wrapper"] = profiler.report()
+        profiles["wrapper_text"] = profiler.format_report()
+    profiler.enabled = False
+
+    # Pages de recherche: état JSON embarqué, puis la même page sans lui (repli DOM)
+    from helloscraper.search import parse_search_page
+    search_samples = {"json": [], "dom": []}
+    for number, body in sorted(server.search_pages.items()):
+        html = body.decode("utf-8")
+        variants = {"json": html, "dom": re.sub(r'<script[^>]*id="__NUXT_DATA__".*?</script>', "", html, flags=re.S)}
+        for source, variant in variants.items():
+            start = time.perf_counter()
+            parse_search_page(variant, server.base_url, number)
+            search_samples[source].append((time.perf_counter() - start) * 1000)
+
+    return {"cli": summarize(cli_samples), "wrapper": summarize(wrapper_samples),
+            "search_json": summarize(search_samples["json"]), "search_dom": summarize(search_samples["dom"])}
+
+
+def bench_transport(server_options, concurrency):
+    """
+    Même lot de pages d'associations téléchargé par `concurrency` jobs concurrents:
+    - HTTP/1.1: une session requests par job (comme un Fetcher par job), donc une connexion chacun
+    - HTTP/2: une session par job sur le pool partagé du moteur, toutes les requêtes multiplexées sur une connexion h2c
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    import requests
+    from helloscraper.transport import HTTP2_AVAILABLE, Http2Session
+
+    def fetch_all(server, session_for_job):
+        urls = [f"{server.base_url}/associations/{slug}" for slug in server.associations]
+        server.reset_stats()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            statuses = list(pool.map(lambda url: session_for_job().get(url, timeout=(10, 30)).status_code, urls))
+        wall = time.perf_counter() - start
+        return {"wall_s": round(wall, 3), "pages_per_s": round(len(urls) / wall, 1) if wall else 0.0,
+                "connections": server.connections, "ok": statuses.count(200)}
+
+    results = {"concurrency": concurrency}
+    local = threading.local()
+
+    def per_job_session():
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        return local.session
+
+    with ReplayServer(**server_options) as server:
+        results["http1"] = fetch_all(server, per_job_session)
+
+    if not HTTP2_AVAILABLE:
+        logging.warning("httpx[http2] n'est pas installé: comparaison HTTP/2 ignorée")
+        return results
+    import httpx
+    shared = httpx.HTTPTransport(http1=False, http2=True)
+    local = threading.local()
+
+    def per_job_http2_session():
+        if not hasattr(local, "session"):
+            local.session = Http2Session(shared)
+        return local.session
+
+    try:
+        with ReplayServer(http2=True, **server_options) as server:
+            results["http2"] = fetch_all(server, per_job_http2_session)
+    finally:
+        shared.close()
+    return results
+
+
+def bench_discovery(server, changed=0.05, seed=0):
+    """
+    Requêtes nécessaires pour découvrir tout le catalogue:
+    - pagination de la recherche, page par page puis avec la fenêtre de préchargement (search_prefetch)
+    - sitemaps, premier passage (index <lastmod> vide)
+    - sitemaps, rafraîchissement après modification de `changed` des pages (seules celles-ci sont à rescraper)
+    """
+    import random
+    import helloscraper.fetch
+    from helloscraper import EngineConfig, Fetcher, LastmodIndex, get_all_association_links, get_sitemap_association_links
+
+    config = EngineConfig(base_url=server.base_url, search_url=server.search_url,
+                          sitemap_url=server.sitemap_url, warmup_probability=0)
+    fetcher = Fetcher(config)
+    sequential = Fetcher(EngineConfig(**{**vars(config), "search_prefetch": 1}))
+    results = {}
+
+    def measure_discovery(name, discover):
+        server.reset_stats()
+        start = time.perf_counter()
+        links = discover()
+        results[name] = {"requests": sum(server.stats.values()), "links": len(links),
+                         "wall_s": round(time.perf_counter() - start, 3)}
+        return links
+
+    index_dir = tempfile.mkdtemp(prefix="bench_sitemap_")
+    index = LastmodIndex(os.path.join(index_dir, "sitemap_index.db"))
+    try:
+        with patched(helloscraper.fetch, time=no_sleep_time()):
+            measure_discovery("search_sequential", lambda: get_all_association_links(sequential, "*"))
+            measure_discovery("search", lambda: get_all_association_links(fetcher, "*"))
+            links = measure_discovery("sitemap", lambda: get_sitemap_association_links(fetcher, "*", index=index))
+            for link in links:
+                index.mark_scraped(link)
+            slugs = list(server.associations)
+            server.touch(random.Random(seed).sample(slugs, max(1, int(len(slugs) * changed))))
+            measure_discovery("sitemap_refresh", lambda: get_sitemap_association_links(fetcher, "*", index=index))
+    finally:
+        index.close()
+        shutil.rmtree(index_dir, ignore_errors=True)
+    return results
+
+
+def run_cli(scraper, server, term, workdir, streaming=False, discovery="search"):
+    """Exécute scraper.main() de bout en bout en répondant aux questions interactives"""
+    import helloscraper.fetch
+    answers = iter([term, "n", "n"])
+    scraper.results.clear()
+    scraper.skip_urls.clear()
+    scraper.interrupted = False
+    scraper.timestamp = f"bench_{time.time_ns()}"
+
+    with working_directory(workdir), \
+            patched(scraper, BASE_URL=server.base_url, SEARCH_URL=server.search_url, SITEMAP_URL=server.sitemap_url,
+                    time=no_sleep_time()), \
+            patched(helloscraper.fetch, time=no_sleep_time()), \
+            environment(STREAMING_MODE=str(streaming), FORCE_LINK_RETRIEVAL="False", DISCOVERY_MODE=discovery), \
+            patched(builtins, input=lambda *args: next(answers, "n")), \
+            contextlib.redirect_stdout(open(os.devnull, "w")):
+        scraper.main()
+
+        records = 0
+        for path in os.listdir("results"):
+            if path.endswith(".csv"):
+                with open(os.path.join("results", path), encoding="utf-8") as f:
+                    records += sum(1 for _ in csv.DictReader(f))
+    return records
+
+
+def run_wrapper(scraper_wrapper, server, term, workdir, max_results):
+    """Exécute ScraperWrapper.run() de bout en bout"""
+    import helloscraper.fetch
+    with patched(scraper_wrapper, BASE_URL=server.base_url, SEARCH_URL=server.search_url), \
+            patched(helloscraper.fetch, time=no_sleep_time()), \
+            contextlib.redirect_stdout(open(os.devnull, "w")):
+        wrapper = scraper_wrapper.ScraperWrapper(
+            url=f"{server.search_url}?query={term}", date_debut=None, date_fin=None,
+            search_term=term, job_id="bench", results_dir=workdir, max_results=max_results
+        )
+        records = []
+        wrapper.record_callback = records.append
+        asyncio.run(wrapper.run())
+    return len(records)
+
+
+def bench_end_to_end(name, run, server, memory):
+    """Mesure un pipeline: un passage chronométré, puis un passage sous tracemalloc pour le pic mémoire"""
+    from helloscraper import metrics
+    workdir = tempfile.mkdtemp(prefix=f"bench_{name}_")
+    try:
+        server.reset_stats()
+        metrics.HTTP_BYTES.reset()
+        with measure(memory=False) as timing:
+            records = run(workdir)
+        requests_served = sum(server.stats.values())
+        received = {"wire": 0, "decoded": 0}
+        for series in metrics.HTTP_BYTES.snapshot():
+            received[series["labels"]["kind"]] += series["value"]
+        result = {
+            "wall_s": timing["wall_s"],
+            "records": records,
+            "requests": requests_served,
+            "pages_per_s": requests_served / timing["wall_s"] if timing["wall_s"] else 0.0,
+            "status_counts": {str(k): v for k, v in sorted(server.stats.items())},
+            "bytes_served": server.bytes_sent,
+            "bytes_wire": int(received["wire"]),
+            "bytes_decoded": int(received["decoded"]),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if memory:
+        workdir = tempfile.mkdtemp(prefix=f"bench_{name}_mem_")
+        try:
+            with measure(memory=True) as mem:
+                run(workdir)
+            result["peak_mem_mb"] = mem["peak_mem_mb"]
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return result
+
+
+def lookup(report, path):
+    value = report
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def compare(report, baseline, tolerance):
+    """Retourne la liste des régressions au-delà de la tolérance (ex: 0.15 = 15%)"""
+    regressions = []
+    for path, higher_is_better in TRACKED_METRICS:
+        current, previous = lookup(report, path), lookup(baseline, path)
+        if not current or not previous:
+            continue
+        change = (current - previous) / previous
+        if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+            regressions.append(f"{path}: {previous:.3f} -> {current:.3f} ({change:+.1%})")
+    return regressions
+
+
+def print_report(report):
+    print("\n=== Benchmark HelloScraper ===")
+    corpus = report["corpus"]
+    server = report["server"]
+    print(f"Corpus: {corpus['associations']} associations, {corpus['search_pages']} pages de recherche")
+    print(f"Serveur: latence {server['latency_ms']}±{server['jitter_ms']} ms, erreurs {server['error_rate']:.0%}")
+    search = report["parse"]
+    if search["search_json"]["ms_per_page"]:
+        print(f"Pages de recherche: {search['search_json']['ms_per_page']:.2f} ms/page (état JSON), "
+              f"{search['search_dom']['ms_per_page']:.2f} ms/page (repli DOM)")
+    for name in ("cli", "wrapper"):
+        parse = report["parse"][name]
+        print(f"\n[{name}] parsing: {parse['ms_per_page']:.2f} ms/page (p50 {parse['p50_ms']:.2f}, p95 {parse['p95_ms']:.2f})")
+        if name in report:
+            e2e = report[name]
+            line = (f"[{name}] bout en bout: {e2e['wall_s']:.2f} s, {e2e['requests']} requêtes, "
+                    f"{e2e['pages_per_s']:.1f} pages/s, {e2e['records']} associations")
+            if "peak_mem_mb" in e2e:
+                line += f", pic mémoire {e2e['peak_mem_mb']:.1f} Mo"
+            print(line)
+            print(f"[{name}] statuts HTTP: {e2e['status_counts']}")
+            if e2e["bytes_decoded"]:
+                print(f"[{name}] octets reçus: {e2e['bytes_wire'] / 1e6:.2f} Mo sur le réseau, "
+                      f"{e2e['bytes_decoded'] / 1e6:.2f} Mo décodés "
+                      f"({e2e['bytes_wire'] / e2e['bytes_decoded']:.0%})")
+    if "discovery" in report:
+        print("\nDécouverte du catalogue complet (requêtes, liens à scraper):")
+        for name, label in (("search_sequential", "pagination de la recherche, page par page"),
+                            ("search", "pagination de la recherche, avec préchargement"),
+                            ("sitemap", "sitemaps, premier passage"),
+                            ("sitemap_refresh", "sitemaps, après modification de 5% des pages")):
+            d = report["discovery"].get(name)
+            if d:
+                print(f"  {label}: {d['requests']} requêtes, {d['links']} liens, {d['wall_s']:.2f}s")
+    if "transport" in report:
+        transport = report["transport"]
+        print(f"\nTransport ({transport['concurrency']} jobs concurrents):")
+        for name in ("http1", "http2"):
+            if name in transport:
+                t = transport[name]
+                print(f"[{name}] {t['pages_per_s']:.1f} pages/s, {t['wall_s']:.2f} s, "
+                      f"{t['connections']} connexions, {t['ok']} réponses 200")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hors-ligne du scraper HelloAsso")
+    parser.add_argument("--corpus", help="Dossier du corpus (par défaut: corpus synthétique temporaire)")
+    parser.add_argument("--count", type=int, default=200, help="Taille du corpus synthétique")
+    parser.add_argument("--term", default="bde")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--error-codes", default="403,429,500")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--parse-pages", type=int, default=100, help="Pages utilisées pour la mesure du parsing")
+    parser.add_argument("--only", choices=["cli", "wrapper"], help="Ne mesurer qu'un pipeline")
+    parser.add_argument("--no-memory", action="store_true", help="Ne pas mesurer le pic mémoire (2x plus rapide)")
+    parser.add_argument("--profile-extraction", action="store_true",
+                        help="Afficher le taux de succès et le coût de chaque stratégie d'extraction")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Exécuter la CLI en mode streaming (frontière sur disque, STREAMING_MODE=true)")
+    parser.add_argument("--compress", action="store_true",
+                        help="Le serveur compresse les pages selon Accept-Encoding (zstd, br, gzip)")
+    parser.add_argument("--discovery", choices=["search", "sitemap"], default="search",
+                        help="Découverte des liens de la CLI (DISCOVERY_MODE); les slugs synthétiques correspondent à --term '*'")
+    parser.add_argument("--transport", action="store_true",
+                        help="Comparer HTTP/1.1 et HTTP/2 (h2c) avec des jobs concurrents (nécessite httpx[http2])")
+    parser.add_argument("--concurrency", type=int, default=8, help="Jobs concurrents de --transport")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--json", help="Écrire le rapport JSON dans ce fichier")
+    parser.add_argument("--compare", help="Rapport JSON de référence")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Régression tolérée (défaut 15%%)")
+    args = parser.parse_args()
+
+    corpus_dir = args.corpus
+    generated = None
+    if not corpus_dir:
+        generated = corpus_dir = tempfile.mkdtemp(prefix="bench_corpus_")
+        generate_corpus(corpus_dir, count=args.count, seed=args.seed)
+
+    # scraper.configure_logging() écrit scraper.log dans le dossier courant (scraper.main() ne le refait pas)
+    import scraper
+    import scraper_wrapper
+    logs_dir = tempfile.mkdtemp(prefix="bench_logs_")
+    with working_directory(logs_dir):
+        scraper.configure_logging()
+    logging.getLogger().setLevel(args.log_level)
+
+    server = ReplayServer(
+        corpus_dir, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        error_codes=[int(c) for c in args.error_codes.split(",") if c], seed=args.seed, compress=args.compress
+    )
+
+    report = {
+        "corpus": {"path": args.corpus or "synthetic", "associations": len(server.associations),
+                   "search_pages": len(server.search_pages)},
+        "server": {"latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms, "error_rate": args.error_rate,
+                   "compress": args.compress},
+        "streaming": args.streaming,
+    }
+
+    try:
+        with server:
+            profiles = {} if args.profile_extraction else None
+            report["parse"] = bench_parse(scraper, scraper_wrapper, server, args.parse_pages, profiles)
+            if profiles is not None:
+                report["extraction_profile"] = {name: profiles[name] for name in ("cli", "wrapper")}
+            if args.only in (None, "cli"):
+                report["cli"] = bench_end_to_end(
+                    "cli", lambda workdir: run_cli(scraper, server, args.term, workdir, args.streaming, args.discovery),
+                    server, not args.no_memory)
+            if args.only in (None, "wrapper"):
+                report["wrapper"] = bench_end_to_end(
+                    "wrapper",
+                    lambda workdir: run_wrapper(scraper_wrapper, server, args.term, workdir, len(server.associations)),
+                    server, not args.no_memory)
+            report["discovery"] = bench_discovery(server, seed=args.seed)
+        if args.transport:
+            report["transport"] = bench_transport(
+                dict(corpus_dir=corpus_dir, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                     error_rate=args.error_rate, seed=args.seed, compress=args.compress), args.concurrency)
+    finally:
+        shutil.rmtree(logs_dir, ignore_errors=True)
+        if generated:
+            shutil.rmtree(generated, ignore_errors=True)
+
+    print_report(report)
+    if args.profile_extraction:
+        for name in ("cli", "wrapper"):
+            print(f"\n[{name}] {profiles[name + '_text']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("\n❌ Régressions détectées:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print("\n✅ Aucune régression au-delà de la tolérance")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 "use client"
 
-import { useEffect, useState } from "react"
+import { useEffect, useRef, useState } from "react"
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/components/ui/card"
 import { Button } from "@/components/ui/button"
 import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from "@/components/ui/table"
@@ -15,19 +15,55 @@ interface FileInfo {
   modified_at: string
 }
 
+interface FilesPage {
+  files: FileInfo[]
+  next_cursor: string | null
+  total: number
+}
+
+// Taille des pages de /api/files (plus récents en premier)
+const PAGE_SIZE = 100
+
+const fetchFilesPage = async (cursor?: string | null): Promise<FilesPage | null> => {
+  const params = new URLSearchParams({ limit: String(PAGE_SIZE) })
+  if (cursor) params.set("cursor", cursor)
+  // "no-cache": le navigateur revalide avec If-None-Match et réutilise sa copie sur 304
+  const response = await fetch(`${API_URL}/api/files?${params}`, { cache: "no-cache" })
+  return response.ok ? response.json() : null
+}
+
 export default function ResultsTable() {
   const [files, setFiles] = useState<FileInfo[]>([])
+  const [total, setTotal] = useState(0)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
   const [loading, setLoading] = useState(true)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [deletingFile, setDeletingFile] = useState<string | null>(null)
+  // Nombre de fichiers affichés, lu par le rafraîchissement périodique
+  const shownRef = useRef(0)
+
+  useEffect(() => {
+    shownRef.current = files.length
+  }, [files])
 
   const fetchFiles = async () => {
     setLoading(true)
     try {
-      const response = await fetch(`${API_URL}/api/files`)
-      if (response.ok) {
-        const data = await response.json()
-        setFiles(data.files || [])
-      }
+      // Recharger autant de pages que celles déjà affichées: le rafraîchissement ne referme pas "Afficher plus"
+      const wanted = Math.max(PAGE_SIZE, shownRef.current)
+      let loaded: FileInfo[] = []
+      let cursor: string | null = null
+      let count = 0
+      do {
+        const data = await fetchFilesPage(cursor)
+        if (!data) return
+        loaded = loaded.concat(data.files || [])
+        cursor = data.next_cursor
+        count = data.total
+      } while (cursor && loaded.length < wanted)
+      setFiles(loaded)
+      setNextCursor(cursor)
+      setTotal(count)
     } catch (err) {
       console.error("Erreur lors de la récupération des fichiers:", err)
     } finally {
@@ -35,6 +71,23 @@ export default function ResultsTable() {
     }
   }
 
+  const loadMore = async () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      const data = await fetchFilesPage(nextCursor)
+      if (data) {
+        setFiles((current) => current.concat(data.files || []))
+        setNextCursor(data.next_cursor)
+        setTotal(data.total)
+      }
+    } catch (err) {
+      console.error("Erreur lors de la récupération des fichiers:", err)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   useEffect(() => {
     fetchFiles()
 
@@ -95,7 +148,8 @@ export default function ResultsTable() {
           <div>
             <CardTitle>Fichiers de résultats</CardTitle>
             <CardDescription>
-              {files.length} fichier{files.length !== 1 ? "s" : ""} disponible{files.length !== 1 ? "s" : ""}
+              {total} fichier{total !== 1 ? "s" : ""} disponible{total !== 1 ? "s" : ""}
+              {files.length < total ? ` (${files.length} affichés)` : ""}
             </CardDescription>
           </div>
           <Button
@@ -166,6 +220,14 @@ export default function ResultsTable() {
                 ))}
               </TableBody>
             </Table>
+            {nextCursor && (
+              <div className="flex justify-center border-t p-3">
+                <Button variant="outline" size="sm" onClick={loadMore} disabled={loadingMore}>
+                  {loadingMore && <Loader2 className="h-4 w-4 mr-2 animate-spin" />}
+                  Afficher plus
+                </Button>
+              </div>
+            )}
           </div>
         )}
       </CardContent>
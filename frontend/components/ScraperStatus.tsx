@@ -28,36 +28,60 @@ export default function ScraperStatus({ jobId, onJobComplete }: ScraperStatusPro
   const [loading, setLoading] = useState(true)
 
   useEffect(() => {
-    const fetchStatus = async () => {
-      try {
-        const response = await fetch(`${API_URL}/api/status/${jobId}`)
-        if (response.ok) {
-          const data = await response.json()
+    let cancelled = false
+    let etag: string | null = null
+
+    // Long-polling: le serveur répond dès que le statut change (ou 304 après 25 secondes)
+    const pollStatus = async () => {
+      while (!cancelled) {
+        try {
+          const headers: HeadersInit = etag ? { "If-None-Match": etag } : {}
+          const response = await fetch(`${API_URL}/api/status/${jobId}?wait=${etag ? 25 : 0}`, {
+            headers,
+            cache: "no-store",
+          })
+
+          if (response.status === 304) {
+            continue
+          }
+
+          if (!response.ok) {
+            break
+          }
+
+          etag = response.headers.get("ETag")
+          const data: JobStatus = await response.json()
+          if (cancelled) {
+            break
+          }
           setStatus(data)
+          setLoading(false)
 
           // Appeler onJobComplete si le job est terminé
-          if ((data.status === "completed" || data.status === "failed") && onJobComplete) {
-            onJobComplete()
+          if (data.status === "completed" || data.status === "failed") {
+            onJobComplete?.()
+            break
           }
+
+          // Sans ETag exploitable, revenir à un polling toutes les 2 secondes
+          if (!etag) {
+            await new Promise((resolve) => setTimeout(resolve, 2000))
+          }
+        } catch (err) {
+          console.error("Erreur lors de la récupération du statut:", err)
+          setLoading(false)
+          await new Promise((resolve) => setTimeout(resolve, 2000))
         }
-      } catch (err) {
-        console.error("Erreur lors de la récupération du statut:", err)
-      } finally {
-        setLoading(false)
       }
+      setLoading(false)
     }
 
-    fetchStatus()
+    pollStatus()
 
-    // Polling toutes les 2 secondes si le job n'est pas terminé
-    const interval = setInterval(() => {
-      if (status?.status === "pending" || status?.status === "running") {
-        fetchStatus()
-      }
-    }, 2000)
-
-    return () => clearInterval(interval)
-  }, [jobId, status?.status, onJobComplete])
+    return () => {
+      cancelled = true
+    }
+  }, [jobId, onJobComplete])
 
   const getStatusIcon = () => {
     if (!status) return null